@@ -14,6 +14,7 @@ from storage_service import save_text_to_s3, save_pdf_to_s3, extract_text_from_p
 from ai_service import get_metadata_from_bedrock, get_embedding
 from search_service import get_opensearch_client, check_and_create_opensearch_index, index_document
 from utils import time_function, success_response, error_response
+from skill_taxonomy import extract_skill_ids, skill_bitset
 
 # Configure logging
 logger = logging.getLogger()
@@ -163,6 +164,10 @@ def lambda_handler(event, context):
         metadata['upload_date'] = datetime.utcnow().isoformat()
         metadata['input_type'] = input_type
         
+        # Canonical skills named in the requirements, encoded like resume skill_bits for overlap scoring
+        metadata['requirement_skill_ids'] = extract_skill_ids(metadata.get('job_requirements'))
+        metadata['requirement_skill_bits'] = skill_bitset(metadata['requirement_skill_ids'])
+        
         # Prepare document for indexing
         document = {
             'metadata': metadata,
@@ -0,0 +1,234 @@
+import json
+import os
+import threading
+import time
+
+import boto3
+import numpy as np
+
+from config import (
+    EMBEDDING_DIMENSION, REGION, VECTOR_CODEC, ANN_INDEX_PATH, ANN_INDEX_S3_BUCKET,
+    ANN_INDEX_S3_KEY, ANN_INDEX_MAX_AGE_SECONDS, ANN_NLIST, ANN_PROBES, ANN_KMEANS_ITERATIONS, logger
+)
+from resume_batch import get_resume_batch
+from similarity_calculator import VECTOR_VALID
+from vector_codec import encode_vectors, encoded_dots
+
+# Loaded index, reused across invocations of a warm Lambda container
+_ann_index = None
+_ann_lock = threading.Lock()
+
+# k-means is trained on at most this many rows per list, then every row is assigned
+KMEANS_SAMPLE_PER_LIST = 256
+KMEANS_SEED = 42
+
+
+def build_profile_vectors(vectors, status):
+    """Mean of the unit-length valid section vectors of each resume
+
+    The matching score is the average section cosine, which equals dot(unit job vector, profile),
+    so clustering profiles by inner product clusters resumes by the score the matcher computes.
+    """
+    encoded = encode_vectors(vectors, 'float32')
+    valid = status == VECTOR_VALID
+    weights = np.zeros(status.shape, dtype=np.float32)
+    np.divide(1.0, encoded['norms'], out=weights, where=valid & (encoded['norms'] > 0))
+    counts = np.maximum(valid.sum(axis=1), 1)[:, None]
+    return np.einsum('ns,nsd->nd', weights, vectors) / counts
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def train_centroids(profiles, nlist, iterations=ANN_KMEANS_ITERATIONS):
+    """Spherical k-means: unit centroids, rows assigned to the centroid with the largest dot product"""
+    rng = np.random.default_rng(KMEANS_SEED)
+    points = _normalize_rows(profiles)
+    if len(points) > nlist * KMEANS_SAMPLE_PER_LIST:
+        points = points[rng.choice(len(points), nlist * KMEANS_SAMPLE_PER_LIST, replace=False)]
+
+    centroids = points[rng.choice(len(points), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(points @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        # Re-seed empty lists from random points so every list stays usable
+        empty = np.flatnonzero(np.bincount(assignment, minlength=nlist) == 0)
+        sums[empty] = points[rng.choice(len(points), len(empty))]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+def build_ann_index(vectors, status, resumes, nlist=None, codec=None):
+    """Cluster packed resume vectors into an IVF index
+
+    Lists are stored CSR-style: the rows of list c are list_rows[list_offsets[c]:list_offsets[c + 1]].
+    Section vectors are kept (in the VECTOR_CODEC encoding) so probed rows can be rescored exactly.
+    """
+    start_time = time.time()
+    count = len(resumes)
+    nlist = max(1, min(count, nlist or ANN_NLIST or int(np.sqrt(count))))
+
+    profiles = build_profile_vectors(vectors, status)
+    centroids = train_centroids(profiles, nlist) if count else np.zeros((nlist, vectors.shape[-1]), dtype=np.float32)
+    assignment = np.argmax(profiles @ centroids.T, axis=1) if count else np.zeros(0, dtype=np.int64)
+
+    index = {
+        'centroids': centroids.astype(np.float32),
+        'list_rows': np.argsort(assignment, kind='stable'),
+        'list_offsets': np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=nlist)))),
+        'vectors': encode_vectors(vectors, codec or VECTOR_CODEC),
+        'status': status,
+        'resumes': resumes,
+        'built_at': time.time()
+    }
+    logger.info(f"Built ANN index: {count} resumes in {nlist} lists, time taken: {time.time() - start_time:.4f} seconds")
+    return index
+
+
+def search_ann_index(index, job_embedding, probes=None):
+    """Return (rows, ann_info): the candidate rows in the lists whose centroids best match the job
+
+    The rows are a shortlist for exact rescoring, not a ranking.
+    """
+    nlist = len(index['centroids'])
+    probes = max(1, min(nlist, probes or ANN_PROBES))
+
+    job_vector = np.asarray(job_embedding, dtype=np.float32)
+    centroid_scores = index['centroids'] @ job_vector
+    probed = np.argpartition(-centroid_scores, probes - 1)[:probes] if probes < nlist else np.arange(nlist)
+
+    offsets = index['list_offsets']
+    rows = np.concatenate([index['list_rows'][offsets[c]:offsets[c + 1]] for c in probed])
+    ann_info = {
+        'ann_lists': nlist,
+        'ann_probes': int(probes),
+        'ann_shortlist': int(len(rows)),
+        'ann_index_size': len(index['resumes']),
+        'ann_index_age_seconds': round(time.time() - index['built_at'], 1)
+    }
+    return np.sort(rows), ann_info
+
+
+def brute_force_scores(index, job_embedding):
+    """Exact average section cosine for every indexed resume (recall baseline)"""
+    job_vector = np.asarray(job_embedding, dtype=np.float32)
+    valid = index['status'] == VECTOR_VALID
+    norms = index['vectors']['norms'] * float(np.linalg.norm(job_vector))
+    cosines = np.zeros(norms.shape, dtype=np.float32)
+    np.divide(encoded_dots(index['vectors'], job_vector), norms, out=cosines, where=valid & (norms > 0))
+    return cosines.sum(axis=1) / np.maximum(valid.sum(axis=1), 1)
+
+
+def save_ann_index(index, path=ANN_INDEX_PATH):
+    """Write the index to an .npz file (atomically, via a temporary file)"""
+    vectors = index['vectors']
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'wb') as handle:
+        np.savez(
+            handle,
+            centroids=index['centroids'],
+            list_rows=index['list_rows'],
+            list_offsets=index['list_offsets'],
+            codec=np.array(vectors['codec']),
+            data=vectors['data'],
+            scales=vectors['scales'] if vectors['scales'] is not None else np.zeros(0, dtype=np.float32),
+            norms=vectors['norms'],
+            status=index['status'],
+            resumes=np.frombuffer(json.dumps(index['resumes'], default=str).encode('utf-8'), dtype=np.uint8),
+            built_at=np.array(index['built_at'])
+        )
+    os.replace(temporary_path, path)
+
+
+def load_ann_index(path=ANN_INDEX_PATH):
+    """Read an index written by save_ann_index"""
+    with np.load(path) as archive:
+        codec = str(archive['codec'])
+        return {
+            'centroids': archive['centroids'],
+            'list_rows': archive['list_rows'],
+            'list_offsets': archive['list_offsets'],
+            'vectors': {
+                'codec': codec,
+                'data': archive['data'],
+                'scales': archive['scales'] if codec == 'int8' else None,
+                'norms': archive['norms']
+            },
+            'status': archive['status'],
+            'resumes': json.loads(archive['resumes'].tobytes().decode('utf-8')),
+            'built_at': float(archive['built_at'])
+        }
+
+
+class AnnIndexUnavailable(Exception):
+    """No persisted ANN index could be loaded; build one with build_ann_index.py"""
+
+
+def _is_fresh(index):
+    return index is not None and time.time() - index['built_at'] <= ANN_INDEX_MAX_AGE_SECONDS
+
+
+def _newest(*indexes):
+    indexes = [index for index in indexes if index is not None]
+    return max(indexes, key=lambda index: index['built_at']) if indexes else None
+
+
+def _load_persisted_index():
+    """Load the newest persisted index from /tmp, downloading from S3 when the /tmp copy is missing or stale"""
+    index, source = None, None
+    if os.path.exists(ANN_INDEX_PATH):
+        try:
+            index, source = load_ann_index(ANN_INDEX_PATH), 'tmp'
+            if _is_fresh(index):
+                return index, source
+        except Exception as e:
+            logger.warning(f"Failed to load ANN index from {ANN_INDEX_PATH}: {str(e)}")
+
+    if ANN_INDEX_S3_BUCKET:
+        try:
+            boto3.client('s3', region_name=REGION).download_file(ANN_INDEX_S3_BUCKET, ANN_INDEX_S3_KEY, ANN_INDEX_PATH)
+            downloaded = load_ann_index(ANN_INDEX_PATH)
+            if _newest(index, downloaded) is downloaded:
+                index, source = downloaded, 's3'
+        except Exception as e:
+            logger.warning(f"Failed to load ANN index from s3://{ANN_INDEX_S3_BUCKET}/{ANN_INDEX_S3_KEY}: {str(e)}")
+
+    return index, source
+
+
+def get_ann_index():
+    """Return the resume ANN index built by build_ann_index.py
+
+    Requests only load the index; they never build it. The in-memory copy is reused until it is older
+    than ANN_INDEX_MAX_AGE_SECONDS, then the persisted copies are checked for a newer build. A stale
+    index keeps serving, with a warning, until the maintenance command publishes a new one.
+    """
+    global _ann_index
+    with _ann_lock:
+        if _is_fresh(_ann_index):
+            return _ann_index, 'memory'
+
+        index, source = _load_persisted_index()
+        if _newest(_ann_index, index) is _ann_index:
+            index, source = _ann_index, 'memory'
+        if index is None:
+            raise AnnIndexUnavailable('ANN index has not been built yet; run build_ann_index.py')
+        if not _is_fresh(index):
+            logger.warning(f"ANN index is {time.time() - index['built_at']:.0f}s old; run build_ann_index.py to rebuild it")
+
+        _ann_index = index
+        return index, source
+
+
+def publish_ann_index(client, dimension=EMBEDDING_DIMENSION, nlist=None, upload=True):
+    """Build the index from a snapshot of the resumes index and persist it to ANN_INDEX_PATH and S3"""
+    batch = get_resume_batch(client, dimension)
+    index = build_ann_index(batch.vectors, batch.status, batch.resumes, nlist)
+    save_ann_index(index, ANN_INDEX_PATH)
+    if upload and ANN_INDEX_S3_BUCKET:
+        boto3.client('s3', region_name=REGION).upload_file(ANN_INDEX_PATH, ANN_INDEX_S3_BUCKET, ANN_INDEX_S3_KEY)
+        logger.info(f"Uploaded ANN index to s3://{ANN_INDEX_S3_BUCKET}/{ANN_INDEX_S3_KEY}")
+    return index
@@ -0,0 +1,29 @@
+'''
+Summary
+Builds the IVF index that ad-hoc job_description text is matched against and publishes it for the Lambda.
+Run from this directory with the same environment variables as the Lambda, after copying the shared modules in
+with `python ../package_lambdas.py --copy` (a checkout has them only in modules/shared):
+    python build_ann_index.py [--nlist 0] [--skip-upload]
+The Lambda only loads the index (from ANN_INDEX_PATH, or from S3 when ANN_INDEX_S3_BUCKET is set), so run
+this on a schedule shorter than ANN_INDEX_MAX_AGE_SECONDS; a deployed Lambda needs the S3 copy.
+'''
+#1. Imports and Logger Setup
+import argparse
+import logging
+import time
+from ann_index import publish_ann_index
+from opensearch_client import get_opensearch_client
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger()
+
+#2. Command Line Entry Point
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build and publish the resume ANN index')
+    parser.add_argument('--nlist', type=int, default=0, help='IVF lists (default: ANN_NLIST, or sqrt of the corpus size)')
+    parser.add_argument('--skip-upload', action='store_true', help='Write ANN_INDEX_PATH without uploading to S3')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    index = publish_ann_index(get_opensearch_client(), nlist=args.nlist or None, upload=not args.skip_upload)
+    logger.info(f"✅ ANN index with {len(index['resumes'])} resumes published in {time.time() - start_time:.2f}s")
@@ -9,9 +9,80 @@ COLLECTION_NAME = os.environ.get('COLLECTION_NAME', 'recruitment-search')
 JOB_DESCRIPTION_INDEX = os.environ.get('JOB_DESCRIPTION_INDEX', 'job_descriptions')
 RESUME_INDEX = os.environ.get('RESUME_INDEX', 'resumes')
 DEFAULT_TOP_K = int(os.environ.get('DEFAULT_TOP_K', '100'))
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '1024'))
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 DEBUG_FILTERING = os.environ.get('DEBUG_FILTERING', 'false').lower() == 'true'
 
+# Warm-container resume vector cache (per job_description_id, LRU within a memory budget)
+RESUME_CACHE_ENABLED = os.environ.get('RESUME_CACHE_ENABLED', 'true').lower() == 'true'
+RESUME_CACHE_MAX_BYTES = int(os.environ.get('RESUME_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+RESUME_CACHE_FULL_SYNC_SECONDS = int(os.environ.get('RESUME_CACHE_FULL_SYNC_SECONDS', '900'))
+# Delta reads start this far before the watermark: ingest stamps upload_date before the index call
+# (timeout 30 s), and a document is searchable only after the next refresh, so an upload can become
+# visible after a newer one. Must cover that ingest latency plus the refresh interval.
+RESUME_CACHE_DELTA_MARGIN_SECONDS = int(os.environ.get('RESUME_CACHE_DELTA_MARGIN_SECONDS', '60'))
+
+# In-memory encoding of packed resume vectors: 'float32' (exact), 'float16' (half the memory)
+# or 'int8' (per-vector scalar quantization, a quarter of the memory)
+VECTOR_CODEC = os.environ.get('VECTOR_CODEC', 'float32').lower()
+
+# Scoring pushdown: 'client' scores pulled vectors in Python, 'auto' lets the planner pick an
+# in-cluster strategy from the pool size, 'script_score' / 'knn' force one
+SCORING_STRATEGY = os.environ.get('SCORING_STRATEGY', 'client').lower()
+EXACT_SCORING_MAX_POOL = int(os.environ.get('EXACT_SCORING_MAX_POOL', '2000'))
+KNN_CANDIDATE_MULTIPLIER = int(os.environ.get('KNN_CANDIDATE_MULTIPLIER', '4'))
+KNN_MIN_CANDIDATES = int(os.environ.get('KNN_MIN_CANDIDATES', '100'))
+
+# Default read consistency: 'eventual' (one cacheable search per read) or 'strong' (refresh the
+# resume index once per request, then read primaries uncached)
+READ_CONSISTENCY = os.environ.get('READ_CONSISTENCY', 'eventual').lower()
+
+# Candidate pool retrieval: pools larger than one page are read by RETRIEVAL_SLICES concurrent
+# sliced search_after streams over a point-in-time snapshot
+RETRIEVAL_PAGE_SIZE = int(os.environ.get('RETRIEVAL_PAGE_SIZE', '1000'))
+RETRIEVAL_SLICES = int(os.environ.get('RETRIEVAL_SLICES', '4'))
+RETRIEVAL_PIT_KEEP_ALIVE = os.environ.get('RETRIEVAL_PIT_KEEP_ALIVE', '1m')
+
+# Summary mode: buckets returned per facet
+SUMMARY_FACET_SIZE = int(os.environ.get('SUMMARY_FACET_SIZE', '20'))
+
+# Warm-container cache of resolved job descriptions (embedding, title, metadata)
+JD_CACHE_MAX_ENTRIES = int(os.environ.get('JD_CACHE_MAX_ENTRIES', '256'))
+JD_CACHE_TTL_SECONDS = int(os.environ.get('JD_CACHE_TTL_SECONDS', '300'))
+
+# Independent OpenSearch calls of one matching request that may run at the same time
+REQUEST_CONCURRENCY = int(os.environ.get('REQUEST_CONCURRENCY', '4'))
+
+# Batch matching: most job_description_ids accepted in one request
+BATCH_MAX_JOB_DESCRIPTIONS = int(os.environ.get('BATCH_MAX_JOB_DESCRIPTIONS', '50'))
+
+# Shortlist matching: most resume_ids accepted in one request, and the warm-container
+# resume_id -> document _id map that lets a repeated shortlist skip the lookup search
+SHORTLIST_MAX_RESUMES = int(os.environ.get('SHORTLIST_MAX_RESUMES', '100'))
+RESUME_DOC_ID_CACHE_MAX_ENTRIES = int(os.environ.get('RESUME_DOC_ID_CACHE_MAX_ENTRIES', '10000'))
+
+# Reverse matching (best-fitting job descriptions for one resume): 'matrix' scores a cached packed
+# JD matrix, 'knn' asks the job_descriptions k-NN index, 'auto' picks by JD count
+REVERSE_MATCH_STRATEGY = os.environ.get('REVERSE_MATCH_STRATEGY', 'auto').lower()
+REVERSE_MATCH_MAX_CACHED_JDS = int(os.environ.get('REVERSE_MATCH_MAX_CACHED_JDS', '5000'))
+JD_MATRIX_CACHE_SECONDS = int(os.environ.get('JD_MATRIX_CACHE_SECONDS', '300'))
+
+# In-process IVF index over the whole resume corpus for text-based (ad-hoc JD) matching
+ANN_INDEX_PATH = os.environ.get('ANN_INDEX_PATH', '/tmp/resume_ann_index.npz')
+ANN_INDEX_S3_BUCKET = os.environ.get('ANN_INDEX_S3_BUCKET', '')
+ANN_INDEX_S3_KEY = os.environ.get('ANN_INDEX_S3_KEY', 'ann/resume_ann_index.npz')
+ANN_INDEX_MAX_AGE_SECONDS = int(os.environ.get('ANN_INDEX_MAX_AGE_SECONDS', '3600'))
+ANN_NLIST = int(os.environ.get('ANN_NLIST', '0'))  # 0 = sqrt(corpus size)
+ANN_PROBES = int(os.environ.get('ANN_PROBES', '8'))
+ANN_KMEANS_ITERATIONS = int(os.environ.get('ANN_KMEANS_ITERATIONS', '10'))
+
+# Order in which resume sections are scored when similarity_threshold pruning is active
+SECTION_EVALUATION_ORDER = [
+    name.strip() for name in
+    os.environ.get('SECTION_EVALUATION_ORDER', 'skills,experience,projects,certifications').split(',')
+    if name.strip()
+]
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(getattr(logging, LOG_LEVEL))
@@ -21,6 +92,10 @@ if DEBUG_FILTERING and LOG_LEVEL != 'DEBUG':
     logger.setLevel(logging.DEBUG)
 
 # Constants
+# Resume section vector fields in packed column order, and the names used in vector_scores
+RESUME_VECTOR_FIELDS = ['skills_vector', 'experience_vector', 'certification_vector', 'projects_vector']
+VECTOR_SCORE_NAMES = ['skills', 'experience', 'certifications', 'projects']
+
 HEADERS = {
     'Access-Control-Allow-Origin': '*',
     'Content-Type': 'application/json'
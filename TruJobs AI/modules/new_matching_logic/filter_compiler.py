@@ -0,0 +1,220 @@
+import re
+from config import logger
+from skill_taxonomy import canonical_skill_ids
+
+# Scalar metadata fields mapped as keyword in the resume index: substring filters on them are exact wildcards
+KEYWORD_METADATA_FIELDS = ('email', 'phone')
+
+# Fields the Python location matcher reads, in its fallback order
+LOCATION_FIELDS = ('location', 'address', 'city', 'current_location', 'preferred_location')
+
+# Metadata fields each Python matcher reads (other filters read metadata.<field> itself)
+FILTER_SOURCE_FIELDS = {
+    'location': LOCATION_FIELDS,
+    'skills': ('skill_ids', 'skills_list', 'skills'),
+    'experience_level': ('total_experience_months', 'work_experience', 'experience', 'professional_experience')
+}
+
+# Keywords of the named experience levels, checked in this order, and the whole years each covers
+EXPERIENCE_LEVEL_KEYWORDS = [
+    (('entry', 'junior', 'fresher', 'beginner', '0-2'), (float('-inf'), 2)),
+    (('mid', 'intermediate', 'middle', '2-5', '3-5'), (3, 5)),
+    (('senior', 'lead', 'sr', '5-10'), (6, 10)),
+    (('principal', 'architect', 'expert', 'staff', '10+'), (11, float('inf')))
+]
+
+RANGE_OPERATORS = {'min': 'gte', 'max': 'lte', 'gte': 'gte', 'gt': 'gt', 'lte': 'lte', 'lt': 'lt'}
+
+ASCII_ALNUM_RUN = re.compile(r'[a-z0-9]+')
+
+
+def is_range_filter(filter_values):
+    """True for {"min": .., "max": ..} style bounds (gte/gt/lte/lt are accepted too)"""
+    return (isinstance(filter_values, dict) and bool(filter_values)
+            and all(key in RANGE_OPERATORS for key in filter_values))
+
+
+def _escape_wildcard(value):
+    return re.sub(r'([\\*?])', r'\\\1', value)
+
+
+def _contains_clause(field, value):
+    """Case-insensitive substring match on one indexed term of the field"""
+    return {"wildcard": {field: {"value": f"*{_escape_wildcard(value)}*", "case_insensitive": True}}}
+
+
+def _range_clause(field, bounds):
+    return {"range": {f"metadata.{field}": {RANGE_OPERATORS[key]: value for key, value in bounds.items()}}}
+
+
+def _keyword_contains_clause(field, filter_values):
+    """Exact translation of the generic matcher (case-insensitive substring) for a keyword field"""
+    if not isinstance(filter_values, list):
+        filter_values = [filter_values]
+    return {
+        "bool": {
+            "should": [_contains_clause(f"metadata.{field}", str(value).lower()) for value in filter_values],
+            "minimum_should_match": 1
+        }
+    }
+
+
+def experience_level_intervals(filter_experience_levels):
+    """Inclusive whole-year intervals experience_level_match accepts for these levels"""
+    if not isinstance(filter_experience_levels, list):
+        filter_experience_levels = [filter_experience_levels]
+
+    intervals = []
+    for filter_level in filter_experience_levels:
+        if not filter_level:
+            continue
+        filter_level_lower = str(filter_level).lower().strip()
+        for keywords, interval in EXPERIENCE_LEVEL_KEYWORDS:
+            if any(keyword in filter_level_lower for keyword in keywords):
+                intervals.append(interval)
+                break
+        else:
+            numeric_match = re.search(r'(\d+)[\s\-]*(?:to|\-)*\s*(\d+)?', filter_level_lower)
+            if numeric_match:
+                max_years = int(numeric_match.group(2)) if numeric_match.group(2) else float('inf')
+                intervals.append((int(numeric_match.group(1)), max_years))
+    return intervals
+
+
+def _location_prefilter_clause(filter_locations):
+    """Necessary condition for location_match, or None when one cannot be expressed
+
+    location_match needs the lowercased filter to be a substring of the resume location. Then every
+    ASCII letter/digit run of the filter lies inside one analyzed token of that location, so a
+    wildcard per run (across every field location_match may read) keeps every resume that can match.
+    The exact check still runs in Python on the survivors.
+    """
+    if isinstance(filter_locations, str):
+        filter_locations = [filter_locations]
+
+    alternatives = []
+    for filter_location in filter_locations:
+        if not filter_location:
+            continue
+        text = str(filter_location).lower().strip()
+        runs = ASCII_ALNUM_RUN.findall(text)
+        if not runs or not text.isascii():
+            return None
+        alternatives.append({
+            "bool": {
+                "filter": [
+                    {"bool": {"should": [_contains_clause(f"metadata.{field}", run) for field in LOCATION_FIELDS],
+                              "minimum_should_match": 1}}
+                    for run in dict.fromkeys(runs)
+                ]
+            }
+        })
+
+    if not alternatives:
+        return None
+    return {"bool": {"should": alternatives, "minimum_should_match": 1}}
+
+
+def _skills_prefilter_clause(filter_skills):
+    """Necessary condition for skills_match, or None when no filter skill is given
+
+    Resumes indexed with metadata.skill_ids are decided exactly by a terms clause on the canonical ids;
+    older resumes without the field are kept for the Python check, which derives their ids.
+    """
+    filter_ids = canonical_skill_ids(filter_skills)
+    if not filter_ids:
+        return None
+    return {
+        "bool": {
+            "should": [
+                {"terms": {"metadata.skill_ids": filter_ids}},
+                {"bool": {"must_not": [{"exists": {"field": "metadata.skill_ids"}}]}}
+            ],
+            "minimum_should_match": 1
+        }
+    }
+
+
+def _experience_prefilter_clause(filter_experience_levels):
+    """Necessary condition for experience_level, or None when no level can be parsed
+
+    Resumes indexed with metadata.total_experience_months are decided exactly: whole years low..high
+    are the months [12 * low, 12 * (high + 1)). Older resumes without the field are kept for the Python
+    check, which derives their years from the experience entries.
+    """
+    ranges = []
+    for low, high in experience_level_intervals(filter_experience_levels):
+        if low > high:
+            continue
+        bounds = {}
+        if low != float('-inf'):
+            bounds['gte'] = max(0, int(low)) * 12
+        if high != float('inf'):
+            bounds['lt'] = (int(high) + 1) * 12
+        ranges.append({"range": {"metadata.total_experience_months": bounds}} if bounds
+                      else {"exists": {"field": "metadata.total_experience_months"}})
+    if not ranges:
+        return None
+    return {
+        "bool": {
+            "should": ranges + [{"bool": {"must_not": [{"exists": {"field": "metadata.total_experience_months"}}]}}],
+            "minimum_should_match": 1
+        }
+    }
+
+
+# Filters with a necessary-condition clause; the exact check stays in Python
+PREFILTER_CLAUSES = {
+    'location': _location_prefilter_clause,
+    'skills': _skills_prefilter_clause,
+    'experience_level': _experience_prefilter_clause
+}
+
+
+def filter_source_fields(metadata_filters):
+    """_source paths apply_metadata_filters needs to evaluate these filters"""
+    fields = []
+    for field in metadata_filters or {}:
+        fields.extend(f"metadata.{name}" for name in FILTER_SOURCE_FIELDS.get(field, (field,)))
+    return list(dict.fromkeys(fields))
+
+
+def compile_metadata_filters(metadata_filters):
+    """Split metadata_filters into OpenSearch filter clauses and the predicates left for Python
+
+    Returns (clauses, residual_filters, pushdown_info):
+    - range bounds on any field and substring filters on keyword fields become exact clauses;
+    - location, skills and experience_level become prefilter clauses and stay in residual_filters for
+      the exact check;
+    - other text fields use matching the index cannot express, so they stay in residual_filters only.
+    residual_filters is in the metadata_filters format, for apply_metadata_filters.
+    """
+    clauses = []
+    residual_filters = {}
+    pushed = []
+    prefiltered = []
+
+    for field, filter_values in (metadata_filters or {}).items():
+        if is_range_filter(filter_values):
+            clauses.append(_range_clause(field, filter_values))
+            pushed.append(field)
+        elif field in KEYWORD_METADATA_FIELDS and filter_values not in (None, [], {}):
+            clauses.append(_keyword_contains_clause(field, filter_values))
+            pushed.append(field)
+        elif field in PREFILTER_CLAUSES:
+            clause = PREFILTER_CLAUSES[field](filter_values)
+            if clause:
+                clauses.append(clause)
+                prefiltered.append(field)
+            residual_filters[field] = filter_values
+        else:
+            residual_filters[field] = filter_values
+
+    pushdown_info = {
+        'filters_pushed_down': pushed,
+        'filters_prefiltered': prefiltered,
+        'filters_in_python': list(residual_filters)
+    }
+    if metadata_filters:
+        logger.info(f"Compiled metadata filters: {pushdown_info}")
+    return clauses, residual_filters, pushdown_info
@@ -1,16 +1,36 @@
 import json
 import base64
+import threading
 import time
-from config import DEFAULT_TOP_K, HEADERS, logger
-from opensearch_client import get_opensearch_client
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import (
+    DEFAULT_TOP_K, HEADERS, SCORING_STRATEGY, BATCH_MAX_JOB_DESCRIPTIONS, SHORTLIST_MAX_RESUMES, RESUME_INDEX,
+    REQUEST_CONCURRENCY, logger
+)
+from opensearch_client import get_opensearch_client, refresh_index, resolve_consistency, CONSISTENCY_MODES
 from resume_service import (
-    verify_job_description, get_job_description_embedding, 
-    get_resume_embeddings, verify_job_description_text, get_job_description_text_embedding
+    verify_job_description, get_job_description_embedding, resolve_job_description,
+    get_resume_embeddings, verify_job_description_text, get_job_description_text_embedding,
+    apply_metadata_filters, build_resume_filter_conditions, count_resumes, plan_scoring_strategy,
+    score_resumes_in_cluster, get_job_description_embeddings, get_resume_by_identifier,
+    count_unscored_resumes, get_materialized_matches, hydrate_resumes, get_resume_summary,
+    ensure_freshness, parse_freshness_token, get_resume_facets, SUMMARY_FACET_FIELDS
 )
+from filter_compiler import compile_metadata_filters, filter_source_fields
+from resume_batch import get_resume_batch, get_resume_batch_by_ids, filter_resume_batch
+from resume_cache import get_cached_resume_batch, is_resume_batch_cached, can_filter_cached, get_cached_upload_date
+from ann_index import AnnIndexUnavailable, get_ann_index, search_ann_index
+from reverse_matching import match_jobs_for_resume
 from similarity_calculator import (
-    calculate_multi_vector_similarity, 
-    create_match_explanation_from_metadata
+    calculate_multi_vector_similarity, rank_packed_resumes, rank_section_scores,
+    create_match_explanation_from_metadata, score_packed_vectors_batch
 )
+from vector_codec import select_rows
+from skill_overlap import job_required_skills, score_skill_coverage, skill_overlap_info, SKILL_SOURCE_FIELDS
+
+# Independent OpenSearch calls of one request (JD lookup, counts, candidate retrieval) overlap on this
+# pool; it lives as long as the warm container and the OpenSearch client is safe to share across threads
+_request_executor = ThreadPoolExecutor(max_workers=REQUEST_CONCURRENCY)
 
 
 def parse_request_body(event):
@@ -166,8 +186,13 @@ def process_resume_matching_by_id(opensearch, job_description_id, resume_id, top
 
 
 def process_resume_matching_by_text(opensearch, job_description_text, resume_id, top_k, 
-                                   metadata_filters, similarity_threshold):
-    """Process resume matching using job description text (fallback method)"""
+                                   metadata_filters, similarity_threshold, ann_probes=None):
+    """Process resume matching using job description text (fallback method)
+
+    Without a resume_id the whole resume corpus is searched through the IVF index published by
+    build_ann_index.py: only the lists closest to the job embedding are probed and their resumes are
+    rescored exactly.
+    """
     
     # Validate job description text
     validation_result = verify_job_description_text(job_description_text)
@@ -180,45 +205,47 @@ def process_resume_matching_by_text(opensearch, job_description_text, resume_id,
     if not job_embedding:
         raise ValueError("Failed to generate job description embedding")
     
-    # For text-based matching, we need to search all resumes since we don't have a specific job ID
-    # This is a simplified approach - in production you might want more sophisticated filtering
-    
-    # Get all resume embeddings (this is a simplified approach)
-    resume_embeddings = get_resume_embeddings(
-        opensearch, None, resume_id, top_k, metadata_filters
-    )
+    scoring_info = {}
+    ann_info = {}
+    if resume_id:
+        resume_embeddings = get_resume_embeddings(
+            opensearch, None, resume_id, top_k, metadata_filters
+        )
+        if not resume_embeddings:
+            return [], {'total_resumes_found': 0, 'method': 'text_based'}
 
-    if not resume_embeddings:
-        return [], {'total_resumes_found': 0, 'method': 'text_based'}
+        similarities = calculate_multi_vector_similarity(
+            job_embedding, resume_embeddings, similarity_threshold, top_k=top_k, debug_info=scoring_info
+        )
+    else:
+        ann_index, index_source = get_ann_index()
+        if not ann_index['resumes'] or len(job_embedding) != ann_index['vectors']['data'].shape[-1]:
+            return [], {'total_resumes_found': 0, 'method': 'text_based', 'ann_index_source': index_source}
 
-    # Calculate similarities using multi-vector approach
-    similarities = calculate_multi_vector_similarity(
-        job_embedding, resume_embeddings, similarity_threshold
-    )
+        rows, ann_info = search_ann_index(ann_index, job_embedding, ann_probes)
+        ann_info['ann_index_source'] = index_source
+        resume_embeddings = [ann_index['resumes'][row] for row in rows]
+        if metadata_filters:
+            row_by_id = {resume['resume_id']: row for row, resume in zip(rows, resume_embeddings)}
+            resume_embeddings = apply_metadata_filters(resume_embeddings, metadata_filters)
+            rows = [row_by_id[resume['resume_id']] for resume in resume_embeddings]
 
-    # Create match explanations
-    matches = []
-    for similarity in similarities:
-        match_explanation = create_match_explanation_from_metadata(
-            similarity['metadata'], similarity['vector_scores']
+        similarities = rank_packed_resumes(
+            job_embedding, select_rows(ann_index['vectors'], rows), ann_index['status'][rows],
+            resume_embeddings, similarity_threshold, top_k, scoring_info
         )
-        
-        matches.append({
-            'nano_Id': similarity.get('nano_Id'),
-            'resume_id': similarity['resume_id'],
-            'candidate_name': similarity['candidate_name'],
-            'similarity_score': similarity['similarity_score'],
-            'vector_scores': similarity['vector_scores'],
-            'match_explanation': match_explanation,
-            'metadata': similarity['metadata']
-        })
+
+    # Create match explanations
+    matches = create_matches_from_similarities(similarities)
 
     return matches, {
         'total_resumes_found': len(resume_embeddings),
+        'matches_after_threshold': scoring_info.get('matches_after_threshold', len(similarities)),
         'job_embedding_dimension': len(job_embedding),
         'similarity_threshold': similarity_threshold,
         'job_title': 'Job Description (from text)',
-        'method': 'text_based'
+        'method': 'text_based',
+        **ann_info
     }
 
 
@@ -283,6 +310,9 @@ def lambda_handler(event, context):
 
         return create_success_response(job_data, matches, total_execution_time, debug_info)
         
+    except AnnIndexUnavailable as e:
+        logger.error(f"ANN index unavailable: {str(e)}")
+        return create_error_response(503, str(e))
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         logger.error("Error details:", exc_info=True)
@@ -311,22 +341,204 @@ def create_success_response(job_data, matches, execution_time, debug_info=None):
     }
 
 
-def process_resume_matching(opensearch, job_description_id, resume_id, top_k, 
-                          metadata_filters, similarity_threshold, calculate_similarity):
-    """Process resume matching logic"""
+def create_matches_from_similarities(similarities, required_skill_ids=None):
+    """Turn ranked similarity dicts into response matches with explanations
+
+    With the job description's required skill ids, each match also reports which of them it covers.
+    """
+    matches = []
+    for similarity in similarities:
+        skill_overlap = skill_overlap_info(similarity['metadata'], required_skill_ids) if required_skill_ids else None
+        match_explanation = create_match_explanation_from_metadata(
+            similarity['metadata'], similarity['vector_scores'], skill_overlap
+        )
+        
+        match = {
+            'nano_Id': similarity.get('nano_Id'),
+            'resume_id': similarity['resume_id'],
+            'candidate_name': similarity['candidate_name'],
+            'similarity_score': similarity['similarity_score'],
+            'vector_scores': similarity['vector_scores'],
+            'match_explanation': match_explanation,
+            'metadata': similarity['metadata']
+        }
+        if skill_overlap:
+            match['skill_overlap'] = skill_overlap
+        matches.append(match)
+    return matches
+
+
+def wait_for_job_description(job_future, job_description_id, cancel_event, *other_futures):
+    """Return the resolved job description, or cancel the request's other calls and raise if it is missing
+
+    Calls that have not started are cancelled. Running resume reads see cancel_event at their next page
+    and stop without filling the resume cache; they are waited for, so nothing outlives the request.
+    """
+    job_data = job_future.result()
+    if not job_data:
+        cancel_event.set()
+        running = [future for future in other_futures if future is not None and not future.cancel()]
+        wait(running)
+        raise ValueError(f'Job description not found: {job_description_id}')
+    return job_data
+
+
+def process_resume_matching_in_cluster(opensearch, job_description_id, job_data, top_k, metadata_filters,
+                                       similarity_threshold, strategy, filter_conditions, pool_count,
+                                       residual_filters=None, filter_info=None, consistency=None):
+    """Process resume matching with scoring pushed down into OpenSearch (no vectors transferred)
+
+    job_data is the resolved job description. filter_conditions already carry the pushed-down
+    metadata filters; residual_filters are checked in Python.
+    """
     
-    # Get resume embeddings first
-    resume_embeddings = get_resume_embeddings(
-        opensearch, job_description_id, resume_id, top_k, metadata_filters
+    if not job_data.get('embedding'):
+        # Nothing to push down; the client path returns the unscored pool
+        return process_resume_matching(
+            opensearch, job_description_id, None, top_k, metadata_filters,
+            similarity_threshold, True, scoring_strategy='client', consistency=consistency
+        )
+    
+    resumes, section_scores, status = score_resumes_in_cluster(
+        opensearch, job_data['embedding'], filter_conditions, pool_count, strategy, top_k,
+        filter_source_fields(residual_filters)
     )
+    
+    scored_count = len(resumes)
+    filtered_resumes = apply_metadata_filters(resumes, residual_filters)
+    if len(filtered_resumes) != len(resumes):
+        rows = {resume['resume_id']: row for row, resume in enumerate(resumes)}
+        selected_rows = [rows[resume['resume_id']] for resume in filtered_resumes]
+        section_scores = section_scores[selected_rows]
+        status = status[selected_rows]
+    
+    scoring_info = {}
+    similarities = rank_section_scores(
+        section_scores, status, filtered_resumes, similarity_threshold, top_k, scoring_info
+    )
+    
+    matches = create_matches_from_similarities(hydrate_resumes(opensearch, similarities),
+                                               job_required_skills(job_data)[0])
+    
+    return matches, {
+        'total_resumes_found': len(filtered_resumes),
+        'matches_after_threshold': scoring_info.get('matches_after_threshold', len(similarities)),
+        'matches_returned': len(matches),
+        'job_embedding_dimension': len(job_data['embedding']),
+        'similarity_threshold': similarity_threshold,
+        'top_k_applied': top_k,
+        'job_title': job_data.get('job_title'),
+        'scoring_strategy': strategy,
+        'pool_count': pool_count,
+        'resumes_scored_in_cluster': scored_count,
+        **(filter_info or {})
+    }
+
+
+def process_resume_matching_materialized(opensearch, job_data, top_k, residual_filters,
+                                         similarity_threshold, filter_conditions, pool_count, filter_info=None):
+    """Process resume matching from the match scores stored at ingest: one sorted query, no vectors"""
+    
+    similarities, stored_above_threshold = get_materialized_matches(
+        opensearch, filter_conditions, similarity_threshold, top_k, residual_filters
+    )
+    matches = create_matches_from_similarities(hydrate_resumes(opensearch, similarities),
+                                               job_required_skills(job_data)[0])
+    
+    # The stored-score total is counted before residual filters, so it is only the match count without them
+    return matches, {
+        'total_resumes_found': pool_count,
+        **({} if residual_filters else {'matches_after_threshold': stored_above_threshold}),
+        'stored_scores_above_threshold': stored_above_threshold,
+        'matches_returned': len(matches),
+        'similarity_threshold': similarity_threshold,
+        'top_k_applied': top_k,
+        'job_title': job_data.get('job_title'),
+        'scoring_strategy': 'materialized',
+        'pool_count': pool_count,
+        **(filter_info or {})
+    }
+
+
+def process_resume_matching(opensearch, job_description_id, resume_id, top_k, 
+                          metadata_filters, similarity_threshold, calculate_similarity,
+                          scoring_strategy=None, consistency=None, skill_weight=0.0, min_skill_coverage=None):
+    """Process resume matching logic
+
+    skill_weight and min_skill_coverage use the required-skill coverage of every candidate (skill
+    bitsets), so they need the pool in this container and always take the client strategy.
+    """
+    
+    # Metadata filters OpenSearch can evaluate go into the query; only the rest are checked in Python
+    filter_clauses, residual_filters, filter_info = compile_metadata_filters(metadata_filters)
+    if not metadata_filters:
+        filter_info = {}
+    
+    # The job description lookup is independent of candidate retrieval, so it runs alongside it
+    job_future = _request_executor.submit(resolve_job_description, opensearch, job_description_id) if calculate_similarity else None
+    cancel_event = threading.Event()
+    
+    # Pool scoring can be pushed down into OpenSearch; the planner picks the strategy from the pool size
+    skill_scoring = bool(skill_weight or min_skill_coverage)
+    if (calculate_similarity and not resume_id and not skill_scoring
+            and str(scoring_strategy or SCORING_STRATEGY).lower() != 'client'):
+        filter_conditions = build_resume_filter_conditions(job_description_id) + filter_clauses
+        requested = str(scoring_strategy or SCORING_STRATEGY).lower()
+        count_future = _request_executor.submit(count_resumes, opensearch, filter_conditions)
+        unscored_future = (_request_executor.submit(count_unscored_resumes, opensearch, filter_conditions)
+                           if requested in ('auto', 'materialized') else None)
+        job_data = wait_for_job_description(job_future, job_description_id, cancel_event, count_future, unscored_future)
+        pool_count = count_future.result()
+        unscored_count = unscored_future.result() if unscored_future else None
+        strategy = plan_scoring_strategy(pool_count, scoring_strategy, unscored_count)
+        if strategy == 'materialized':
+            return process_resume_matching_materialized(
+                opensearch, job_data, top_k, residual_filters,
+                similarity_threshold, filter_conditions, pool_count, filter_info
+            )
+        if strategy != 'client':
+            return process_resume_matching_in_cluster(
+                opensearch, job_description_id, job_data, top_k, metadata_filters,
+                similarity_threshold, strategy, filter_conditions, pool_count,
+                residual_filters, filter_info, consistency
+            )
+    
+    # Get resume embeddings while the job description resolves. Pool queries come from the warm
+    # per-JD cache, which only fetches resumes uploaded since its watermark; single-resume lookups,
+    # and filtered pools the cache cannot serve, go to the index directly with the metadata filters
+    # pushed down. Pools are fetched without candidate details; only the final matches are hydrated.
+    cache_info = dict(filter_info)
+    
+    # Pools arrive as a ResumeBatch (vectors already packed); a single resume is a plain dict list.
+    def fetch_candidates():
+        if resume_id:
+            return get_resume_embeddings(
+                opensearch, job_description_id, resume_id, top_k, metadata_filters, consistency=consistency
+            ), None, {}
+        if not can_filter_cached(metadata_filters) or (filter_clauses and not is_resume_batch_cached(job_description_id)):
+            batch = get_resume_batch(opensearch, job_description_id=job_description_id, metadata_filters=metadata_filters,
+                                     source_fields=list(SKILL_SOURCE_FIELDS) if skill_scoring else [],
+                                     consistency=consistency, cancel_event=cancel_event)
+            return batch.resumes, batch, {'cache': 'bypassed'}
+        batch, batch_info = get_cached_resume_batch(opensearch, job_description_id, consistency=consistency,
+                                                    cancel_event=cancel_event)
+        batch = filter_resume_batch(batch, metadata_filters)
+        return batch.resumes, batch, batch_info
+    
+    candidates_future = _request_executor.submit(fetch_candidates)
+    job_data = wait_for_job_description(job_future, job_description_id, cancel_event, candidates_future) if job_future else None
+    resume_embeddings, batch, pool_info = candidates_future.result()
+    cache_info.update(pool_info)
 
     if not resume_embeddings:
-        return [], {'total_resumes_found': 0}
+        return [], {'total_resumes_found': 0, **cache_info}
 
     # If similarity calculation is disabled, return resumes without scores but apply top_k
     if not calculate_similarity:
         # Apply top_k filtering even without similarity calculation
-        limited_resumes = resume_embeddings[:top_k] if top_k > 0 else resume_embeddings
+        limited_resumes = hydrate_resumes(opensearch, [
+            dict(resume) for resume in (resume_embeddings[:top_k] if top_k > 0 else resume_embeddings)
+        ])
         
         matches = []
         for resume in limited_resumes:
@@ -344,20 +556,15 @@ def process_resume_matching(opensearch, job_description_id, resume_id, top_k,
             'total_resumes_found': len(resume_embeddings),
             'matches_returned': len(matches),
             'top_k_applied': top_k,
-            'similarity_calculation': 'skipped'
+            'similarity_calculation': 'skipped',
+            **cache_info
         }
 
-    # Verify job description exists
-    job_hits = verify_job_description(opensearch, job_description_id)
-    if not job_hits:
-        raise ValueError(f'Job description not found: {job_description_id}')
-    
-    # Get job description embedding
-    job_data = get_job_description_embedding(opensearch, job_description_id)
-    
     if not job_data.get('embedding'):
         # Return resumes without similarity scores if no embedding available, but apply top_k
-        limited_resumes = resume_embeddings[:top_k] if top_k > 0 else resume_embeddings
+        limited_resumes = hydrate_resumes(opensearch, [
+            dict(resume) for resume in (resume_embeddings[:top_k] if top_k > 0 else resume_embeddings)
+        ])
         
         matches = []
         for resume in limited_resumes:
@@ -376,57 +583,349 @@ def process_resume_matching(opensearch, job_description_id, resume_id, top_k,
             'matches_returned': len(matches),
             'top_k_applied': top_k,
             'similarity_calculation': 'no job embedding available',
-            'job_title': job_data.get('job_title')
+            'job_title': job_data.get('job_title'),
+            **cache_info
         }
     
-    # Calculate similarities using multi-vector approach
-    similarities = calculate_multi_vector_similarity(
-        job_data['embedding'], resume_embeddings, similarity_threshold
-    )
-
-    # Apply similarity threshold filtering
-    if similarity_threshold > 0.0:
-        similarities = [s for s in similarities if s['similarity_score'] >= similarity_threshold]
-        logger.info(f"After similarity threshold {similarity_threshold}: {len(similarities)} matches")
-
-    # Sort by similarity score (descending)
-    similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
+    # Required-skill coverage from the skill bitsets: an optional filter and blend into the score
+    required_skill_ids, required_bits = job_required_skills(job_data)
+    coverage = None
+    if batch is not None and skill_scoring:
+        cache_info['required_skills'] = len(required_skill_ids)
+        if required_skill_ids:
+            batch, coverage, skill_info = score_skill_coverage(batch, required_bits, min_skill_coverage)
+            cache_info.update(skill_info)
     
-    # Apply top_k filtering
-    if top_k > 0:
-        similarities = similarities[:top_k]
-        logger.info(f"After top_k filtering ({top_k}): {len(similarities)} matches")
+    # Calculate similarities using multi-vector approach; threshold and top_k are applied
+    # inside the scorer with a partial selection, so losers are never sorted or materialized
+    scoring_info = {}
+    if batch is None:
+        similarities = calculate_multi_vector_similarity(
+            job_data['embedding'], resume_embeddings, similarity_threshold,
+            top_k=top_k, debug_info=scoring_info
+        )
+    elif len(job_data['embedding']) != batch.dimension:
+        logger.warning(f"Dimension mismatch: job embedding {len(job_data['embedding'])} vs resume vectors {batch.dimension}")
+        similarities = []
+    else:
+        similarities = rank_packed_resumes(
+            job_data['embedding'], batch.vectors, batch.status, batch.resumes,
+            similarity_threshold, top_k, scoring_info, coverage, skill_weight
+        )
+    logger.info(f"After similarity threshold {similarity_threshold} and top_k {top_k}: {len(similarities)} matches")
 
     # Create match explanations
-    matches = []
-    for similarity in similarities:
-        match_explanation = create_match_explanation_from_metadata(
-            similarity['metadata'], similarity['vector_scores']
-        )
-        
-        matches.append({
-            'nano_Id': similarity.get('nano_Id'),
-            'resume_id': similarity['resume_id'],
-            'candidate_name': similarity['candidate_name'],
-            'similarity_score': similarity['similarity_score'],
-            'vector_scores': similarity['vector_scores'],
-            'match_explanation': match_explanation,
-            'metadata': similarity['metadata']
-        })
+    matches = create_matches_from_similarities(hydrate_resumes(opensearch, similarities), required_skill_ids)
 
     return matches, {
         'total_resumes_found': len(resume_embeddings),
-        'matches_after_threshold': len(similarities) if similarity_threshold > 0.0 else len(resume_embeddings),
+        'matches_after_threshold': scoring_info.get('matches_after_threshold', len(similarities)),
         'matches_returned': len(matches),
         'job_embedding_dimension': len(job_data['embedding']),
         'similarity_threshold': similarity_threshold,
         'top_k_applied': top_k,
-        'job_title': job_data.get('job_title')
+        'job_title': job_data.get('job_title'),
+        **cache_info
+    }
+
+
+def process_shortlist_matching(opensearch, job_description_id, resume_ids, top_k, metadata_filters,
+                               similarity_threshold, calculate_similarity, skill_weight=0.0, min_skill_coverage=None):
+    """Score an explicit list of resumes against one job description
+
+    The resumes are fetched with one mget (after a resume_id -> _id lookup the warm container usually
+    answers from memory) while the job description resolves, then scored in one vectorized pass.
+    They do not have to be in the job description's candidate pool. metadata_filters are checked in Python.
+    """
+    job_future = _request_executor.submit(resolve_job_description, opensearch, job_description_id) if calculate_similarity else None
+    cancel_event = threading.Event()
+    batch_future = _request_executor.submit(get_resume_batch_by_ids, opensearch, resume_ids, cancel_event=cancel_event)
+    job_data = wait_for_job_description(job_future, job_description_id, cancel_event, batch_future) if job_future else {}
+    batch, missing_ids = batch_future.result()
+    batch = filter_resume_batch(batch, metadata_filters)
+
+    shortlist_info = {
+        'resume_ids_requested': len(resume_ids),
+        'resume_ids_not_found': missing_ids,
+        'total_resumes_found': len(batch),
+        'top_k_applied': top_k,
+        'job_title': job_data.get('job_title'),
+        'method': 'shortlist'
+    }
+
+    embedding = job_data.get('embedding')
+    if not embedding or len(embedding) != batch.dimension:
+        if embedding:
+            logger.warning(f"Dimension mismatch: job embedding {len(embedding)} vs resume vectors {batch.dimension}")
+        limited_resumes = batch.resumes[:top_k] if top_k > 0 else batch.resumes
+        matches = [{
+            'nano_Id': resume.get('nano_Id'),
+            'resume_id': resume['resume_id'],
+            'candidate_name': resume['candidate_name'],
+            'similarity_score': None,
+            'vector_scores': None,
+            'match_explanation': 'Resume from the requested shortlist',
+            'metadata': resume['metadata']
+        } for resume in limited_resumes]
+        return matches, {**shortlist_info, 'similarity_calculation': 'skipped' if not calculate_similarity
+                         else 'no job embedding available'}
+
+    required_skill_ids, required_bits = job_required_skills(job_data)
+    coverage = None
+    if required_skill_ids and (skill_weight or min_skill_coverage):
+        batch, coverage, skill_info = score_skill_coverage(batch, required_bits, min_skill_coverage)
+        shortlist_info.update(skill_info)
+
+    scoring_info = {}
+    similarities = rank_packed_resumes(
+        embedding, batch.vectors, batch.status, batch.resumes, similarity_threshold, top_k, scoring_info,
+        coverage, skill_weight
+    )
+    matches = create_matches_from_similarities(similarities, required_skill_ids)
+    return matches, {
+        **shortlist_info,
+        'matches_after_threshold': scoring_info.get('matches_after_threshold', len(similarities)),
+        'matches_returned': len(matches),
+        'job_embedding_dimension': len(embedding),
+        'similarity_threshold': similarity_threshold
+    }
+
+
+def create_batch_success_response(results, execution_time, debug_info=None):
+    """Create the success response for a batch request: one match list per job description"""
+    response_body = {
+        'job_descriptions': results,
+        'total_job_descriptions': len(results),
+        'execution_time': f"{execution_time:.4f}s"
+    }
+    
+    if debug_info:
+        response_body['debug_info'] = debug_info
+    
+    return {
+        'statusCode': 200,
+        'headers': HEADERS,
+        'body': json.dumps(response_body)
+    }
+
+
+def process_batch_resume_matching(opensearch, job_description_ids, top_k, metadata_filters,
+                                  similarity_threshold, calculate_similarity, consistency=None):
+    """Match several job descriptions against their own candidate pools in one pass
+
+    All JD embeddings come from one query and the union of their candidate pools from another;
+    the pools are decoded into one ResumeBatch and scored with a single JD-matrix x resume-matrix product.
+    Candidate details are fetched for the returned matches of every JD with a single mget.
+    """
+    start_time = time.time()
+    jobs_future = (_request_executor.submit(get_job_description_embeddings, opensearch, job_description_ids)
+                   if calculate_similarity else None)
+    batch = get_resume_batch(
+        opensearch, metadata_filters=metadata_filters, job_description_ids=job_description_ids,
+        source_fields=['metadata.job_description_id'], consistency=consistency
+    )
+    resume_embeddings = batch.resumes
+    job_descriptions = jobs_future.result() if jobs_future else {}
+
+    pools = {job_id: [] for job_id in job_description_ids}
+    for row, resume in enumerate(resume_embeddings):
+        job_id = resume.get('job_description_id') or resume.get('metadata', {}).get('job_description_id')
+        if job_id in pools:
+            pools[job_id].append(row)
+
+    # JDs that can be scored share one embedding matrix; the rest are reported without scores
+    scored_ids = []
+    if calculate_similarity:
+        for job_id in job_description_ids:
+            embedding = job_descriptions.get(job_id, {}).get('embedding')
+            if embedding and len(embedding) == batch.dimension and pools[job_id]:
+                scored_ids.append(job_id)
+            elif embedding and len(embedding) != batch.dimension:
+                logger.warning(f"Dimension mismatch for job description {job_id}: {len(embedding)} vs {batch.dimension}")
+
+    section_scores = None
+    status = batch.status
+    if scored_ids:
+        job_matrix = [job_descriptions[job_id]['embedding'] for job_id in scored_ids]
+        section_scores = score_packed_vectors_batch(job_matrix, batch.vectors, status)
+
+    results = []
+    ranked = {}
+    for job_id in job_description_ids:
+        rows = pools[job_id]
+        job_data = job_descriptions.get(job_id, {})
+        result = {
+            'id': job_id,
+            'title': job_data.get('job_title') or 'Job Description',
+            'total_resumes_found': len(rows)
+        }
+
+        if job_id in scored_ids:
+            scoring_info = {}
+            similarities = rank_section_scores(
+                section_scores[scored_ids.index(job_id)][rows], status[rows],
+                [resume_embeddings[row] for row in rows], similarity_threshold, top_k, scoring_info
+            )
+            ranked[job_id] = similarities
+            result['matches_after_threshold'] = scoring_info.get('matches_after_threshold', len(similarities))
+        else:
+            if calculate_similarity and job_id not in job_descriptions:
+                result['error'] = f'Job description not found: {job_id}'
+            limited_rows = rows[:top_k] if top_k > 0 else rows
+            ranked[job_id] = [resume_embeddings[row] for row in limited_rows]
+        results.append(result)
+
+    hydrate_resumes(opensearch, [resume for resumes in ranked.values() for resume in resumes])
+    for result in results:
+        if result['id'] in scored_ids:
+            result['matches'] = create_matches_from_similarities(
+                ranked[result['id']], job_required_skills(job_descriptions[result['id']])[0]
+            )
+        else:
+            result['matches'] = [{
+                'nano_Id': resume.get('nano_Id'),
+                'resume_id': resume['resume_id'],
+                'candidate_name': resume['candidate_name'],
+                'similarity_score': None,
+                'vector_scores': None,
+                'match_explanation': 'Resume uploaded for this job description',
+                'metadata': resume['metadata']
+            } for resume in ranked[result['id']]]
+        result['total_matches'] = len(result['matches'])
+
+    logger.info(f"process_batch_resume_matching for {len(job_description_ids)} job descriptions, "
+                f"{len(resume_embeddings)} resumes, time taken: {time.time() - start_time:.4f} seconds")
+    return results, {
+        'job_descriptions_requested': len(job_description_ids),
+        'job_descriptions_found': len(job_descriptions),
+        'job_descriptions_scored': len(scored_ids),
+        'total_resumes_found': len(resume_embeddings),
+        'similarity_threshold': similarity_threshold,
+        'method': 'batch'
+    }
+
+
+def create_summary_success_response(job_description_ids, total, candidates, facet_counts, execution_time,
+                                   debug_info=None):
+    """Create the success response for summary mode: pool counts and candidate ids, no scores"""
+    response_body = {
+        'mode': 'summary',
+        'job_description_ids': job_description_ids,
+        'total_candidates': total,
+        'candidates': candidates,
+        'total_listed': len(candidates),
+        'execution_time': f"{execution_time:.4f}s"
+    }
+    if facet_counts:
+        response_body['facets'] = facet_counts
+    
+    if debug_info:
+        response_body['debug_info'] = debug_info
+    
+    return {
+        'statusCode': 200,
+        'headers': HEADERS,
+        'body': json.dumps(response_body)
+    }
+
+
+def process_resume_summary(opensearch, job_description_ids, top_k, metadata_filters, facets):
+    """Count and list the candidate pool of one or more job descriptions without touching vectors
+
+    The job description itself is not looked up: an unknown ID simply has an empty pool.
+    """
+    filter_clauses, residual_filters, filter_info = compile_metadata_filters(metadata_filters)
+    filter_conditions = build_resume_filter_conditions(
+        job_description_ids[0] if len(job_description_ids) == 1 else None,
+        job_description_ids=job_description_ids if len(job_description_ids) > 1 else None
+    ) + filter_clauses
+    total, candidates, facet_counts = get_resume_summary(
+        opensearch, filter_conditions, residual_filters, top_k, facets
+    )
+    return total, candidates, facet_counts, {
+        'top_k_applied': top_k,
+        'method': 'summary',
+        **(filter_info if metadata_filters else {})
+    }
+
+
+def create_facets_success_response(total, per_job, execution_time, debug_info=None):
+    """Create the success response for facets mode: per-JD candidate counts by facet"""
+    response_body = {
+        'mode': 'facets',
+        'job_descriptions': [{'id': job_id, **counts} for job_id, counts in per_job.items()],
+        'total_candidates': total,
+        'execution_time': f"{execution_time:.4f}s"
+    }
+    
+    if debug_info:
+        response_body['debug_info'] = debug_info
+    
+    return {
+        'statusCode': 200,
+        'headers': HEADERS,
+        'body': json.dumps(response_body)
+    }
+
+
+def process_resume_facets(opensearch, job_description_ids, metadata_filters, facets):
+    """Count the candidate pools of job descriptions by skill, location and experience band
+
+    One aggregation query with size=0; no vectors or candidate details are read.
+    """
+    filter_clauses, residual_filters, filter_info = compile_metadata_filters(metadata_filters)
+    total, per_job = get_resume_facets(opensearch, job_description_ids, filter_clauses, residual_filters, facets)
+    return total, per_job, {
+        'facets': facets or list(SUMMARY_FACET_FIELDS),
+        'method': 'facets',
+        **(filter_info if metadata_filters else {})
+    }
+
+
+def create_reverse_success_response(resume, matches, execution_time, debug_info=None):
+    """Create the success response for reverse matching: best-fitting job descriptions for one resume"""
+    response_body = {
+        'resume': {
+            'resume_id': resume.get('resume_id'),
+            'nano_Id': resume.get('nano_Id'),
+            'candidate_name': resume.get('candidate_name')
+        },
+        'matches': matches,
+        'total_matches': len(matches),
+        'execution_time': f"{execution_time:.4f}s"
+    }
+    
+    if debug_info:
+        response_body['debug_info'] = debug_info
+    
+    return {
+        'statusCode': 200,
+        'headers': HEADERS,
+        'body': json.dumps(response_body)
+    }
+
+
+def process_reverse_matching(opensearch, resume_id, nano_id, top_k, similarity_threshold, reverse_strategy=None):
+    """Rank job descriptions for one resume, identified by resume_id or nano_Id"""
+    resume = get_resume_by_identifier(opensearch, resume_id, nano_id)
+    if not resume:
+        raise ValueError(f'Resume not found: {resume_id or nano_id}')
+
+    matches, reverse_info = match_jobs_for_resume(
+        opensearch, resume, top_k, similarity_threshold, reverse_strategy
+    )
+    for match in matches:
+        match['match_explanation'] = create_match_explanation_from_metadata({}, match['vector_scores'])
+
+    return resume, matches, {
+        'similarity_threshold': similarity_threshold,
+        'method': 'reverse',
+        **reverse_info
     }
 
 
 def lambda_handler(event, context):
-    """Main Lambda handler function"""
+    """Main Lambda handler function - supports both job_description_id and job_description text"""
     total_start_time = time.time()
     
     try:
@@ -440,39 +939,166 @@ def lambda_handler(event, context):
 
         # Extract and validate parameters
         job_description_id = request_data.get('job_description_id')
-        if not job_description_id:
-            return create_error_response(400, 'job_description_id is required')
-
+        job_description_text = request_data.get('job_description')
+        job_description_ids = request_data.get('job_description_ids')
         resume_id = request_data.get('resume_id')
+        resume_ids = request_data.get('resume_ids')
+        nano_id = request_data.get('nano_Id')
+        if resume_ids is not None:
+            if not isinstance(resume_ids, list) or not resume_ids or not all(isinstance(i, str) and i for i in resume_ids):
+                return create_error_response(400, 'resume_ids must be a non-empty list of resume IDs')
+            if len(resume_ids) > SHORTLIST_MAX_RESUMES:
+                return create_error_response(400, f'resume_ids accepts at most {SHORTLIST_MAX_RESUMES} IDs')
+            if not job_description_id:
+                return create_error_response(400, 'resume_ids requires job_description_id')
+        # Reverse matching: only a resume is given, so rank job descriptions for it
+        reverse_match = not job_description_id and not job_description_text and not job_description_ids
+        if reverse_match and not resume_id and not nano_id:
+            return create_error_response(400, 'Either job_description_id, job_description_ids, job_description, resume_id or nano_Id is required')
+        if job_description_ids is not None:
+            if not isinstance(job_description_ids, list) or not all(isinstance(i, str) and i for i in job_description_ids):
+                return create_error_response(400, 'job_description_ids must be a list of job description IDs')
+            if len(job_description_ids) > BATCH_MAX_JOB_DESCRIPTIONS:
+                return create_error_response(400, f'job_description_ids accepts at most {BATCH_MAX_JOB_DESCRIPTIONS} IDs')
+
         top_k = request_data.get('top_k', DEFAULT_TOP_K)
         metadata_filters = request_data.get('metadata_filters', {})
         similarity_threshold = request_data.get('similarity_threshold', 0.0)
         calculate_similarity = request_data.get('calculate_similarity', True)
+        scoring_strategy = request_data.get('scoring_strategy')
+        ann_probes = request_data.get('ann_probes')
+        if ann_probes is not None and (isinstance(ann_probes, bool) or not isinstance(ann_probes, int) or ann_probes < 1):
+            return create_error_response(400, 'ann_probes must be a positive integer')
+        reverse_strategy = request_data.get('reverse_strategy')
+        skill_weight = request_data.get('skill_weight') or 0.0
+        min_skill_coverage = request_data.get('min_skill_coverage')
+        for name, value in (('skill_weight', skill_weight), ('min_skill_coverage', min_skill_coverage)):
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1):
+                return create_error_response(400, f'{name} must be a number between 0 and 1')
+        consistency = request_data.get('consistency')
+        if consistency is not None and str(consistency).lower() not in CONSISTENCY_MODES:
+            return create_error_response(400, f"consistency must be one of: {', '.join(CONSISTENCY_MODES)}")
+        consistency = resolve_consistency(consistency)
+        min_freshness = request_data.get('min_freshness')
+        if min_freshness is not None and not isinstance(min_freshness, str):
+            return create_error_response(400, 'min_freshness must be the freshness_token string returned by a resume upload')
+        mode = str(request_data.get('mode') or 'match').lower()
+        facets = request_data.get('facets') or []
+        if mode not in ('match', 'summary', 'facets'):
+            return create_error_response(400, "mode must be 'match', 'summary' or 'facets'")
+        if mode in ('summary', 'facets'):
+            if not job_description_id and not job_description_ids:
+                return create_error_response(400, f'{mode.capitalize()} mode requires job_description_id or job_description_ids')
+            if not isinstance(facets, list) or any(facet not in SUMMARY_FACET_FIELDS for facet in facets):
+                return create_error_response(400, f'facets must be a list drawn from: {", ".join(SUMMARY_FACET_FIELDS)}')
 
-        logger.info(f"Parameters: job_description_id={job_description_id}, resume_id={resume_id}, "
-                   f"top_k={top_k}, metadata_filters={metadata_filters}, similarity_threshold={similarity_threshold}, "
-                   f"calculate_similarity={calculate_similarity}")
+        logger.info(f"Parameters: job_description_id={job_description_id}, job_description_ids={job_description_ids}, "
+                   f"job_description_text_provided={bool(job_description_text)}, "
+                   f"resume_id={resume_id}, resume_ids={resume_ids}, top_k={top_k}, metadata_filters={metadata_filters}, "
+                   f"similarity_threshold={similarity_threshold}, calculate_similarity={calculate_similarity}, "
+                   f"scoring_strategy={scoring_strategy}, ann_probes={ann_probes}, nano_Id={nano_id}, "
+                   f"reverse_strategy={reverse_strategy}, mode={mode}, facets={facets}, consistency={consistency}, "
+                   f"min_freshness={min_freshness}, skill_weight={skill_weight}, min_skill_coverage={min_skill_coverage}")
 
         # Initialize OpenSearch client
         opensearch = get_opensearch_client()
         
+        # Strong reads make every acknowledged resume write visible once, up front; otherwise a
+        # min_freshness token from a resume upload refreshes only if that upload is not visible yet
+        freshness_info = {}
+        if consistency == 'strong':
+            refresh_index(opensearch, RESUME_INDEX)
+        elif min_freshness and (job_description_id or job_description_ids):
+            _, token_resume_id, _ = parse_freshness_token(min_freshness)
+            cached_dates = [get_cached_upload_date(job_id, token_resume_id)
+                            for job_id in dict.fromkeys(job_description_ids or [job_description_id])]
+            freshness_info['freshness'] = ensure_freshness(
+                opensearch, min_freshness, max((date for date in cached_dates if date), default=None)
+            )
+        
+        # Facets mode: per-JD counts by skill, location and experience band from one aggregation query
+        if mode == 'facets':
+            total, per_job, debug_info = process_resume_facets(
+                opensearch, list(dict.fromkeys(job_description_ids or [job_description_id])), metadata_filters, facets
+            )
+            debug_info.update(freshness_info)
+            total_execution_time = time.time() - total_start_time
+            logger.info(f"Total execution time: {total_execution_time:.4f} seconds")
+            return create_facets_success_response(total, per_job, total_execution_time, debug_info)
+
+        # Summary mode: counts and candidate ids for list views, without vectors or JD lookups
+        if mode == 'summary':
+            summary_ids = list(dict.fromkeys(job_description_ids or [job_description_id]))
+            total, candidates, facet_counts, debug_info = process_resume_summary(
+                opensearch, summary_ids, top_k, metadata_filters, facets
+            )
+            debug_info.update(freshness_info)
+            total_execution_time = time.time() - total_start_time
+            logger.info(f"Total execution time: {total_execution_time:.4f} seconds")
+            return create_summary_success_response(
+                summary_ids, total, candidates, facet_counts, total_execution_time, debug_info
+            )
+
+        if reverse_match:
+            resume, matches, debug_info = process_reverse_matching(
+                opensearch, resume_id, nano_id, top_k, similarity_threshold, reverse_strategy
+            )
+            total_execution_time = time.time() - total_start_time
+            logger.info(f"Total execution time: {total_execution_time:.4f} seconds")
+            return create_reverse_success_response(resume, matches, total_execution_time, debug_info)
+
+        # Batch mode: one match list per job description, scored in a single pass
+        if job_description_ids:
+            results, debug_info = process_batch_resume_matching(
+                opensearch, list(dict.fromkeys(job_description_ids)), top_k,
+                metadata_filters, similarity_threshold, calculate_similarity, consistency
+            )
+            debug_info.update(freshness_info)
+            total_execution_time = time.time() - total_start_time
+            logger.info(f"Total execution time: {total_execution_time:.4f} seconds")
+            return create_batch_success_response(results, total_execution_time, debug_info)
+
         # Process resume matching
-        matches, debug_info = process_resume_matching(
-            opensearch, job_description_id, resume_id, top_k, 
-            metadata_filters, similarity_threshold, calculate_similarity
-        )
+        if resume_ids:
+            matches, debug_info = process_shortlist_matching(
+                opensearch, job_description_id, list(dict.fromkeys(resume_ids)), top_k,
+                metadata_filters, similarity_threshold, calculate_similarity, skill_weight, min_skill_coverage
+            )
+            debug_info.update(freshness_info)
+            job_data = {
+                'id': job_description_id,
+                'title': debug_info.get('job_title') or 'Job Description'
+            }
+        elif job_description_id:
+            matches, debug_info = process_resume_matching(
+                opensearch, job_description_id, resume_id, top_k, 
+                metadata_filters, similarity_threshold, calculate_similarity,
+                scoring_strategy, consistency, skill_weight, min_skill_coverage
+            )
+            debug_info.update(freshness_info)
+            job_data = {
+                'id': job_description_id,
+                'title': debug_info.get('job_title', 'Job Description')
+            }
+        else:
+            # Ad-hoc job description text is matched against the whole corpus via the ANN index
+            matches, debug_info = process_resume_matching_by_text(
+                opensearch, job_description_text, resume_id, top_k,
+                metadata_filters, similarity_threshold, ann_probes
+            )
+            job_data = {
+                'id': 'text_based',
+                'title': 'Job Description (from text)'
+            }
 
         total_execution_time = time.time() - total_start_time
         logger.info(f"Total execution time: {total_execution_time:.4f} seconds")
 
-        # Create response
-        job_data = {
-            'id': job_description_id,
-            'title': debug_info.get('job_title', 'Job Description')
-        }
-
         return create_success_response(job_data, matches, total_execution_time, debug_info)
         
+    except AnnIndexUnavailable as e:
+        logger.error(f"ANN index unavailable: {str(e)}")
+        return create_error_response(503, str(e))
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         logger.error("Error details:", exc_info=True)
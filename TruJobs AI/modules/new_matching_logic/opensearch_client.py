@@ -3,7 +3,7 @@ import json
 import time
 from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth
 from botocore.exceptions import ClientError
-from config import REGION, SERVICE, COLLECTION_NAME, OPENSEARCH_ENDPOINT, logger
+from config import REGION, SERVICE, COLLECTION_NAME, OPENSEARCH_ENDPOINT, READ_CONSISTENCY, logger
 
 
 def get_opensearch_collection_endpoint(name, region):
@@ -51,8 +51,28 @@ def get_opensearch_client(collection_name=COLLECTION_NAME, region=REGION):
         raise
 
 
+# Index name -> mapping, for indices already verified by this warm container
+_verified_indices = {}
+
+# Read consistency modes: 'eventual' is one search the request cache may answer; 'strong' refreshes
+# the index once per request and reads primaries without the request cache
+CONSISTENCY_MODES = ('eventual', 'strong')
+
+
+def resolve_consistency(consistency=None):
+    """Return a supported consistency mode, falling back to READ_CONSISTENCY for unknown values"""
+    mode = str(consistency or READ_CONSISTENCY).lower()
+    if mode not in CONSISTENCY_MODES:
+        logger.warning(f"Unknown read consistency '{mode}', using eventual")
+        return 'eventual'
+    return mode
+
+
 def verify_index_and_mapping(client, index_name):
-    """Verify index exists and get mapping information"""
+    """Verify index exists and get mapping information; a verified index is not checked again"""
+    if index_name in _verified_indices:
+        return True, _verified_indices[index_name]
+    
     start_time = time.time()
     try:
         exists = client.indices.exists(index=index_name)
@@ -61,7 +81,8 @@ def verify_index_and_mapping(client, index_name):
             return False, None
             
         mapping = client.indices.get_mapping(index=index_name)
-        logger.info(f"Index {index_name} mapping: {json.dumps(mapping, indent=2)}")
+        logger.debug(f"Index {index_name} mapping: {json.dumps(mapping)}")
+        _verified_indices[index_name] = mapping
         
         logger.info(f"verify_index_and_mapping time taken: {time.time() - start_time:.4f} seconds")
         return True, mapping
@@ -70,45 +91,30 @@ def verify_index_and_mapping(client, index_name):
         return False, None
 
 
-def execute_search_with_retry(client, index_name, query, max_retries=5):
-    """Execute search with retry mechanism and consistency preferences"""
-    best_result = None
-    max_hits = 0
+def refresh_index(client, index_name):
+    """Refresh an index so writes acknowledged so far are visible to search"""
+    start_time = time.time()
+    try:
+        client.indices.refresh(index=index_name)
+        logger.info(f"Index {index_name} refreshed, time taken: {time.time() - start_time:.4f} seconds")
+    except Exception as e:
+        logger.warning(f"Index refresh failed: {str(e)}")
+
+
+def execute_search_with_retry(client, index_name, query, consistency=None, max_retries=3):
+    """Execute one search, retrying only when the request itself fails
+
+    'strong' reads prefer primary shards and bypass the request cache; 'eventual' reads may be cached.
+    """
+    search_params = {'index': index_name, 'body': query}
+    if resolve_consistency(consistency) == 'strong':
+        search_params.update({'preference': '_primary_first', 'request_cache': False})
     
     for attempt in range(max_retries):
         try:
-            search_params = {
-                'index': index_name,
-                'body': query,
-                'preference': f'_primary_first',
-                'request_cache': False
-            }
-            
-            logger.info(f"Search attempt {attempt + 1}/{max_retries}")
-            response = client.search(**search_params)
-            
-            hits = response.get('hits', {}).get('hits', [])
-            total_hits = response.get('hits', {}).get('total', {}).get('value', 0)
-            
-            logger.info(f"Attempt {attempt + 1}: Found {len(hits)} hits, total: {total_hits}")
-            
-            if len(hits) > max_hits:
-                max_hits = len(hits)
-                best_result = response
-            
-            if attempt > 0 and len(hits) == max_hits and total_hits > 0:
-                logger.info(f"Consistent result achieved at attempt {attempt + 1}")
-                break
-                
+            return client.search(**search_params)
         except Exception as e:
-            logger.warning(f"Search attempt {attempt + 1} failed: {str(e)}")
+            logger.warning(f"Search attempt {attempt + 1}/{max_retries} failed: {str(e)}")
             if attempt == max_retries - 1:
-                if best_result:
-                    return best_result
                 raise
-        
-        if attempt < max_retries - 1:
-            wait_time = (2 ** attempt) * 0.1
-            time.sleep(wait_time)
-    
-    return best_result or response 
\ No newline at end of file
+            time.sleep((2 ** attempt) * 0.1)
\ No newline at end of file
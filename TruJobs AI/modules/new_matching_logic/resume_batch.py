@@ -0,0 +1,268 @@
+import threading
+import time
+
+import numpy as np
+
+from config import EMBEDDING_DIMENSION, RESUME_INDEX, RESUME_VECTOR_FIELDS, logger
+from resume_service import (
+    RESUME_INFO_FIELDS, metadata_filter_mask, build_resume_pool_query, read_resume_hits,
+    lookup_resume_doc_ids, forget_resume_doc_ids
+)
+from similarity_calculator import VECTOR_FIELDS, VECTOR_NAMES, VECTOR_VALID, VECTOR_MISMATCH
+from sliced_retrieval import hit_sort_key
+from vector_codec import select_rows
+
+
+class ResumeBatch:
+    """Columnar candidate pool: packed section vectors plus one light record per row
+
+    vectors is a raw (N, 4, D) float32 matrix or an encoded block from vector_codec, status the
+    (N, 4) int8 mask of similarity_calculator, and resumes[i] the ids, name and metadata of row i
+    (the dicts apply_metadata_filters, rank_packed_resumes and hydrate_resumes read). columns caches the
+    metadata columns filters are evaluated over (see filter_column); a selection starts a fresh cache.
+    """
+
+    __slots__ = ('vectors', 'status', 'resumes', 'dimension', 'columns')
+
+    def __init__(self, vectors, status, resumes, dimension, columns=None):
+        self.vectors = vectors
+        self.status = status
+        self.resumes = resumes
+        self.dimension = dimension
+        self.columns = {} if columns is None else columns
+
+    def __len__(self):
+        return len(self.resumes)
+
+    @property
+    def resume_ids(self):
+        return [resume['resume_id'] for resume in self.resumes]
+
+    def select(self, rows):
+        """Return a batch holding only the given rows, in that order"""
+        if isinstance(self.vectors, dict):
+            vectors = select_rows(self.vectors, rows)
+        else:
+            vectors = self.vectors[rows]
+        return ResumeBatch(vectors, self.status[rows], [self.resumes[row] for row in rows], self.dimension)
+
+
+def filter_resume_batch(batch, metadata_filters):
+    """Apply metadata filters to a batch, keeping the vector rows of the resumes that pass"""
+    if not metadata_filters:
+        return batch
+    mask = metadata_filter_mask(batch.resumes, metadata_filters, batch.columns)
+    if mask.all():
+        return batch
+    return batch.select(np.flatnonzero(mask))
+
+
+def _resume_record(hit, keep_doc_id):
+    """Light record of a hit: everything build_resume_data keeps except the section vectors"""
+    source = hit['_source']
+    return {
+        'resume_id': source.get('resume_id'),
+        'doc_id': hit.get('_id') if keep_doc_id else None,
+        'candidate_name': source.get('candidate_name'),
+        'job_description_id': source.get('job_description_id'),
+        'nano_Id': source.get('nano_Id'),
+        'upload_date': source.get('upload_date'),
+        'metadata': source.get('metadata', {})
+    }
+
+
+class RetrievalCancelled(Exception):
+    """Raised between pages once the request that started a read no longer needs it"""
+
+
+def raise_if_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise RetrievalCancelled('Resume retrieval cancelled')
+
+
+class _PageDecoder:
+    """Decodes pages of hits into preallocated float32 rows as they arrive
+
+    Pages may come from several slice threads at once, so rows are written under a lock. Each page's
+    vectors are converted section by section with one array construction, and the page can be
+    released as soon as add_page returns. Once cancel_event is set, add_page raises RetrievalCancelled,
+    which ends every slice stream at its next page.
+    """
+
+    def __init__(self, dimension, keep_doc_id, cancel_event=None):
+        self.dimension = dimension
+        self.keep_doc_id = keep_doc_id
+        self.cancel_event = cancel_event
+        self.vectors = np.zeros((0, len(VECTOR_FIELDS), dimension), dtype=np.float32)
+        self.status = np.zeros((0, len(VECTOR_FIELDS)), dtype=np.int8)
+        self.resumes = []
+        self.sort_keys = []
+        self.lock = threading.Lock()
+
+    def _ensure_capacity(self, needed, expected):
+        capacity = self.status.shape[0]
+        if needed <= capacity:
+            return
+        # The pool size from track_total_hits is allocated up front; geometric growth covers a pool
+        # that grew while it was being read
+        new_capacity = max(needed, expected, capacity * 2)
+        vectors = np.zeros((new_capacity, len(VECTOR_FIELDS), self.dimension), dtype=np.float32)
+        status = np.zeros((new_capacity, len(VECTOR_FIELDS)), dtype=np.int8)
+        size = len(self.resumes)
+        vectors[:size] = self.vectors[:size]
+        status[:size] = self.status[:size]
+        self.vectors, self.status = vectors, status
+
+    def add_page(self, hits, total_hits=0):
+        raise_if_cancelled(self.cancel_event)
+        with self.lock:
+            start = len(self.resumes)
+            self._ensure_capacity(start + len(hits), total_hits)
+            for hit in hits:
+                self.resumes.append(_resume_record(hit, self.keep_doc_id))
+                self.sort_keys.append(hit_sort_key(hit))
+            for j, field in enumerate(VECTOR_FIELDS):
+                rows = []
+                values = []
+                for offset, hit in enumerate(hits):
+                    vector = hit['_source'].get(field)
+                    if not vector:
+                        continue
+                    if len(vector) != self.dimension:
+                        logger.warning(f"Dimension mismatch for {VECTOR_NAMES[j]} vector: {len(vector)} vs {self.dimension}")
+                        self.status[start + offset, j] = VECTOR_MISMATCH
+                        continue
+                    rows.append(start + offset)
+                    values.append(vector)
+                if rows:
+                    self._write_section(j, rows, values)
+
+    def _write_section(self, j, rows, values):
+        try:
+            self.vectors[rows, j] = np.array(values, dtype=np.float32)
+            self.status[rows, j] = VECTOR_VALID
+        except (TypeError, ValueError):
+            # One malformed vector: fall back to row by row so only that row stays unscored
+            for row, vector in zip(rows, values):
+                try:
+                    self.vectors[row, j] = vector
+                    self.status[row, j] = VECTOR_VALID
+                except (TypeError, ValueError) as e:
+                    self.vectors[row, j] = 0.0
+                    logger.error(f"Error packing {VECTOR_NAMES[j]} vector for resume "
+                                 f"{self.resumes[row]['resume_id']}: {str(e)}")
+
+    def finish(self):
+        """Order rows like the merged sliced read and keep the first row per resume_id
+
+        The vector rows are permuted in place, so peak memory stays at one (N, 4, D) matrix.
+        """
+        size = len(self.resumes)
+        order = sorted(range(size), key=self.sort_keys.__getitem__)
+        seen_resume_ids = set()
+        rows = []
+        dropped = []
+        for row in order:
+            resume_id = self.resumes[row]['resume_id']
+            if resume_id in seen_resume_ids:
+                dropped.append(row)
+                continue
+            seen_resume_ids.add(resume_id)
+            rows.append(row)
+
+        if rows == list(range(size)):
+            return ResumeBatch(self.vectors[:size], self.status[:size], self.resumes, self.dimension)
+        # Kept rows first in sort order, duplicates after them; the batch is a view of the kept prefix
+        permutation = rows + dropped
+        _permute_rows_in_place(self.vectors[:size], permutation)
+        status = self.status[:size][permutation[:len(rows)]]
+        return ResumeBatch(self.vectors[:len(rows)], status, [self.resumes[row] for row in rows], self.dimension)
+
+
+def _permute_rows_in_place(matrix, permutation):
+    """Set matrix[i] = matrix[permutation[i]] for every i, following cycles through a one-row buffer"""
+    buffer = np.empty(matrix.shape[1:], dtype=matrix.dtype)
+    placed = np.zeros(len(permutation), dtype=bool)
+    for start in range(len(permutation)):
+        if placed[start] or permutation[start] == start:
+            continue
+        buffer[...] = matrix[start]
+        row = start
+        while True:
+            placed[row] = True
+            source = permutation[row]
+            if source == start:
+                matrix[row] = buffer
+                break
+            matrix[row] = matrix[source]
+            row = source
+
+
+def get_resume_batch(client, dimension=EMBEDDING_DIMENSION, job_description_id=None, metadata_filters=None,
+                     uploaded_after=None, job_description_ids=None, source_fields=None, consistency=None,
+                     cancel_event=None):
+    """Read a candidate pool straight into a ResumeBatch
+
+    Takes the pool arguments of get_resume_embeddings, but hits are decoded page by page into float32
+    rows instead of per-resume float lists, so at most one page per stream is ever held as Python
+    objects. With a source_fields list records carry their doc_id for hydrate_resumes.
+    Vectors whose length is not dimension are marked VECTOR_MISMATCH. Setting cancel_event stops the
+    read at the next page with RetrievalCancelled.
+    """
+    start_time = time.time()
+    try:
+        query, residual_filters = build_resume_pool_query(
+            job_description_id, None, metadata_filters, uploaded_after, job_description_ids, source_fields
+        )
+        decoder = _PageDecoder(dimension, source_fields is not None, cancel_event)
+        read_resume_hits(client, query, consistency, on_page=decoder.add_page)
+        batch = filter_resume_batch(decoder.finish(), residual_filters)
+
+        logger.info(f"get_resume_batch decoded {len(batch)} resumes ({batch.vectors.nbytes / 1e6:.1f} MB of vectors), "
+                    f"time taken: {time.time() - start_time:.4f} seconds")
+        return batch
+
+    except RetrievalCancelled:
+        logger.info(f"get_resume_batch cancelled after {time.time() - start_time:.4f} seconds")
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving resume batch: {str(e)}")
+        raise
+
+
+def _mget_resumes(client, doc_ids):
+    response = client.mget(index=RESUME_INDEX, body={"docs": [
+        {"_id": doc_id, "_source": RESUME_VECTOR_FIELDS + RESUME_INFO_FIELDS} for doc_id in doc_ids.values()
+    ]})
+    found = {doc['_id']: doc for doc in response.get('docs', []) if doc.get('found')}
+    return {resume_id: found[doc_id] for resume_id, doc_id in doc_ids.items() if doc_id in found}
+
+
+def get_resume_batch_by_ids(client, resume_ids, dimension=EMBEDDING_DIMENSION, cancel_event=None):
+    """Fetch an explicit list of resumes with one mget; returns (ResumeBatch in request order, missing ids)
+
+    resume_id -> _id comes from lookup_resume_doc_ids, so a repeated shortlist is a single round trip.
+    Records carry full metadata, so the matches need no hydration. A cached _id whose document is gone
+    is forgotten and looked up once more. Setting cancel_event skips the mget with RetrievalCancelled.
+    """
+    start_time = time.time()
+    resume_ids = list(dict.fromkeys(resume_ids))
+    doc_ids = lookup_resume_doc_ids(client, resume_ids)
+    raise_if_cancelled(cancel_event)
+    docs = _mget_resumes(client, doc_ids) if doc_ids else {}
+
+    stale = [resume_id for resume_id in doc_ids if resume_id not in docs]
+    if stale:
+        forget_resume_doc_ids(stale)
+        retry_ids = lookup_resume_doc_ids(client, stale)
+        if retry_ids:
+            docs.update(_mget_resumes(client, retry_ids))
+
+    decoder = _PageDecoder(dimension, keep_doc_id=False)
+    decoder.add_page([docs[resume_id] for resume_id in resume_ids if resume_id in docs], len(docs))
+    batch = decoder.finish()
+    missing = [resume_id for resume_id in resume_ids if resume_id not in docs]
+
+    logger.info(f"get_resume_batch_by_ids fetched {len(batch)} of {len(resume_ids)} resumes, "
+                f"time taken: {time.time() - start_time:.4f} seconds")
+    return batch, missing
@@ -0,0 +1,259 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from config import (
+    EMBEDDING_DIMENSION, RESUME_CACHE_ENABLED, RESUME_CACHE_MAX_BYTES,
+    RESUME_CACHE_FULL_SYNC_SECONDS, RESUME_CACHE_DELTA_MARGIN_SECONDS, VECTOR_CODEC, logger
+)
+from filter_compiler import FILTER_SOURCE_FIELDS, filter_source_fields
+from resume_batch import ResumeBatch, get_resume_batch, raise_if_cancelled
+from skill_overlap import SKILL_SOURCE_FIELDS
+from similarity_calculator import VECTOR_FIELDS
+from vector_codec import (
+    empty_encoded_vectors, encode_vectors, encoded_nbytes, resolve_codec, select_rows, write_encoded_rows
+)
+
+# Module-level state survives between invocations of a warm Lambda container.
+# job_description_id -> cache entry, least recently used first.
+_resume_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+# Rough per-row overhead for the light resume record and the row index
+ROW_OVERHEAD_BYTES = 512
+
+# Entries keep only the metadata the built-in filters and skill coverage read; matches are hydrated
+# with hydrate_resumes
+CACHED_METADATA_FIELDS = list(dict.fromkeys(filter_source_fields(FILTER_SOURCE_FIELDS) + SKILL_SOURCE_FIELDS))
+
+
+def _max_upload_date(resumes, current=None):
+    """Return the newest upload_date seen so far (ISO strings compare chronologically)"""
+    dates = [r.get('upload_date') for r in resumes if r.get('upload_date')]
+    if current:
+        dates.append(current)
+    return max(dates) if dates else None
+
+
+def _delta_start(watermark):
+    """upload_date a delta read starts from: RESUME_CACHE_DELTA_MARGIN_SECONDS before the watermark
+
+    Uploads stamped before the watermark but searchable only after it was taken fall in the margin.
+    A watermark that is not an ISO date is used as is.
+    """
+    try:
+        start = datetime.fromisoformat(watermark.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return watermark
+    return (start - timedelta(seconds=RESUME_CACHE_DELTA_MARGIN_SECONDS)).isoformat()
+
+
+def _new_entry(dimension, codec):
+    return {
+        'dimension': dimension,
+        'codec': codec,
+        'vectors': empty_encoded_vectors(0, len(VECTOR_FIELDS), dimension, codec),
+        'status': np.zeros((0, 4), dtype=np.int8),
+        'size': 0,
+        'resumes': [],
+        'row_index': {},
+        'columns': {},
+        'watermark': None,
+        'metadata_bytes': 0,
+        'nbytes': 0,
+        'full_sync_at': time.time()
+    }
+
+
+def _ensure_capacity(entry, needed):
+    """Grow the packed arrays geometrically so appends stay amortized O(1)"""
+    capacity = entry['status'].shape[0]
+    if needed <= capacity:
+        return
+    new_capacity = max(needed, capacity * 2, 64)
+    vectors = empty_encoded_vectors(new_capacity, len(VECTOR_FIELDS), entry['dimension'], entry['codec'])
+    status = np.zeros((new_capacity, len(VECTOR_FIELDS)), dtype=np.int8)
+    size = entry['size']
+    for key in ('data', 'scales', 'norms'):
+        if vectors[key] is not None:
+            vectors[key][:size] = entry['vectors'][key][:size]
+    status[:size] = entry['status'][:size]
+    entry['vectors'] = vectors
+    entry['status'] = status
+
+
+def _record_bytes(resume):
+    return len(json.dumps(resume['metadata'], default=str)) + ROW_OVERHEAD_BYTES
+
+
+def _merge_batch(entry, batch):
+    """Encode the rows of a ResumeBatch into the entry, replacing rows that share a resume_id"""
+    if not len(batch):
+        return 0
+
+    appended = [resume for resume in batch.resumes if resume['resume_id'] not in entry['row_index']]
+    _ensure_capacity(entry, entry['size'] + len(appended))
+
+    rows = []
+    for resume in batch.resumes:
+        row = entry['row_index'].get(resume['resume_id'])
+        if row is None:
+            row = entry['size']
+            entry['size'] += 1
+            entry['row_index'][resume['resume_id']] = row
+            entry['resumes'].append(resume)
+        else:
+            entry['metadata_bytes'] -= _record_bytes(entry['resumes'][row])
+            entry['resumes'][row] = resume
+        rows.append(row)
+        entry['metadata_bytes'] += _record_bytes(resume)
+
+    write_encoded_rows(entry['vectors'], rows, batch.vectors)
+    entry['status'][rows] = batch.status
+
+    # Filter columns describe the old rows; batches already handed out keep their own copy
+    entry['columns'] = {}
+    entry['watermark'] = _max_upload_date(batch.resumes, entry['watermark'])
+    entry['nbytes'] = encoded_nbytes(entry['vectors']) + entry['status'].nbytes + entry['metadata_bytes']
+    return len(batch)
+
+
+def _newer_rows(entry, batch):
+    """Rows of a fetched batch the entry does not hold yet, or holds from an older upload
+
+    Drops the rows a delta read re-reads from its margin before the watermark.
+    """
+    rows = []
+    for row, resume in enumerate(batch.resumes):
+        cached_row = entry['row_index'].get(resume['resume_id'])
+        if cached_row is None:
+            rows.append(row)
+            continue
+        cached_date = entry['resumes'][cached_row].get('upload_date')
+        if resume.get('upload_date') and (not cached_date or resume['upload_date'] > cached_date):
+            rows.append(row)
+    return rows
+
+
+def _valid_entry(job_description_id, dimension, codec):
+    """The cache entry of a job description, dropping it first when it is stale; call under _cache_lock"""
+    entry = _resume_cache.get(job_description_id)
+    if entry is not None and (entry['dimension'] != dimension or entry['codec'] != codec or not entry['watermark'] or
+                              time.time() - entry['full_sync_at'] > RESUME_CACHE_FULL_SYNC_SECONDS):
+        del _resume_cache[job_description_id]
+        entry = None
+    return entry
+
+
+def _evict_over_budget():
+    """Drop least recently used entries until the cache fits its memory budget"""
+    global _cache_bytes
+    _cache_bytes = sum(entry['nbytes'] for entry in _resume_cache.values())
+    while _resume_cache and _cache_bytes > RESUME_CACHE_MAX_BYTES:
+        job_description_id, entry = _resume_cache.popitem(last=False)
+        _cache_bytes -= entry['nbytes']
+        logger.info(f"Evicted resume cache entry {job_description_id} ({entry['nbytes'] / 1e6:.1f} MB)")
+
+
+def get_cached_resume_batch(client, job_description_id, dimension=EMBEDDING_DIMENSION, consistency=None,
+                            cancel_event=None):
+    """Return (batch, cache_info) with a ResumeBatch of every resume uploaded for a job description
+
+    batch.vectors is an encoded block (see vector_codec) in the VECTOR_CODEC encoding. batch.resumes are
+    phase-one records (ids, doc_id and CACHED_METADATA_FIELDS); hydrate the final matches with hydrate_resumes.
+
+    The first call for a JD packs the full candidate pool; later calls in the same warm container
+    only fetch resumes uploaded at or after the cached upload_date watermark, less
+    RESUME_CACHE_DELTA_MARGIN_SECONDS for uploads that became searchable late. Entries are fully
+    re-synced every RESUME_CACHE_FULL_SYNC_SECONDS so deleted resumes eventually drop out.
+    OpenSearch is read outside _cache_lock, so pools of different JDs load concurrently; the lock
+    only guards looking up the entry and merging what was fetched. A read whose cancel_event is set
+    raises RetrievalCancelled and is never merged.
+    """
+    start_time = time.time()
+    codec = resolve_codec(VECTOR_CODEC)
+
+    if not RESUME_CACHE_ENABLED:
+        batch = get_resume_batch(client, dimension, job_description_id,
+                                 source_fields=CACHED_METADATA_FIELDS, consistency=consistency,
+                                 cancel_event=cancel_event)
+        return (ResumeBatch(encode_vectors(batch.vectors, codec), batch.status, batch.resumes, dimension),
+                {'cache': 'disabled', 'resumes_fetched': len(batch), 'vector_codec': codec})
+
+    while True:
+        with _cache_lock:
+            entry = _valid_entry(job_description_id, dimension, codec)
+            watermark = entry['watermark'] if entry is not None else None
+
+        # A miss reads the full pool, a hit only what was uploaded since the watermark (less the margin)
+        fetched_batch = get_resume_batch(client, dimension, job_description_id,
+                                         uploaded_after=_delta_start(watermark) if watermark else None,
+                                         source_fields=CACHED_METADATA_FIELDS, consistency=consistency,
+                                         cancel_event=cancel_event)
+
+        with _cache_lock:
+            raise_if_cancelled(cancel_event)
+            entry = _valid_entry(job_description_id, dimension, codec)
+            if entry is None:
+                if watermark is not None:
+                    # The entry was evicted or expired while the delta was read: read the full pool
+                    continue
+                entry = _new_entry(dimension, codec)
+            # Another request may have merged the same or newer uploads meanwhile
+            fresh = _newer_rows(entry, fetched_batch)
+            fetched = _merge_batch(entry, fetched_batch if len(fresh) == len(fetched_batch)
+                                   else fetched_batch.select(fresh))
+            cache_status = 'miss' if watermark is None else 'hit'
+
+            _resume_cache[job_description_id] = entry
+            _resume_cache.move_to_end(job_description_id)
+            _evict_over_budget()
+
+            size = entry['size']
+            batch = ResumeBatch(select_rows(entry['vectors'], slice(0, size)), entry['status'][:size],
+                                list(entry['resumes']), dimension, entry['columns'])
+            break
+
+    cache_info = {
+        'cache': cache_status,
+        'resumes_fetched': fetched,
+        'cached_resumes': size,
+        'cache_watermark': entry['watermark'],
+        'vector_codec': codec,
+        'cache_bytes': _cache_bytes
+    }
+    logger.info(f"get_cached_resume_batch ({cache_status}) for {job_description_id}: {fetched} fetched, "
+                f"{size} cached, time taken: {time.time() - start_time:.4f} seconds")
+    return batch, cache_info
+
+
+def can_filter_cached(metadata_filters):
+    """True when every filter reads only metadata that cache entries keep"""
+    return all(field in FILTER_SOURCE_FIELDS for field in (metadata_filters or {}))
+
+
+def is_resume_batch_cached(job_description_id):
+    """True when this container already holds the candidate pool of a job description"""
+    with _cache_lock:
+        return RESUME_CACHE_ENABLED and job_description_id in _resume_cache
+
+
+def get_cached_upload_date(job_description_id, resume_id):
+    """upload_date of a resume in a cached candidate pool, or None when the pool or the resume is not cached"""
+    with _cache_lock:
+        entry = _resume_cache.get(job_description_id)
+        row = entry['row_index'].get(resume_id) if entry is not None else None
+        return entry['resumes'][row].get('upload_date') if row is not None else None
+
+
+def clear_resume_cache():
+    """Drop every cached candidate pool"""
+    global _cache_bytes
+    with _cache_lock:
+        _resume_cache.clear()
+        _cache_bytes = 0
@@ -1,9 +1,23 @@
 import json
+import logging
 import time
 import re
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
 import boto3
-from config import JOB_DESCRIPTION_INDEX, RESUME_INDEX, DEFAULT_TOP_K, logger
-from opensearch_client import verify_index_and_mapping, execute_search_with_retry
+import numpy as np
+from config import (
+    JOB_DESCRIPTION_INDEX, RESUME_INDEX, DEFAULT_TOP_K, RESUME_VECTOR_FIELDS, SCORING_STRATEGY,
+    EXACT_SCORING_MAX_POOL, KNN_CANDIDATE_MULTIPLIER, KNN_MIN_CANDIDATES, RETRIEVAL_PAGE_SIZE,
+    SUMMARY_FACET_SIZE, JD_CACHE_MAX_ENTRIES, JD_CACHE_TTL_SECONDS, RESUME_DOC_ID_CACHE_MAX_ENTRIES, logger
+)
+from opensearch_client import verify_index_and_mapping, execute_search_with_retry, refresh_index
+from filter_compiler import (
+    compile_metadata_filters, is_range_filter, filter_source_fields, experience_level_intervals, LOCATION_FIELDS
+)
+from sliced_retrieval import fetch_all_hits, for_each_page, RETRIEVAL_SORT
+from skill_taxonomy import canonical_skill_ids
 
 
 def verify_job_description_text(job_description_text):
@@ -107,156 +121,151 @@ def get_job_description_text_embedding(job_description_text):
         return None
 
 
+def resolve_job_description(client, job_id):
+    """Return the job data (embedding, metadata, job_title, text) of one job description, or None
+
+    One search, shared by existence checks and embedding lookups and cached in the warm container;
+    see get_job_description_embeddings.
+    """
+    return get_job_description_embeddings(client, [job_id]).get(job_id)
+
+
 def verify_job_description(client, job_id):
-    """Verify if job description exists"""
-    start_time = time.time()
-    try:
-        queries = [
-            {"query": {"match": {"job_description_id": job_id}}},
-            {"query": {"term": {"job_description_id.keyword": job_id}}},
-            {"query": {"term": {"metadata.job_description_id.keyword": job_id}}}
-        ]
-        
-        for query in queries:
-            logger.info(f"Executing job description verification query: {json.dumps(query)}")
-            response = client.search(index=JOB_DESCRIPTION_INDEX, body=query)
-            
-            hits = response.get('hits', {}).get('hits', [])
-            total = response.get('hits', {}).get('total', {}).get('value', 0)
-            
-            if hits:
-                logger.info(f"Found {total} job descriptions")
-                logger.info(f"verify_job_description time taken: {time.time() - start_time:.4f} seconds")
-                return hits
-        
+    """Verify if job description exists; returns [{'_source': job data}] or []"""
+    job_data = resolve_job_description(client, job_id)
+    if not job_data:
         logger.warning(f"No job description found with ID: {job_id}")
         return []
-        
-    except Exception as e:
-        logger.error(f"Error verifying job description: {str(e)}")
-        raise
+    return [{'_source': job_data}]
 
 
 def get_job_description_embedding(client, job_id):
     """Retrieve job description embedding with flexible field mapping"""
+    job_data = resolve_job_description(client, job_id)
+    if not job_data:
+        raise ValueError(f"Job description not found: {job_id}")
+    return job_data
+
+
+def build_job_description_data(source):
+    """Map a job description document to the embedding/metadata/title/text dict the matcher uses"""
+    metadata = source.get('metadata', {})
+    return {
+        'embedding': source.get('embedding') or metadata.get('embedding'),
+        'metadata': metadata,
+        'job_title': source.get('job_title') or metadata.get('job_title') or metadata.get('title'),
+        'text': source.get('text') or metadata.get('text')
+    }
+
+
+# Warm-container cache of resolved job descriptions: job_description_id -> (loaded_at, job data),
+# least recently used first
+_job_description_cache = OrderedDict()
+_job_description_cache_lock = threading.Lock()
+
+
+def _get_cached_job_descriptions(job_ids):
+    """Cached job data for the given IDs that is younger than JD_CACHE_TTL_SECONDS"""
+    now = time.time()
+    cached = {}
+    with _job_description_cache_lock:
+        for job_id in job_ids:
+            entry = _job_description_cache.get(job_id)
+            if entry is None:
+                continue
+            if now - entry[0] > JD_CACHE_TTL_SECONDS:
+                del _job_description_cache[job_id]
+                continue
+            _job_description_cache.move_to_end(job_id)
+            cached[job_id] = entry[1]
+    return cached
+
+
+def _cache_job_descriptions(job_descriptions):
+    now = time.time()
+    with _job_description_cache_lock:
+        for job_id, job_data in job_descriptions.items():
+            _job_description_cache[job_id] = (now, job_data)
+            _job_description_cache.move_to_end(job_id)
+        while len(_job_description_cache) > JD_CACHE_MAX_ENTRIES:
+            _job_description_cache.popitem(last=False)
+
+
+def clear_job_description_cache():
+    """Drop every cached job description"""
+    with _job_description_cache_lock:
+        _job_description_cache.clear()
+
+
+def get_job_description_embeddings(client, job_ids):
+    """Retrieve several job descriptions with one terms query
+
+    Returns {job_description_id: job data}; ids without a matching document are left out.
+    Job description documents are indexed under generated _ids, so mget cannot address them.
+    Found job descriptions are cached for JD_CACHE_TTL_SECONDS (LRU, JD_CACHE_MAX_ENTRIES); only
+    IDs missing from the cache are queried, and IDs that are not found are never cached.
+    """
     start_time = time.time()
     try:
-        queries = [
-            {
-                "query": {"match": {"job_description_id": job_id}},
-                "_source": ["embedding", "metadata", "job_title", "text"]
-            },
-            {
-                "query": {"term": {"job_description_id.keyword": job_id}},
-                "_source": ["embedding", "metadata", "job_title", "text"]
-            },
-            {
-                "query": {"term": {"metadata.job_description_id.keyword": job_id}},
-                "_source": ["embedding", "metadata", "job_title", "text"]
-            }
-        ]
-        
-        for query in queries:
-            response = client.search(index=JOB_DESCRIPTION_INDEX, body=query)
-            
-            hits = response.get('hits', {}).get('hits', [])
-            if hits:
-                source = hits[0]['_source']
-                metadata = source.get('metadata', {})
-                
-                result = {
-                    'embedding': source.get('embedding') or metadata.get('embedding'),
-                    'metadata': metadata,
-                    'job_title': source.get('job_title') or metadata.get('job_title') or metadata.get('title'),
-                    'text': source.get('text') or metadata.get('text')
+        job_descriptions = _get_cached_job_descriptions(job_ids)
+        uncached_ids = [job_id for job_id in job_ids if job_id not in job_descriptions]
+        if not uncached_ids:
+            logger.info(f"get_job_description_embeddings served {len(job_ids)} from cache")
+            return job_descriptions
+
+        query = {
+            "size": len(uncached_ids) * 2,
+            "query": {
+                "bool": {
+                    "should": [
+                        {"terms": {"job_description_id.keyword": uncached_ids}},
+                        {"terms": {"job_description_id": uncached_ids}},
+                        {"terms": {"metadata.job_description_id.keyword": uncached_ids}}
+                    ],
+                    "minimum_should_match": 1
                 }
-                
-                logger.info(f"Found job description: {result.get('job_title')}")
-                logger.info(f"get_job_description_embedding time taken: {time.time() - start_time:.4f} seconds")
-                return result
-        
-        raise ValueError(f"Job description not found: {job_id}")
-        
+            },
+            "_source": ["job_description_id", "embedding", "metadata", "job_title", "text"]
+        }
+        response = client.search(index=JOB_DESCRIPTION_INDEX, body=query)
+
+        fetched = {}
+        for hit in response.get('hits', {}).get('hits', []):
+            source = hit['_source']
+            job_id = source.get('job_description_id') or source.get('metadata', {}).get('job_description_id')
+            if job_id in uncached_ids and job_id not in fetched:
+                fetched[job_id] = build_job_description_data(source)
+        _cache_job_descriptions(fetched)
+        job_descriptions.update(fetched)
+
+        missing = [job_id for job_id in job_ids if job_id not in job_descriptions]
+        if missing:
+            logger.warning(f"No job description found for IDs: {missing}")
+        logger.info(f"get_job_description_embeddings found {len(job_descriptions)} of {len(job_ids)} "
+                    f"({len(job_ids) - len(uncached_ids)} cached), time taken: {time.time() - start_time:.4f} seconds")
+        return job_descriptions
+
     except Exception as e:
-        logger.error(f"Error retrieving job description: {str(e)}")
+        logger.error(f"Error retrieving job descriptions: {str(e)}")
         raise
 
 
-def normalize_skill(skill):
-    """Normalize skill names for flexible matching"""
-    if not skill:
-        return ""
-    
-    # Convert to string and normalize
-    skill_str = str(skill).lower().strip()
-    
-    # Handle common variations
-    skill_variations = {
-        'react': ['react', 'reactjs', 'react.js', 'react js'],
-        'javascript': ['javascript', 'js', 'ecmascript'],
-        'typescript': ['typescript', 'ts'],
-        'python': ['python', 'py'],
-        'node': ['node', 'nodejs', 'node.js'],
-        'angular': ['angular', 'angularjs'],
-        'vue': ['vue', 'vuejs', 'vue.js'],
-        'express': ['express', 'expressjs'],
-        'mongodb': ['mongodb', 'mongo'],
-        'postgresql': ['postgresql', 'postgres', 'pg'],
-        'mysql': ['mysql', 'my-sql'],
-        'aws': ['aws', 'amazon web services'],
-        'docker': ['docker', 'containerization'],
-        'kubernetes': ['kubernetes', 'k8s'],
-        'css': ['css', 'css3', 'cascading style sheets'],
-        'html': ['html', 'html5', 'hypertext markup language'],
-        'sql': ['sql', 'structured query language']
-    }
-    
-    # Check for exact matches in variations
-    for normalized_name, variations in skill_variations.items():
-        if skill_str in variations:
-            return normalized_name
-    
-    # Remove special characters and spaces for fuzzy matching
-    normalized = re.sub(r'[.\s\-_]+', '', skill_str)
-    return normalized
+def resume_skill_ids(metadata):
+    """Canonical skill ids of a resume: metadata.skill_ids written at ingest, else derived from its skills"""
+    if metadata.get('skill_ids') is not None:
+        return metadata['skill_ids']
+    return canonical_skill_ids(metadata.get('skills_list') or metadata.get('skills'))
 
 
 def skills_match(resume_skills, filter_skills):
-    """Check if resume skills match any of the filter skills with improved logic"""
+    """Check if the resume has any of the filter skills, comparing canonical skill ids"""
     if not resume_skills or not filter_skills:
         logger.debug("Empty resume skills or filter skills")
         return False
     
-    # Ensure both are lists
-    if isinstance(resume_skills, str):
-        resume_skills = [resume_skills]
-    if isinstance(filter_skills, str):
-        filter_skills = [filter_skills]
-    
-    logger.debug(f"Checking skills match: resume_skills={resume_skills}, filter_skills={filter_skills}")
-    
-    normalized_resume_skills = [normalize_skill(skill) for skill in resume_skills if skill]
-    normalized_filter_skills = [normalize_skill(skill) for skill in filter_skills if skill]
-    
-    logger.debug(f"Normalized skills: resume={normalized_resume_skills}, filter={normalized_filter_skills}")
-    
-    for filter_skill in normalized_filter_skills:
-        if not filter_skill:
-            continue
-            
-        for resume_skill in normalized_resume_skills:
-            if not resume_skill:
-                continue
-                
-            # Check for exact match, substring match, or partial match
-            if (filter_skill == resume_skill or 
-                filter_skill in resume_skill or 
-                resume_skill in filter_skill):
-                logger.debug(f"Skills match found: {filter_skill} matches {resume_skill}")
-                return True
-    
-    logger.debug("No skills match found")
-    return False
+    matched = set(canonical_skill_ids(resume_skills)) & set(canonical_skill_ids(filter_skills))
+    logger.debug(f"Skills match: {sorted(matched)}")
+    return bool(matched)
 
 
 def location_match(resume_location, filter_locations):
@@ -317,7 +326,7 @@ def extract_years_of_experience(experience_data):
         return 0
     
     total_years = 0.0
-    current_year = 2025  # Update this as needed
+    current_year = datetime.utcnow().year
     
     logger.debug(f"Processing {len(experience_data)} experience entries")
     
@@ -357,6 +366,21 @@ def extract_years_of_experience(experience_data):
     return int(total_years)
 
 
+def resume_experience_years(metadata):
+    """Whole years of experience of a resume, or None when it has none to go by
+
+    Resumes indexed with total_experience_months (derived once at ingest) use it; older records
+    fall back to parsing their experience entries.
+    """
+    months = metadata.get('total_experience_months')
+    if months is not None:
+        return int(months) // 12
+    experience = metadata.get('work_experience', []) or metadata.get('experience', []) or metadata.get('professional_experience', [])
+    if experience:
+        return extract_years_of_experience(experience)
+    return None
+
+
 def experience_level_match(resume_experience, filter_experience_levels):
     """Check if resume experience level matches filter with improved logic"""
     if not resume_experience or not filter_experience_levels:
@@ -406,277 +430,379 @@ def experience_level_match(resume_experience, filter_experience_levels):
     return False
 
 
-def apply_metadata_filters(resume_embeddings, metadata_filters):
-    """Apply metadata filters to resume embeddings with enhanced debugging"""
-    if not metadata_filters:
-        logger.info("No metadata filters provided, returning all resumes")
-        return resume_embeddings
-    
-    filtered_resumes = []
-    filter_stats = {}
-    
+# Comparisons of range filter keys; they work on scalars and on float columns alike
+RANGE_COMPARISONS = {
+    'min': np.greater_equal, 'gte': np.greater_equal, 'gt': np.greater,
+    'max': np.less_equal, 'lte': np.less_equal, 'lt': np.less
+}
+
+
+def range_match(resume_value, bounds):
+    """Check a numeric resume value against {"min", "max"} (or gte/gt/lte/lt) bounds"""
+    try:
+        value = float(resume_value)
+    except (TypeError, ValueError):
+        return False
+    return all(RANGE_COMPARISONS[key](value, float(bound)) for key, bound in bounds.items())
+
+
+def _as_list(values):
+    return values if isinstance(values, list) else [values]
+
+
+def _location_predicate(filter_locations):
+    """location_match with the filters lowercased once: exact for 1-2 characters, substring otherwise"""
+    filters = [str(value).lower().strip() for value in _as_list(filter_locations) if value]
+    exact = {value for value in filters if len(value) <= 2}
+    contained = [value for value in filters if len(value) > 2]
+
+    def predicate(resume_location):
+        if not resume_location:
+            return False
+        location = str(resume_location).lower().strip()
+        return location in exact or any(value in location for value in contained)
+    return predicate
+
+
+def _skills_predicate(filter_skills):
+    """skills_match with the filter skills canonicalized once; takes a resume's frozenset of skill ids"""
+    filter_ids = frozenset(canonical_skill_ids(filter_skills))
+
+    def predicate(resume_skill_ids):
+        return not filter_ids.isdisjoint(resume_skill_ids)
+    return predicate
+
+
+def _generic_predicate(filter_values):
+    filter_values = _as_list(filter_values)
+    lowered = [str(value).lower() for value in filter_values]
+
+    def predicate(resume_value):
+        if resume_value is None:
+            return False
+        return resume_value in filter_values or any(value in str(resume_value).lower() for value in lowered)
+    return predicate
+
+
+def compile_filter_plan(metadata_filters):
+    """Compile metadata_filters once into a plan of (field, column, kind, argument) steps
+
+    Steps read one column of the candidates (see filter_column): 'codes' steps evaluate a predicate once
+    per distinct value, 'years' and 'number' steps compare a float column against bounds.
+    """
+    plan = []
+    for field, filter_values in (metadata_filters or {}).items():
+        if field == 'skills':
+            plan.append((field, 'skills', 'codes', _skills_predicate(filter_values)))
+        elif field == 'location':
+            plan.append((field, 'location', 'codes', _location_predicate(filter_values)))
+        elif field == 'experience_level':
+            plan.append((field, 'experience_years', 'years', experience_level_intervals(filter_values)))
+        elif is_range_filter(filter_values):
+            plan.append((field, f'number:{field}', 'number', filter_values))
+        else:
+            plan.append((field, f'value:{field}', 'codes', _generic_predicate(filter_values)))
+    return plan
+
+
+def _factorize(values, key=None):
+    """(codes, uniques): codes[i] indexes the distinct value uniques[codes[i]]"""
+    index = {}
+    uniques = []
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        value_key = key(value) if key else value
+        code = index.get(value_key)
+        if code is None:
+            code = index[value_key] = len(uniques)
+            uniques.append(value)
+        codes[i] = code
+    return codes, uniques
+
+
+def _value_key(value):
+    # Typed so 1, 1.0 and True stay distinct values (they compare differently against string filters)
+    try:
+        hash(value)
+    except TypeError:
+        return type(value), repr(value)
+    return type(value), value
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def filter_column(resumes, name):
+    """Columnar view of one metadata property over the candidates, derived once per batch
+
+    'skills' is the factorized frozensets of canonical skill ids, 'location' the factorized raw locations,
+    'experience_years' a float array of resume_experience_years (NaN without experience), 'number:<field>'
+    a float array and 'value:<field>' the factorized raw values.
+    """
+    metadata = [resume.get('metadata') or {} for resume in resumes]
+    if name == 'skills':
+        return _factorize([frozenset(resume_skill_ids(m)) for m in metadata])
+    if name == 'location':
+        return _factorize([next((m.get(field) for field in LOCATION_FIELDS if m.get(field)), None) for m in metadata],
+                          _value_key)
+    if name == 'experience_years':
+        years = [resume_experience_years(m) for m in metadata]
+        return np.array([np.nan if value is None else value for value in years], dtype=np.float64)
+    kind, field = name.split(':', 1)
+    if kind == 'number':
+        return np.array([_number(m.get(field)) if m.get(field) is not None else np.nan for m in metadata], dtype=np.float64)
+    return _factorize([m.get(field) for m in metadata], _value_key)
+
+
+def evaluate_filter_plan(plan, resumes, columns=None):
+    """Evaluate a compiled plan as boolean masks; returns (mask, {field: field mask})
+
+    columns caches filter_column results (a ResumeBatch keeps one per batch) so a candidate pool is
+    turned into columns once, however many requests filter it.
+    """
+    columns = {} if columns is None else columns
+    mask = np.ones(len(resumes), dtype=bool)
+    field_masks = {}
+    for field, column_name, kind, argument in plan:
+        column = columns.get(column_name)
+        if column is None:
+            column = columns[column_name] = filter_column(resumes, column_name)
+        if kind == 'codes':
+            codes, uniques = column
+            field_mask = np.fromiter((argument(value) for value in uniques), dtype=bool, count=len(uniques))[codes]
+        elif kind == 'years':
+            field_mask = np.zeros(len(resumes), dtype=bool)
+            for low, high in argument:
+                field_mask |= (column >= low) & (column <= high)
+        else:
+            field_mask = np.ones(len(resumes), dtype=bool)
+            for key, bound in argument.items():
+                field_mask &= RANGE_COMPARISONS[key](column, float(bound))
+        field_masks[field] = field_mask
+        mask &= field_mask
+    return mask, field_masks
+
+
+def metadata_filter_mask(resumes, metadata_filters, columns=None):
+    """Boolean mask of the resume dicts that pass metadata_filters, logging per-field statistics
+
+    The filters are compiled once (compile_filter_plan) and evaluated as NumPy masks over columns of the
+    candidates, so the only per-resume work is building the columns.
+    """
     logger.info(f"Applying metadata filters: {metadata_filters}")
-    logger.info(f"Total resumes before filtering: {len(resume_embeddings)}")
+    logger.info(f"Total resumes before filtering: {len(resumes)}")
     
-    for resume_idx, resume in enumerate(resume_embeddings):
-        metadata = resume.get('metadata', {})
-        include_resume = True
-        filter_reasons = []
-        
-        logger.debug(f"Processing resume {resume_idx + 1}: {resume.get('candidate_name', 'Unknown')} - {resume.get('resume_id', 'Unknown')}")
-        logger.debug(f"Resume metadata keys: {list(metadata.keys())}")
-        
-        for field, filter_values in metadata_filters.items():
-            field_matched = False
-            
-            if field == "skills":
-                resume_skills = metadata.get('skills', [])
-                logger.debug(f"Resume skills: {resume_skills}")
-                
-                if isinstance(filter_values, str):
-                    filter_values = [filter_values]
-                
-                field_matched = skills_match(resume_skills, filter_values)
-                if not field_matched:
-                    filter_reasons.append(f"skills mismatch: resume has {resume_skills}, filter needs {filter_values}")
-            
-            elif field == "location":
-                # Try multiple possible location fields
-                resume_location = (metadata.get('location') or 
-                                 metadata.get('address') or 
-                                 metadata.get('city') or 
-                                 metadata.get('current_location') or 
-                                 metadata.get('preferred_location'))
-                logger.debug(f"Resume location: {resume_location}")
-                
-                field_matched = location_match(resume_location, filter_values)
-                if not field_matched:
-                    filter_reasons.append(f"location mismatch: resume has '{resume_location}', filter needs {filter_values}")
-            
-            elif field == "experience_level":
-                # Try multiple possible experience fields
-                resume_experience = (metadata.get('work_experience', []) or 
-                                   metadata.get('experience', []) or 
-                                   metadata.get('professional_experience', []))
-                logger.debug(f"Resume experience entries: {len(resume_experience) if isinstance(resume_experience, list) else 'not a list'}")
-                
-                field_matched = experience_level_match(resume_experience, filter_values)
-                if not field_matched:
-                    years = extract_years_of_experience(resume_experience)
-                    filter_reasons.append(f"experience level mismatch: resume has {years} years, filter needs {filter_values}")
-            
-            else:
-                # Generic field matching
-                resume_value = metadata.get(field)
-                logger.debug(f"Generic field '{field}': resume has '{resume_value}', filter needs {filter_values}")
-                
-                if resume_value is not None:
-                    if not isinstance(filter_values, list):
-                        filter_values = [filter_values]
-                    
-                    # Try exact match and string contains
-                    field_matched = (resume_value in filter_values or 
-                                   any(str(fv).lower() in str(resume_value).lower() for fv in filter_values))
-                else:
-                    field_matched = False
-                
-                if not field_matched:
-                    filter_reasons.append(f"field '{field}' mismatch: resume has '{resume_value}', filter needs {filter_values}")
-            
-            # Track filter statistics
-            if field not in filter_stats:
-                filter_stats[field] = {'matched': 0, 'total': 0}
-            filter_stats[field]['total'] += 1
-            if field_matched:
-                filter_stats[field]['matched'] += 1
-            
-            if not field_matched:
-                include_resume = False
-                break
-        
-        if include_resume:
-            filtered_resumes.append(resume)
-            logger.debug(f"Resume {resume_idx + 1} INCLUDED")
-        else:
-            logger.debug(f"Resume {resume_idx + 1} EXCLUDED: {'; '.join(filter_reasons)}")
+    mask, field_masks = evaluate_filter_plan(compile_filter_plan(metadata_filters), resumes, columns)
     
     # Log filter statistics
     logger.info(f"Filter statistics:")
-    for field, stats in filter_stats.items():
-        match_rate = (stats['matched'] / stats['total']) * 100 if stats['total'] > 0 else 0
-        logger.info(f"  {field}: {stats['matched']}/{stats['total']} ({match_rate:.1f}%)")
+    for field, field_mask in field_masks.items():
+        match_rate = field_mask.mean() * 100 if len(field_mask) else 0
+        logger.info(f"  {field}: {int(field_mask.sum())}/{len(field_mask)} ({match_rate:.1f}%)")
+    if logger.isEnabledFor(logging.DEBUG):
+        for row in np.flatnonzero(~mask):
+            failed = [field for field, field_mask in field_masks.items() if not field_mask[row]]
+            logger.debug(f"Resume {resumes[row].get('resume_id', 'Unknown')} EXCLUDED: failed {failed}")
     
-    logger.info(f"Filtered {len(resume_embeddings)} resumes down to {len(filtered_resumes)}")
-    return filtered_resumes
+    logger.info(f"Filtered {len(resumes)} resumes down to {int(mask.sum())}")
+    return mask
 
 
-def get_resume_embeddings(client, job_description_id=None, resume_id=None, top_k=DEFAULT_TOP_K, metadata_filters=None):
-    """Retrieve resume embeddings with multi-vector support"""
-    start_time = time.time()
-    try:
-        index_name = RESUME_INDEX
-        exists, mapping = verify_index_and_mapping(client, index_name)
-        if not exists:
-            raise ValueError(f"Index {index_name} does not exist")
-        
-        # Add refresh before search to ensure consistency
-        try:
-            client.indices.refresh(index=index_name)
-            logger.info("Index refreshed successfully")
-        except Exception as e:
-            logger.warning(f"Index refresh failed: {str(e)}")
-        
-        # Build query
-        filter_conditions = []
-        
-        if job_description_id:
-            filter_conditions.append({
-                "bool": {
-                    "should": [
-                        {"term": {"job_description_id.keyword": job_description_id}},
-                        {"term": {"job_description_id": job_description_id}},
-                        {"term": {"metadata.job_description_id.keyword": job_description_id}},
-                        {"term": {"metadata.job_description_id": job_description_id}}
-                    ],
-                    "minimum_should_match": 1
-                }
-            })
-        
-        if resume_id:
-            filter_conditions.append({
-                "term": {"resume_id.keyword": resume_id}
-            })
+def apply_metadata_filters(resume_embeddings, metadata_filters, columns=None):
+    """Apply metadata filters to resume dicts; returns the ones that pass, in order"""
+    if not metadata_filters:
+        logger.info("No metadata filters provided, returning all resumes")
+        return resume_embeddings
+    mask = metadata_filter_mask(resume_embeddings, metadata_filters, columns)
+    return [resume for resume, keep in zip(resume_embeddings, mask) if keep]
 
-        if filter_conditions:
-            # Get count with retry mechanism
-            count_query = {
-                "query": {
-                    "bool": {
-                        "filter": filter_conditions
-                    }
-                }
-            }
-            
-            logger.info(f"Executing count query: {json.dumps(count_query)}")
-            
-            max_count = 0
-            for count_attempt in range(3):
-                try:
-                    count_response = client.count(
-                        index=index_name, 
-                        body=count_query,
-                        preference='_primary_first'
-                    )
-                    current_count = count_response.get('count', 0)
-                    max_count = max(max_count, current_count)
-                    logger.info(f"Count attempt {count_attempt + 1}: {current_count}")
-                    
-                    if count_attempt > 0 and current_count == max_count and current_count > 0:
-                        break
-                        
-                except Exception as e:
-                    logger.warning(f"Count attempt {count_attempt + 1} failed: {str(e)}")
-                
-                if count_attempt < 2:
-                    time.sleep(0.1)
-            
-            total_count = max_count
-            logger.info(f"Final count for job_description_id {job_description_id}: {total_count}")
-            
-            actual_size = max(top_k, total_count + 100, 10000)
-            
-            query = {
-                "size": actual_size,
-                "query": {
-                    "bool": {
-                        "filter": filter_conditions
-                    }
-                },
-                "_source": [
-                    "skills_vector", "experience_vector", "certification_vector", "projects_vector",
-                    "candidate_name", "resume_id", "metadata", "job_description_id", "nano_Id"
+
+def resume_id_filter(resume_ids):
+    """Filter clause for any of resume_ids: resume_id.keyword on dynamically mapped indexes, resume_id
+    itself on indexes created by the resume Lambda, which maps it as keyword with no subfield"""
+    resume_ids = list(resume_ids)
+    return {
+        "bool": {
+            "should": [
+                {"terms": {"resume_id.keyword": resume_ids}},
+                {"terms": {"resume_id": resume_ids}}
+            ],
+            "minimum_should_match": 1
+        }
+    }
+
+
+def build_resume_filter_conditions(job_description_id=None, resume_id=None, uploaded_after=None,
+                                   job_description_ids=None):
+    """Build the bool filter clauses that select resumes for a job description, resume or upload window
+
+    job_description_ids selects the union of several job descriptions' candidate pools.
+    """
+    filter_conditions = []
+    
+    if job_description_ids:
+        filter_conditions.append({
+            "bool": {
+                "should": [
+                    {"terms": {"job_description_id.keyword": job_description_ids}},
+                    {"terms": {"job_description_id": job_description_ids}},
+                    {"terms": {"metadata.job_description_id.keyword": job_description_ids}},
+                    {"terms": {"metadata.job_description_id": job_description_ids}}
                 ],
-                "sort": [
-                    {"_id": {"order": "asc"}},
-                    {"_score": {"order": "desc"}}
-                ]
+                "minimum_should_match": 1
             }
-        else:
-            query = {
-                "size": max(top_k, 10000),
-                "query": {"match_all": {}},
-                "_source": [
-                    "skills_vector", "experience_vector", "certification_vector", "projects_vector",
-                    "candidate_name", "resume_id", "metadata", "job_description_id", "nano_Id"
+        })
+
+    if job_description_id:
+        filter_conditions.append({
+            "bool": {
+                "should": [
+                    {"term": {"job_description_id.keyword": job_description_id}},
+                    {"term": {"job_description_id": job_description_id}},
+                    {"term": {"metadata.job_description_id.keyword": job_description_id}},
+                    {"term": {"metadata.job_description_id": job_description_id}}
                 ],
-                "sort": [
-                    {"_id": {"order": "asc"}},
-                    {"_score": {"order": "desc"}}
-                ]
+                "minimum_should_match": 1
             }
+        })
+    
+    if resume_id:
+        filter_conditions.append(resume_id_filter([resume_id]))
 
-        logger.info(f"Executing resume query with size {query.get('size')}: {json.dumps(query)}")
-        
-        response = execute_search_with_retry(client, index_name, query)
-        
+    if uploaded_after:
+        filter_conditions.append({
+            "range": {"upload_date": {"gte": uploaded_after}}
+        })
+
+    return filter_conditions
+
+
+def build_resume_data(source):
+    """Map a resume document to the vectors-plus-metadata dict the matcher uses"""
+    return {
+        'skills_vector': source.get('skills_vector', []),
+        'experience_vector': source.get('experience_vector', []),
+        'certification_vector': source.get('certification_vector', []),
+        'projects_vector': source.get('projects_vector', []),
+        'candidate_name': source.get('candidate_name'),
+        'resume_id': source.get('resume_id'),
+        'job_description_id': source.get('job_description_id'),
+        'nano_Id': source.get('nano_Id'),
+        'upload_date': source.get('upload_date'),
+        'metadata': source.get('metadata', {})
+    }
+
+
+def get_resume_by_identifier(client, resume_id=None, nano_id=None):
+    """Load one resume (with its section vectors) by resume_id or nano_Id; None when not found"""
+    start_time = time.time()
+    try:
+        if resume_id:
+            clause = resume_id_filter([resume_id])
+        else:
+            # The resume Lambda maps nano_Id as keyword itself, so it has no .keyword subfield
+            clause = {"term": {"nano_Id": nano_id}}
+
+        query = {
+            "size": 1,
+            "query": {"bool": {"filter": [clause]}},
+            "_source": RESUME_VECTOR_FIELDS + [
+                "candidate_name", "resume_id", "metadata", "job_description_id", "nano_Id", "upload_date"
+            ]
+        }
+        response = client.search(index=RESUME_INDEX, body=query)
         hits = response.get('hits', {}).get('hits', [])
-        total_hits = response.get('hits', {}).get('total', {}).get('value', 0)
-        
-        logger.info(f"Final result: {len(hits)} resume documents out of {total_hits} total")
-        
-        # Use scroll API if needed for job_description_id queries
-        if job_description_id and len(hits) < total_hits and total_hits > 0:
-            logger.info(f"Using scroll API to ensure all {total_hits} results are retrieved")
-            all_hits = []
-            
-            scroll_query = query.copy()
-            scroll_query['size'] = min(1000, total_hits)
-            
-            try:
-                scroll_response = client.search(
-                    index=index_name, 
-                    body=scroll_query,
-                    scroll='5m',
-                    preference='_primary_first',
-                    request_cache=False
-                )
-                
-                scroll_id = scroll_response.get('_scroll_id')
-                all_hits.extend(scroll_response.get('hits', {}).get('hits', []))
-                
-                scroll_attempts = 0
-                max_scroll_attempts = 50
-                
-                while len(all_hits) < total_hits and scroll_id and scroll_attempts < max_scroll_attempts:
-                    scroll_attempts += 1
-                    try:
-                        scroll_response = client.scroll(scroll_id=scroll_id, scroll='5m')
-                        
-                        new_hits = scroll_response.get('hits', {}).get('hits', [])
-                        if not new_hits:
-                            logger.info("No more hits available from scroll")
-                            break
-                            
-                        all_hits.extend(new_hits)
-                        scroll_id = scroll_response.get('_scroll_id')
-                        
-                        logger.info(f"Scroll attempt {scroll_attempts}: Retrieved {len(new_hits)} more hits, total: {len(all_hits)}")
-                        
-                    except Exception as e:
-                        logger.error(f"Error during scroll attempt {scroll_attempts}: {str(e)}")
-                        break
-                
-                if scroll_id:
-                    try:
-                        client.clear_scroll(scroll_id=scroll_id)
-                    except Exception as e:
-                        logger.warning(f"Failed to clear scroll: {str(e)}")
-                
-                hits = all_hits
-                logger.info(f"Final scroll result: Retrieved {len(hits)} total resume documents")
-                
-            except Exception as e:
-                logger.error(f"Error during scroll operation: {str(e)}")
+
+        logger.info(f"get_resume_by_identifier time taken: {time.time() - start_time:.4f} seconds")
+        return build_resume_data(hits[0]['_source']) if hits else None
+
+    except Exception as e:
+        logger.error(f"Error retrieving resume {resume_id or nano_id}: {str(e)}")
+        raise
+
+
+def build_resume_pool_query(job_description_id=None, resume_id=None, metadata_filters=None, uploaded_after=None,
+                            job_description_ids=None, source_fields=None):
+    """Build the query that reads a candidate pool; returns (query, residual_filters)
+
+    Metadata filters OpenSearch can evaluate are pushed into the filter; residual_filters are the ones
+    left for apply_metadata_filters. source_fields works as in get_resume_embeddings.
+    """
+    filter_clauses, residual_filters, _ = compile_metadata_filters(metadata_filters)
+    filter_conditions = build_resume_filter_conditions(
+        job_description_id, resume_id, uploaded_after, job_description_ids
+    ) + filter_clauses
+
+    if source_fields is None:
+        source = RESUME_VECTOR_FIELDS + RESUME_INFO_FIELDS
+    else:
+        source = RESUME_VECTOR_FIELDS + RESUME_KEY_FIELDS + list(dict.fromkeys(
+            source_fields + filter_source_fields(residual_filters)
+        ))
+
+    query = {
+        "query": {"bool": {"filter": filter_conditions}} if filter_conditions else {"match_all": {}},
+        "_source": source
+    }
+    return query, residual_filters
+
+
+def read_resume_hits(client, query, consistency=None, on_page=None):
+    """Read every hit of a pool query in RETRIEVAL_SORT order
+
+    One search answers pools that fit a page; track_total_hits tells whether more remain, and larger
+    pools are read by concurrent sliced search_after streams over a point-in-time.
+    With on_page, pages are handed to on_page(page, total_hits) as they arrive (in no particular
+    order, possibly from several threads) instead of being collected, and None is returned.
+    """
+    index_name = RESUME_INDEX
+    exists, mapping = verify_index_and_mapping(client, index_name)
+    if not exists:
+        raise ValueError(f"Index {index_name} does not exist")
+
+    page_query = {**query, "size": RETRIEVAL_PAGE_SIZE, "sort": RETRIEVAL_SORT, "track_total_hits": True}
+    logger.info(f"Executing resume query with size {RETRIEVAL_PAGE_SIZE}: {json.dumps(page_query)}")
+    response = execute_search_with_retry(client, index_name, page_query, consistency)
+    hits = response.get('hits', {}).get('hits', [])
+    total_hits = response.get('hits', {}).get('total', {}).get('value', 0)
+    logger.info(f"Final result: {len(hits)} resume documents out of {total_hits} total")
+
+    if len(hits) >= total_hits:
+        if on_page is None:
+            return hits
+        on_page(hits, total_hits)
+        return None
+
+    # The first page is dropped: the streams read the whole pool from one consistent snapshot
+    del hits
+    if on_page is None:
+        return fetch_all_hits(client, index_name, query, total_hits)
+    for_each_page(client, index_name, query, lambda page: on_page(page, total_hits), total_hits)
+    return None
+
+
+def get_resume_embeddings(client, job_description_id=None, resume_id=None, top_k=DEFAULT_TOP_K, metadata_filters=None,
+                          uploaded_after=None, job_description_ids=None, source_fields=None, consistency=None):
+    """Retrieve resume embeddings with multi-vector support
+
+    When uploaded_after is set, only resumes whose upload_date is at or after that watermark are returned.
+    job_description_ids fetches the candidate pools of several job descriptions in one query.
+    A source_fields list makes this phase one of a two-phase retrieval: only vectors, RESUME_KEY_FIELDS,
+    those metadata paths and the ones the residual metadata filters read are fetched, and each resume
+    carries its doc_id so hydrate_resumes can fill in the rest for the winners.
+    consistency only picks the search preference; a 'strong' request refreshes the index once beforehand.
+    Pools are scored from resume_batch.get_resume_batch, which decodes vectors without per-resume lists.
+    """
+    start_time = time.time()
+    try:
+        query, residual_filters = build_resume_pool_query(
+            job_description_id, resume_id, metadata_filters, uploaded_after, job_description_ids, source_fields
+        )
+        hits = read_resume_hits(client, query, consistency)
         
         # Process the results
         resume_embeddings = []
@@ -690,21 +816,13 @@ def get_resume_embeddings(client, job_description_id=None, resume_id=None, top_k
                 continue
             seen_resume_ids.add(resume_id_val)
             
-            resume_data = {
-                'skills_vector': source.get('skills_vector', []),
-                'experience_vector': source.get('experience_vector', []),
-                'certification_vector': source.get('certification_vector', []),
-                'projects_vector': source.get('projects_vector', []),
-                'candidate_name': source.get('candidate_name'),
-                'resume_id': resume_id_val,
-                'job_description_id': source.get('job_description_id'),
-                'nano_Id': source.get('nano_Id'),
-                'metadata': source.get('metadata', {})
-            }
+            resume_data = build_resume_data(source)
+            if source_fields is not None:
+                resume_data['doc_id'] = hit.get('_id')
             resume_embeddings.append(resume_data)
         
-        if metadata_filters:
-            resume_embeddings = apply_metadata_filters(resume_embeddings, metadata_filters)
+        if residual_filters:
+            resume_embeddings = apply_metadata_filters(resume_embeddings, residual_filters)
         
         logger.info(f"get_resume_embeddings time taken: {time.time() - start_time:.4f} seconds")
         logger.info(f"Final unique resume count: {len(resume_embeddings)}")
@@ -712,4 +830,529 @@ def get_resume_embeddings(client, job_description_id=None, resume_id=None, top_k
         
     except Exception as e:
         logger.error(f"Error retrieving resume embeddings: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+
+# Largest pool an exact script_score query can return in one page (index.max_result_window)
+MAX_RESULT_WINDOW = 10000
+
+# Fields phase one of retrieval needs to identify, pool and cache a resume
+RESUME_KEY_FIELDS = ["resume_id", "job_description_id", "upload_date"]
+
+# Fields phase two fetches for the final matches only
+HYDRATE_FIELDS = ["candidate_name", "nano_Id", "metadata"]
+
+RESUME_INFO_FIELDS = RESUME_KEY_FIELDS + HYDRATE_FIELDS
+
+
+def hydrate_resumes(client, resumes):
+    """Phase two of retrieval: fill candidate_name, nano_Id and metadata in place with one mget
+
+    Only dicts carrying a doc_id (set by phase-one retrieval) are fetched; others are left as they are.
+    The matches are already scored, so a failed mget is logged and they are returned unhydrated.
+    """
+    doc_ids = list(dict.fromkeys(resume['doc_id'] for resume in resumes if resume.get('doc_id')))
+    if not doc_ids:
+        return resumes
+    
+    start_time = time.time()
+    try:
+        response = client.mget(index=RESUME_INDEX, body={"docs": [{"_id": doc_id, "_source": HYDRATE_FIELDS} for doc_id in doc_ids]})
+    except Exception as e:
+        logger.error(f"hydrate_resumes mget failed for {len(doc_ids)} resumes, returning them unhydrated: {str(e)}")
+        return resumes
+    sources = {doc['_id']: doc.get('_source', {}) for doc in response.get('docs', []) if doc.get('found')}
+    
+    for resume in resumes:
+        source = sources.get(resume.get('doc_id'))
+        if source is None:
+            continue
+        resume['candidate_name'] = source.get('candidate_name')
+        resume['nano_Id'] = source.get('nano_Id')
+        resume['metadata'] = source.get('metadata', {})
+    
+    logger.info(f"hydrate_resumes fetched {len(sources)} of {len(doc_ids)} resumes, "
+                f"time taken: {time.time() - start_time:.4f} seconds")
+    return resumes
+
+
+# Warm-container map of resume_id -> document _id, least recently used first. Resumes are indexed
+# under generated _ids; the map points at the copy pool reads keep (the newest upload, first in RETRIEVAL_SORT order).
+_resume_doc_id_cache = OrderedDict()
+_resume_doc_id_cache_lock = threading.Lock()
+
+
+def forget_resume_doc_ids(resume_ids):
+    """Drop cached _ids, e.g. after mget reported their documents missing"""
+    with _resume_doc_id_cache_lock:
+        for resume_id in resume_ids:
+            _resume_doc_id_cache.pop(resume_id, None)
+
+
+def lookup_resume_doc_ids(client, resume_ids):
+    """Map resume_ids to document _ids; returns {resume_id: _id} without the IDs that do not exist
+
+    Cached IDs cost nothing; the rest are found with one terms search that returns only resume_id.
+    """
+    start_time = time.time()
+    doc_ids = {}
+    with _resume_doc_id_cache_lock:
+        for resume_id in resume_ids:
+            if resume_id in _resume_doc_id_cache:
+                _resume_doc_id_cache.move_to_end(resume_id)
+                doc_ids[resume_id] = _resume_doc_id_cache[resume_id]
+
+    uncached_ids = [resume_id for resume_id in resume_ids if resume_id not in doc_ids]
+    if uncached_ids:
+        query = {
+            "size": RETRIEVAL_PAGE_SIZE,
+            "query": {"bool": {"filter": [resume_id_filter(uncached_ids)]}},
+            "sort": RETRIEVAL_SORT,
+            "_source": ["resume_id"]
+        }
+        response = client.search(index=RESUME_INDEX, body=query)
+        fetched = {}
+        for hit in response.get('hits', {}).get('hits', []):
+            fetched.setdefault(hit['_source'].get('resume_id'), hit['_id'])
+
+        with _resume_doc_id_cache_lock:
+            for resume_id, doc_id in fetched.items():
+                _resume_doc_id_cache[resume_id] = doc_id
+                _resume_doc_id_cache.move_to_end(resume_id)
+            while len(_resume_doc_id_cache) > RESUME_DOC_ID_CACHE_MAX_ENTRIES:
+                _resume_doc_id_cache.popitem(last=False)
+        doc_ids.update((resume_id, fetched[resume_id]) for resume_id in uncached_ids if resume_id in fetched)
+
+    logger.info(f"lookup_resume_doc_ids resolved {len(doc_ids)} of {len(resume_ids)} "
+                f"({len(resume_ids) - len(uncached_ids)} cached), time taken: {time.time() - start_time:.4f} seconds")
+    return doc_ids
+
+
+def count_resumes(client, filter_conditions):
+    """Count resumes matching the given filter clauses with a single count request"""
+    response = client.count(index=RESUME_INDEX, body={"query": {"bool": {"filter": filter_conditions}}})
+    return response.get('count', 0)
+
+
+def parse_freshness_token(min_freshness):
+    """(upload_date, resume_id, doc_id) of a freshness_token; older tokens carry only the upload_date"""
+    parts = min_freshness.split('|')
+    if len(parts) == 3 and all(parts):
+        return tuple(parts)
+    return min_freshness, None, None
+
+
+def ensure_freshness(client, min_freshness, cached_upload_date=None):
+    """Make the resume a freshness_token names searchable, refreshing only when needed
+
+    min_freshness is the freshness_token returned by the resume upload. cached_upload_date is the
+    upload_date a warm cache entry holds for that resume_id; when it has reached the token the request
+    needs nothing. Otherwise one count on the document's _id checks whether that very document is
+    searchable yet, and only when it is not the index is refreshed. Tokens without a document id
+    always refresh. Returns the step taken: 'cached', 'visible' or 'refreshed'.
+    """
+    upload_date, resume_id, doc_id = parse_freshness_token(min_freshness)
+    if resume_id and cached_upload_date and cached_upload_date >= upload_date:
+        return 'cached'
+    if doc_id and count_resumes(client, [{"ids": {"values": [doc_id]}}]):
+        return 'visible'
+    refresh_index(client, RESUME_INDEX)
+    return 'refreshed'
+
+
+def count_unscored_resumes(client, filter_conditions):
+    """Count resumes in the filter that have section vectors but no materialized similarity_score"""
+    query = {
+        "bool": {
+            "filter": filter_conditions + [{
+                "bool": {
+                    "should": [{"exists": {"field": field}} for field in RESUME_VECTOR_FIELDS],
+                    "minimum_should_match": 1
+                }
+            }],
+            "must_not": [{"exists": {"field": "similarity_score"}}]
+        }
+    }
+    return client.count(index=RESUME_INDEX, body={"query": query}).get('count', 0)
+
+
+def plan_scoring_strategy(pool_count, requested_strategy=None, unscored_count=None):
+    """Choose where to score a candidate pool
+
+    Returns 'client' (pull vectors and score in Python), 'script_score' (exact cosine inside the cluster),
+    'knn' (approximate k-NN candidates per section, exactly re-scored inside the cluster) or
+    'materialized' (sort by the similarity_score stored at ingest). 'materialized' is only used when
+    unscored_count shows every resume in the pool has a stored score.
+    """
+    strategy = str(requested_strategy or SCORING_STRATEGY).lower()
+    
+    if strategy == 'materialized' and unscored_count != 0:
+        logger.info(f"{unscored_count} resumes have no stored match score, falling back to client-side scoring")
+        strategy = 'client'
+    elif strategy == 'auto' and unscored_count == 0:
+        strategy = 'materialized'
+    elif strategy == 'auto':
+        strategy = 'script_score' if pool_count <= EXACT_SCORING_MAX_POOL else 'knn'
+    elif strategy not in ('client', 'script_score', 'knn', 'materialized'):
+        logger.warning(f"Unknown scoring strategy '{strategy}', falling back to client-side scoring")
+        strategy = 'client'
+    
+    if strategy == 'script_score' and pool_count > MAX_RESULT_WINDOW:
+        logger.info(f"Pool of {pool_count} exceeds the result window, using k-NN instead of script_score")
+        strategy = 'knn'
+    
+    logger.info(f"Scoring strategy for pool of {pool_count} resumes: {strategy}")
+    return strategy
+
+
+def _exact_section_query(field, job_embedding, filter_conditions, size, source_fields=None):
+    """Exact cosine script_score over every resume in the filter that has this section vector"""
+    return {
+        "size": size,
+        "_source": RESUME_KEY_FIELDS + (source_fields or []),
+        "query": {
+            "script_score": {
+                "query": {"bool": {"filter": filter_conditions + [{"exists": {"field": field}}]}},
+                "script": {
+                    "source": "knn_score",
+                    "lang": "knn",
+                    "params": {"field": field, "query_value": job_embedding, "space_type": "cosinesimil"}
+                }
+            }
+        }
+    }
+
+
+def _knn_section_query(field, job_embedding, filter_conditions, k):
+    """Filtered approximate k-NN query on one section vector, returning only resume ids"""
+    return {
+        "size": k,
+        "_source": ["resume_id"],
+        "query": {
+            "knn": {
+                field: {
+                    "vector": job_embedding,
+                    "k": k,
+                    "filter": {"bool": {"filter": filter_conditions}}
+                }
+            }
+        }
+    }
+
+
+def _run_section_msearch(client, queries):
+    """Run one query per section vector field in a single msearch round trip"""
+    body = []
+    for query in queries:
+        body.append({"index": RESUME_INDEX})
+        body.append(query)
+    
+    responses = client.msearch(body=body).get('responses', [])
+    for response in responses:
+        if response.get('error'):
+            raise RuntimeError(f"Section scoring query failed: {response['error']}")
+    return responses
+
+
+def score_resumes_in_cluster(client, job_embedding, filter_conditions, pool_count, strategy, top_k=DEFAULT_TOP_K,
+                             source_fields=None):
+    """Score resumes inside OpenSearch and return (resumes, section_scores, status) without transferring vectors
+
+    resumes holds RESUME_KEY_FIELDS, the source_fields metadata paths and the doc_id for hydrate_resumes;
+    section_scores is an (N, 4) float32 matrix of cosines and status marks which sections were present (1)
+    or missing (0), matching the packed client-side layout.
+    """
+    start_time = time.time()
+    
+    if strategy == 'knn':
+        # Candidate generation: top-k per section field, then exact re-scoring of the union
+        k = max(1, min(pool_count, max(top_k * KNN_CANDIDATE_MULTIPLIER, KNN_MIN_CANDIDATES)))
+        responses = _run_section_msearch(client, [
+            _knn_section_query(field, job_embedding, filter_conditions, k) for field in RESUME_VECTOR_FIELDS
+        ])
+        candidate_ids = sorted({
+            hit['_source'].get('resume_id')
+            for response in responses
+            for hit in response.get('hits', {}).get('hits', [])
+            if hit.get('_source', {}).get('resume_id')
+        })
+        logger.info(f"k-NN candidate generation (k={k}) returned {len(candidate_ids)} unique resumes")
+        if not candidate_ids:
+            return [], np.zeros((0, 4), dtype=np.float32), np.zeros((0, 4), dtype=np.int8)
+        filter_conditions = filter_conditions + [resume_id_filter(candidate_ids)]
+        size = len(candidate_ids)
+    else:
+        size = min(pool_count, MAX_RESULT_WINDOW)
+    
+    responses = _run_section_msearch(client, [
+        _exact_section_query(field, job_embedding, filter_conditions, size, source_fields) for field in RESUME_VECTOR_FIELDS
+    ])
+    
+    resumes = []
+    rows = {}
+    scores = []
+    for column, response in enumerate(responses):
+        for hit in response.get('hits', {}).get('hits', []):
+            source = hit.get('_source', {})
+            resume_id_val = source.get('resume_id')
+            row = rows.get(resume_id_val)
+            if row is None:
+                row = rows[resume_id_val] = len(resumes)
+                resumes.append({
+                    'resume_id': resume_id_val,
+                    'doc_id': hit.get('_id'),
+                    'candidate_name': None,
+                    'job_description_id': source.get('job_description_id'),
+                    'nano_Id': None,
+                    'upload_date': source.get('upload_date'),
+                    'metadata': source.get('metadata', {})
+                })
+            # cosinesimil script scores are shifted to 1 + cosine to stay non-negative
+            scores.append((row, column, hit['_score'] - 1.0))
+    
+    section_scores = np.zeros((len(resumes), len(RESUME_VECTOR_FIELDS)), dtype=np.float32)
+    status = np.zeros((len(resumes), len(RESUME_VECTOR_FIELDS)), dtype=np.int8)
+    for row, column, score in scores:
+        section_scores[row, column] = score
+        status[row, column] = 1
+    
+    logger.info(f"score_resumes_in_cluster ({strategy}) scored {len(resumes)} resumes, "
+                f"time taken: {time.time() - start_time:.4f} seconds")
+    return resumes, section_scores, status
+
+
+def get_materialized_matches(client, filter_conditions, similarity_threshold=0.0, top_k=DEFAULT_TOP_K,
+                             metadata_filters=None):
+    """Rank resumes by the similarity_score stored at ingest with a sorted query; no vectors are transferred
+
+    Returns (similarities, stored_above_threshold). Ties break by ascending resume_id, as in client-side
+    ranking. Metadata filters are applied to each page, paging with search_after until top_k are kept.
+    A re-uploaded resume is listed once, with its first (highest scoring) copy.
+    stored_above_threshold counts stored scores at or above the threshold before metadata filters and
+    that dedupe. Only ids, scores and the metadata the filters read are fetched; see hydrate_resumes.
+    """
+    start_time = time.time()
+    range_filter = {"range": {"similarity_score": {"gte": similarity_threshold}}}
+    page_size = top_k if top_k and top_k > 0 else MAX_RESULT_WINDOW
+    if metadata_filters:
+        # Filters drop some hits client-side, so over-fetch to keep the number of pages low
+        page_size = max(page_size * KNN_CANDIDATE_MULTIPLIER, KNN_MIN_CANDIDATES)
+    page_size = min(page_size, MAX_RESULT_WINDOW)
+    query = {
+        "size": page_size,
+        "track_total_hits": True,
+        "query": {"bool": {"filter": filter_conditions + [range_filter]}},
+        "sort": [{"similarity_score": "desc"}, {"resume_id.keyword": {"order": "asc", "unmapped_type": "keyword"}}],
+        "_source": RESUME_KEY_FIELDS + filter_source_fields(metadata_filters) + ["similarity_score", "vector_scores"]
+    }
+    
+    similarities = []
+    seen_resume_ids = set()
+    stored_above_threshold = None
+    while True:
+        response = client.search(index=RESUME_INDEX, body=query)
+        hits = response.get('hits', {}).get('hits', [])
+        if stored_above_threshold is None:
+            stored_above_threshold = response.get('hits', {}).get('total', {}).get('value', len(hits))
+        
+        resumes = [{**hit['_source'], 'doc_id': hit.get('_id')} for hit in hits]
+        for resume in apply_metadata_filters(resumes, metadata_filters):
+            if resume.get('resume_id') in seen_resume_ids:
+                continue
+            seen_resume_ids.add(resume.get('resume_id'))
+            similarities.append({
+                'resume_id': resume.get('resume_id'),
+                'doc_id': resume.get('doc_id'),
+                'candidate_name': None,
+                'nano_Id': None,
+                'similarity_score': resume['similarity_score'],
+                'vector_scores': resume.get('vector_scores', {}),
+                'metadata': resume.get('metadata', {})
+            })
+        
+        if top_k and top_k > 0 and len(similarities) >= top_k:
+            similarities = similarities[:top_k]
+            break
+        if len(hits) < page_size:
+            break
+        query["search_after"] = hits[-1]['sort']
+    
+    logger.info(f"get_materialized_matches returned {len(similarities)} of {stored_above_threshold} stored scores, "
+                f"time taken: {time.time() - start_time:.4f} seconds")
+    return similarities, stored_above_threshold
+
+
+# Fields a summary lists per candidate
+SUMMARY_FIELDS = ["resume_id", "candidate_name", "nano_Id"]
+
+# Facets a summary can count, mapped to the keyword or numeric field written at ingest
+SUMMARY_FACET_FIELDS = {
+    'skills': 'metadata.skill_ids',
+    'location': 'metadata.location_key',
+    'experience': 'metadata.total_experience_months'
+}
+
+# Experience bands over metadata.total_experience_months as [from, to) months, like a range aggregation.
+# The keys are experience_level filter values, and the bands cover the same whole years as
+# experience_level_match: up to 2, 3-5, 6-10 and more than 10 years.
+EXPERIENCE_BANDS = [('entry', 0, 36), ('mid', 36, 72), ('senior', 72, 132), ('expert', 132, None)]
+
+# Numeric facets are counted in these bands; the others are terms facets
+FACET_RANGES = {
+    'experience': EXPERIENCE_BANDS
+}
+
+
+def _source_values(source, path):
+    """Values at a dotted _source path, as a list"""
+    value = source
+    for key in path.split('.'):
+        value = value.get(key) if isinstance(value, dict) else None
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _facet_aggregations(facet_fields):
+    """terms / range aggregation per requested facet"""
+    aggregations = {}
+    for name, field in facet_fields.items():
+        if name in FACET_RANGES:
+            ranges = []
+            for key, start, stop in FACET_RANGES[name]:
+                bounds = {"key": key, "from": start}
+                if stop is not None:
+                    bounds["to"] = stop
+                ranges.append(bounds)
+            aggregations[name] = {"range": {"field": field, "ranges": ranges}}
+        else:
+            aggregations[name] = {"terms": {"field": field, "size": SUMMARY_FACET_SIZE}}
+    return aggregations
+
+
+def _facet_buckets(aggregations, facet_fields):
+    return {
+        name: [{'value': bucket['key'], 'count': bucket['doc_count']}
+               for bucket in aggregations.get(name, {}).get('buckets', [])]
+        for name in facet_fields
+    }
+
+
+def _count_facets(sources, facet_fields):
+    """Count facets in Python with the bucket layout the aggregations return"""
+    facet_counts = {}
+    for name, field in facet_fields.items():
+        if name in FACET_RANGES:
+            counter = Counter()
+            for source in sources:
+                for value in _source_values(source, field)[:1]:
+                    for key, start, stop in FACET_RANGES[name]:
+                        if isinstance(value, (int, float)) and value >= start and (stop is None or value < stop):
+                            counter[key] += 1
+            facet_counts[name] = [{'value': key, 'count': counter[key]} for key, _, _ in FACET_RANGES[name]]
+        else:
+            counter = Counter(value for source in sources for value in dict.fromkeys(_source_values(source, field)))
+            # Same bucket order as a terms aggregation: count desc, then value
+            buckets = sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))[:SUMMARY_FACET_SIZE]
+            facet_counts[name] = [{'value': value, 'count': count} for value, count in buckets]
+    return facet_counts
+
+
+def get_resume_summary(client, filter_conditions, residual_filters=None, top_k=DEFAULT_TOP_K, facets=None):
+    """Count a candidate pool and list its candidates without reading any vectors
+
+    Returns (total, candidates, facet_counts). candidates hold resume_id, candidate_name and nano_Id
+    for the first top_k resumes in resume_id order. Without residual_filters this is a single search
+    (track_total_hits plus a terms aggregation per facet); filters only Python can evaluate make the
+    pool be read with just the fields those filters and facets need, and counted in Python.
+    """
+    start_time = time.time()
+    facet_fields = {name: SUMMARY_FACET_FIELDS[name] for name in facets or [] if name in SUMMARY_FACET_FIELDS}
+    size = min(top_k if top_k and top_k > 0 else MAX_RESULT_WINDOW, MAX_RESULT_WINDOW)
+    query = {
+        "query": {"bool": {"filter": filter_conditions}} if filter_conditions else {"match_all": {}},
+        "_source": SUMMARY_FIELDS
+    }
+
+    if not residual_filters:
+        query.update({"size": size, "sort": RETRIEVAL_SORT, "track_total_hits": True})
+        if facet_fields:
+            query["aggs"] = _facet_aggregations(facet_fields)
+        response = client.search(index=RESUME_INDEX, body=query)
+        hits = response.get('hits', {}).get('hits', [])
+        total = response.get('hits', {}).get('total', {}).get('value', len(hits))
+        facet_counts = _facet_buckets(response.get('aggregations', {}), facet_fields)
+        candidates = [hit['_source'] for hit in hits]
+    else:
+        query["_source"] = list(dict.fromkeys(
+            SUMMARY_FIELDS + filter_source_fields(residual_filters) + list(facet_fields.values())
+        ))
+        sources = apply_metadata_filters([hit['_source'] for hit in fetch_all_hits(client, RESUME_INDEX, query)],
+                                         residual_filters)
+        total = len(sources)
+        facet_counts = _count_facets(sources, facet_fields)
+        candidates = sources[:size]
+
+    candidates = [{field: candidate.get(field) for field in SUMMARY_FIELDS} for candidate in candidates]
+    logger.info(f"get_resume_summary counted {total} resumes, listed {len(candidates)}, "
+                f"time taken: {time.time() - start_time:.4f} seconds")
+    return total, candidates, facet_counts
+
+
+def get_resume_facets(client, job_description_ids, filter_clauses, residual_filters=None, facets=None):
+    """Count the candidate pools of job descriptions per facet, without reading vectors or listing candidates
+
+    Returns (total, per_job) with per_job[job_description_id] = {'total_candidates', 'facets'}. Without
+    residual_filters this is one size=0 search: a filters aggregation per job description, each holding
+    the facet aggregations. Filters only Python can evaluate make the pools be read with just the fields
+    those filters and facets need, and counted in Python.
+    """
+    start_time = time.time()
+    facet_fields = {name: SUMMARY_FACET_FIELDS[name] for name in facets or SUMMARY_FACET_FIELDS if name in SUMMARY_FACET_FIELDS}
+    filter_conditions = build_resume_filter_conditions(job_description_ids=job_description_ids) + filter_clauses
+    query = {"query": {"bool": {"filter": filter_conditions}}}
+
+    if not residual_filters:
+        query.update({
+            "size": 0,
+            "track_total_hits": True,
+            "aggs": {
+                "job_descriptions": {
+                    "filters": {"filters": {
+                        job_id: {"bool": {"filter": build_resume_filter_conditions(job_id)}} for job_id in job_description_ids
+                    }},
+                    "aggs": _facet_aggregations(facet_fields)
+                }
+            }
+        })
+        response = client.search(index=RESUME_INDEX, body=query)
+        total = response.get('hits', {}).get('total', {}).get('value', 0)
+        buckets = response.get('aggregations', {}).get('job_descriptions', {}).get('buckets', {})
+        per_job = {
+            job_id: {
+                'total_candidates': buckets.get(job_id, {}).get('doc_count', 0),
+                'facets': _facet_buckets(buckets.get(job_id, {}), facet_fields)
+            }
+            for job_id in job_description_ids
+        }
+    else:
+        query["_source"] = list(dict.fromkeys(
+            ["resume_id", "job_description_id", "metadata.job_description_id"]
+            + filter_source_fields(residual_filters) + list(facet_fields.values())
+        ))
+        sources = apply_metadata_filters([hit['_source'] for hit in fetch_all_hits(client, RESUME_INDEX, query)],
+                                         residual_filters)
+        pools = {job_id: [] for job_id in job_description_ids}
+        for source in sources:
+            job_id = source.get('job_description_id') or source.get('metadata', {}).get('job_description_id')
+            if job_id in pools:
+                pools[job_id].append(source)
+        total = len(sources)
+        per_job = {
+            job_id: {'total_candidates': len(pool), 'facets': _count_facets(pool, facet_fields)}
+            for job_id, pool in pools.items()
+        }
+
+    logger.info(f"get_resume_facets counted {total} resumes for {len(job_description_ids)} job descriptions, "
+                f"time taken: {time.time() - start_time:.4f} seconds")
+    return total, per_job
\ No newline at end of file
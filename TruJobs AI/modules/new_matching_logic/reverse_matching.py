@@ -0,0 +1,144 @@
+import threading
+import time
+
+import numpy as np
+
+from config import (
+    JOB_DESCRIPTION_INDEX, KNN_CANDIDATE_MULTIPLIER, KNN_MIN_CANDIDATES, REVERSE_MATCH_STRATEGY,
+    REVERSE_MATCH_MAX_CACHED_JDS, JD_MATRIX_CACHE_SECONDS, RESUME_VECTOR_FIELDS, logger
+)
+from ann_index import build_profile_vectors
+from resume_service import MAX_RESULT_WINDOW
+from similarity_calculator import pack_resume_vectors, rank_job_descriptions, score_packed_vectors_batch
+
+# Packed embeddings of every job description, reused across invocations of a warm container
+_jd_matrix = None
+_jd_matrix_lock = threading.Lock()
+
+JOB_DESCRIPTION_FIELDS = ["job_description_id", "job_title", "metadata", "embedding"]
+
+REVERSE_STRATEGIES = ('matrix', 'knn')
+
+
+def _light_job_description(source):
+    """Keep the fields a reverse match returns, dropping any embedding copied into metadata"""
+    metadata = {key: value for key, value in source.get('metadata', {}).items() if key != 'embedding'}
+    return {
+        'job_description_id': source.get('job_description_id') or metadata.get('job_description_id'),
+        'job_title': source.get('job_title') or metadata.get('job_title'),
+        'metadata': metadata
+    }
+
+
+def _pack_job_descriptions(hits, dimension):
+    """Split search hits into light JD dicts and an (M, dimension) float32 embedding matrix"""
+    job_descriptions = []
+    embeddings = []
+    for hit in hits:
+        source = hit['_source']
+        embedding = source.get('embedding') or source.get('metadata', {}).get('embedding')
+        if not embedding or len(embedding) != dimension:
+            continue
+        job_descriptions.append(_light_job_description(source))
+        embeddings.append(embedding)
+    return job_descriptions, np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), dimension)
+
+
+def count_job_descriptions(client):
+    """Number of documents in the job descriptions index"""
+    return client.count(index=JOB_DESCRIPTION_INDEX, body={"query": {"match_all": {}}}).get('count', 0)
+
+
+def plan_reverse_strategy(job_count, requested_strategy=None):
+    """Pick 'matrix' for small JD collections and 'knn' once packing every JD is no longer cheap"""
+    strategy = str(requested_strategy or REVERSE_MATCH_STRATEGY).lower()
+    if strategy in REVERSE_STRATEGIES:
+        return strategy
+    if strategy != 'auto':
+        logger.warning(f"Unknown reverse match strategy '{strategy}', using auto")
+    return 'matrix' if job_count <= min(REVERSE_MATCH_MAX_CACHED_JDS, MAX_RESULT_WINDOW) else 'knn'
+
+
+def get_job_description_matrix(client, dimension):
+    """Return (job_descriptions, matrix) for every JD, cached for JD_MATRIX_CACHE_SECONDS"""
+    global _jd_matrix
+    with _jd_matrix_lock:
+        if (_jd_matrix is not None and _jd_matrix['dimension'] == dimension and
+                time.time() - _jd_matrix['loaded_at'] <= JD_MATRIX_CACHE_SECONDS):
+            return _jd_matrix['job_descriptions'], _jd_matrix['matrix']
+
+        start_time = time.time()
+        query = {
+            "size": MAX_RESULT_WINDOW,
+            "query": {"match_all": {}},
+            "_source": JOB_DESCRIPTION_FIELDS
+        }
+        response = client.search(index=JOB_DESCRIPTION_INDEX, body=query)
+        job_descriptions, matrix = _pack_job_descriptions(response.get('hits', {}).get('hits', []), dimension)
+
+        _jd_matrix = {
+            'job_descriptions': job_descriptions,
+            'matrix': matrix,
+            'dimension': dimension,
+            'loaded_at': time.time()
+        }
+        logger.info(f"Packed {len(job_descriptions)} job description embeddings, "
+                    f"time taken: {time.time() - start_time:.4f} seconds")
+        return job_descriptions, matrix
+
+
+def get_knn_job_descriptions(client, profile, dimension, top_k):
+    """Candidate JDs from the k-NN index, queried with the resume's mean unit section vector
+
+    The average section cosine equals dot(unit JD vector, profile), so the nearest JDs to the
+    normalized profile are the best matches; the candidates are rescored exactly afterwards.
+    """
+    k = min(MAX_RESULT_WINDOW, max(top_k * KNN_CANDIDATE_MULTIPLIER, KNN_MIN_CANDIDATES))
+    query = {
+        "size": k,
+        "query": {"knn": {"embedding": {"vector": profile.tolist(), "k": k}}},
+        "_source": JOB_DESCRIPTION_FIELDS
+    }
+    response = client.search(index=JOB_DESCRIPTION_INDEX, body=query)
+    return _pack_job_descriptions(response.get('hits', {}).get('hits', []), dimension)
+
+
+def match_jobs_for_resume(client, resume, top_k, similarity_threshold=0.0, strategy=None):
+    """Rank job descriptions for one resume by the same average section cosine the matcher uses
+
+    Returns (matches, reverse_info).
+    """
+    start_time = time.time()
+    dimension = next((len(resume[field]) for field in RESUME_VECTOR_FIELDS if resume.get(field)), 0)
+    if not dimension:
+        logger.warning(f"No section vectors found for resume: {resume.get('resume_id')}")
+        return [], {'reverse_strategy': None, 'job_descriptions_scored': 0}
+
+    vectors, status = pack_resume_vectors([resume], dimension)
+    job_count = count_job_descriptions(client)
+    chosen = plan_reverse_strategy(job_count, strategy)
+
+    if chosen == 'matrix':
+        job_descriptions, matrix = get_job_description_matrix(client, dimension)
+    else:
+        profile = build_profile_vectors(vectors, status)[0]
+        norm = float(np.linalg.norm(profile))
+        if norm == 0:
+            return [], {'reverse_strategy': chosen, 'job_descriptions_scored': 0, 'job_description_count': job_count}
+        job_descriptions, matrix = get_knn_job_descriptions(client, profile / norm, dimension, top_k)
+
+    scoring_info = {}
+    matches = []
+    if len(job_descriptions):
+        section_scores = score_packed_vectors_batch(matrix, vectors, status)[:, 0, :]
+        matches = rank_job_descriptions(section_scores, status[0], job_descriptions, similarity_threshold,
+                                        top_k, scoring_info)
+
+    logger.info(f"match_jobs_for_resume ({chosen}) scored {len(job_descriptions)} of {job_count} job descriptions, "
+                f"time taken: {time.time() - start_time:.4f} seconds")
+    return matches, {
+        'reverse_strategy': chosen,
+        'job_description_count': job_count,
+        'job_descriptions_scored': len(job_descriptions),
+        'matches_after_threshold': scoring_info.get('matches_after_threshold', 0)
+    }
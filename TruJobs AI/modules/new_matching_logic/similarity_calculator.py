@@ -1,99 +1,312 @@
 import numpy as np
 import time
-from config import logger
-from resume_service import extract_years_of_experience
+from config import RESUME_VECTOR_FIELDS, VECTOR_SCORE_NAMES, SECTION_EVALUATION_ORDER, logger
+from resume_service import resume_experience_years
+from vector_codec import as_encoded_vectors, encoded_dots, row_norms
 
 
-def calculate_multi_vector_similarity(job_embedding, resume_embeddings, similarity_threshold=0.0):
-    """Calculate average cosine similarity across all 4 resume vectors"""
-    start_time = time.time()
+# Resume vector fields in packed column order, with the names used in vector_scores
+VECTOR_FIELDS = RESUME_VECTOR_FIELDS
+VECTOR_NAMES = VECTOR_SCORE_NAMES
+
+# Per-vector status codes used by the packed representation
+VECTOR_MISSING = 0   # empty or absent: reported as 0.0, excluded from the average
+VECTOR_VALID = 1     # scored and included in the average
+VECTOR_MISMATCH = 2  # wrong dimension: skipped entirely (not reported in vector_scores)
+
+# Slack added to the cosine upper bound of 1.0 so float32 rounding can never prune a qualifying row
+PRUNING_EPSILON = 1e-5
+
+
+def pack_resume_vectors(resume_embeddings, dimension):
+    """Pack all resume section vectors into one (N, 4, dimension) float32 matrix plus an (N, 4) status mask"""
+    count = len(resume_embeddings)
+    vectors = np.zeros((count, len(VECTOR_FIELDS), dimension), dtype=np.float32)
+    status = np.zeros((count, len(VECTOR_FIELDS)), dtype=np.int8)
+
+    for i, resume in enumerate(resume_embeddings):
+        for j, field in enumerate(VECTOR_FIELDS):
+            vector = resume.get(field)
+            if not vector:
+                continue
+            if len(vector) != dimension:
+                logger.warning(f"Dimension mismatch for {VECTOR_NAMES[j]} vector: {len(vector)} vs {dimension}")
+                status[i, j] = VECTOR_MISMATCH
+                continue
+            try:
+                vectors[i, j] = vector
+                status[i, j] = VECTOR_VALID
+            except (TypeError, ValueError) as e:
+                vectors[i, j] = 0.0
+                logger.error(f"Error packing {VECTOR_NAMES[j]} vector for resume {resume.get('resume_id')}: {str(e)}")
+
+    return vectors, status
+
+
+def score_packed_vectors(job_embedding, vectors, status, similarity_threshold=None, section_order=None,
+                         debug_info=None):
+    """Score packed resume vectors against the job embedding with a single matrix multiply
+
+    vectors is either a raw (N, 4, D) float32 matrix or an encoded block from vector_codec, in
+    which case dot products run on the float16/int8 data and the stored norms are reused.
+
+    Returns (section_scores, similarity_scores, has_valid): per-section cosines of shape (N, 4),
+    the average over valid sections of shape (N,), and a mask of rows with at least one valid vector.
+
+    With a similarity_threshold, sections are evaluated one at a time in section_order and rows whose
+    best possible average (remaining sections at cosine 1) is already below the threshold are dropped.
+    Pruning is exact: pruned rows get a score of -inf and could never have reached the threshold.
+    """
+    job_vector = np.asarray(job_embedding, dtype=np.float32)
+    job_norm = float(np.linalg.norm(job_vector))
+
+    encoded = as_encoded_vectors(vectors)
+    norms = encoded['norms']
+    count, sections = norms.shape
+    valid = status == VECTOR_VALID
+
+    # Average cosines always lie in [-1, 1], so lower thresholds can never prune anything
+    if similarity_threshold is None or similarity_threshold <= -1.0 or count == 0:
+        dots = encoded_dots(encoded, job_vector)
+        denominator = norms * job_norm
+        section_scores = np.zeros((count, sections), dtype=np.float32)
+        np.divide(dots, denominator, out=section_scores, where=valid & (denominator > 0))
+
+        similarity_scores, has_valid = aggregate_section_scores(section_scores, status)
+        return section_scores, similarity_scores, has_valid
+
+    section_scores = np.zeros((count, sections), dtype=np.float32)
+    valid_counts = valid.sum(axis=1)
+    remaining = valid_counts.astype(np.float64)
+    partial = np.zeros(count, dtype=np.float64)
+    alive = np.flatnonzero(valid_counts > 0)
+
+    for j in resolve_section_order(section_order):
+        rows = alive[valid[alive, j]]
+        if len(rows):
+            subset = None if len(rows) == count else rows
+            denominator = norms[rows, j] * job_norm
+            scores = np.zeros(len(rows), dtype=np.float32)
+            np.divide(encoded_dots(encoded, job_vector, subset, j), denominator, out=scores, where=denominator > 0)
+            section_scores[rows, j] = scores
+            partial[rows] += scores
+            remaining[rows] -= 1
+
+        # Upper bound on the final average; the small margin absorbs float32 rounding above 1.0
+        bound = (partial[alive] + remaining[alive] * (1.0 + PRUNING_EPSILON)) / valid_counts[alive]
+        alive = alive[bound >= similarity_threshold]
+
+    has_valid = valid_counts > 0
+    pruned = np.ones(count, dtype=bool)
+    pruned[alive] = False
+    pruned &= has_valid
+
+    similarity_scores = np.full(count, -np.inf)
+    similarity_scores[~has_valid] = 0.0
+    similarity_scores[alive] = partial[alive] / valid_counts[alive]
+
+    if debug_info is not None:
+        debug_info['pruned_candidates'] = int(pruned.sum())
+        debug_info['section_evaluation_order'] = [VECTOR_NAMES[j] for j in resolve_section_order(section_order)]
+    logger.info(f"Threshold pruning dropped {int(pruned.sum())} of {count} candidates before full scoring")
+    return section_scores, similarity_scores, has_valid
+
+
+def score_packed_vectors_batch(job_embeddings, vectors, status):
+    """Score packed resume vectors against several job embeddings with one matrix product
+
+    Returns per-section cosines of shape (J, N, 4), one (N, 4) slice per job embedding.
+    """
+    job_matrix = np.asarray(job_embeddings, dtype=np.float32)
+    job_norms = row_norms(job_matrix)
+
+    encoded = as_encoded_vectors(vectors)
+    dots = encoded_dots(encoded, job_matrix.T)
+    denominator = encoded['norms'][..., None] * job_norms
+    section_scores = np.zeros(dots.shape, dtype=np.float32)
+    np.divide(dots, denominator, out=section_scores, where=(status == VECTOR_VALID)[..., None] & (denominator > 0))
+    return np.moveaxis(section_scores, -1, 0)
+
+
+def resolve_section_order(section_order=None):
+    """Map section names (or the SECTION_EVALUATION_ORDER setting) to packed column indices"""
+    names = section_order or SECTION_EVALUATION_ORDER
+    order = []
+    for name in names:
+        if name in VECTOR_NAMES and VECTOR_NAMES.index(name) not in order:
+            order.append(VECTOR_NAMES.index(name))
+        elif name not in VECTOR_NAMES:
+            logger.warning(f"Ignoring unknown section '{name}' in evaluation order")
+    # Any section left out of the configured order is still evaluated, last
+    return order + [j for j in range(len(VECTOR_NAMES)) if j not in order]
+
+
+def aggregate_section_scores(section_scores, status):
+    """Average per-section cosines over the valid sections of each row
+
+    Returns (similarity_scores, has_valid); rows without any valid section score 0.0.
+    """
+    valid = status == VECTOR_VALID
+    valid_counts = valid.sum(axis=1)
+    has_valid = valid_counts > 0
+    similarity_scores = np.zeros(len(section_scores), dtype=np.float64)
+    totals = np.where(valid, section_scores, 0.0).sum(axis=1, dtype=np.float64)
+    np.divide(totals, valid_counts, out=similarity_scores, where=has_valid)
+    return similarity_scores, has_valid
+
+
+def build_vector_scores(section_row, status_row):
+    """Build the per-section vector_scores dict for one packed row"""
+    vector_scores = {}
+    for j, name in enumerate(VECTOR_NAMES):
+        if status_row[j] == VECTOR_VALID:
+            vector_scores[name] = float(section_row[j])
+        elif status_row[j] == VECTOR_MISSING:
+            vector_scores[name] = 0.0
+    return vector_scores
+
+
+def select_top_k(scores, resume_ids, top_k=None):
+    """Return indices of the top_k highest scores, ties broken by ascending resume_id
+
+    Uses a partial partition so only the winners (plus any ties at the cut-off) are ever sorted.
+    A missing or non-positive top_k returns every index in ranked order.
+    """
+    count = len(scores)
+    if top_k is None or top_k <= 0 or top_k >= count:
+        candidates = np.arange(count)
+    else:
+        cutoff = np.partition(scores, count - top_k)[count - top_k]
+        candidates = np.flatnonzero(scores >= cutoff)
+
+    candidate_ids = np.array([str(resume_ids[i]) for i in candidates])
+    ranked = candidates[np.lexsort((candidate_ids, -scores[candidates]))]
+    return ranked[:top_k] if top_k and top_k > 0 else ranked
+
+
+def rank_packed_resumes(job_embedding, vectors, status, resumes, similarity_threshold=0.0,
+                        top_k=None, debug_info=None, skill_coverage=None, skill_weight=0.0):
+    """Score already-packed resume vectors and build ranked match dicts for the winners
+
+    Row i of vectors/status belongs to resumes[i]; the resume dicts only need ids, names and metadata.
+    vectors may be a raw float32 matrix or an encoded block from vector_codec.
+    Candidates that provably cannot reach similarity_threshold are pruned before all sections are scored.
+    skill_coverage / skill_weight blend required-skill coverage into the score (see rank_section_scores).
+    """
+    prune_threshold = similarity_threshold
+    if skill_coverage is not None and skill_weight:
+        # A full coverage bonus is the most blending can add, so prune on the cosine that still needs
+        prune_threshold = (similarity_threshold - skill_weight) / (1 - skill_weight) if skill_weight < 1 else None
+    section_scores, similarity_scores, has_valid = score_packed_vectors(
+        job_embedding, vectors, status, prune_threshold, debug_info=debug_info
+    )
+    return rank_section_scores(section_scores, status, resumes, similarity_threshold, top_k, debug_info,
+                               similarity_scores, has_valid, skill_coverage, skill_weight)
+
+
+def rank_section_scores(section_scores, status, resumes, similarity_threshold=0.0, top_k=None,
+                        debug_info=None, similarity_scores=None, has_valid=None, skill_coverage=None,
+                        skill_weight=0.0):
+    """Rank resumes from an (N, 4) matrix of section cosines, however those were computed
+
+    With skill_coverage (required-skill coverage per row, 0-1) the score becomes
+    (1 - skill_weight) * cosine + skill_weight * coverage before the threshold and top_k apply.
+    """
+    if similarity_scores is None:
+        similarity_scores, has_valid = aggregate_section_scores(section_scores, status)
+    if skill_coverage is not None and skill_weight:
+        similarity_scores = (1 - skill_weight) * similarity_scores + skill_weight * skill_coverage
+
+    for i in np.flatnonzero(~has_valid):
+        logger.warning(f"No valid vectors found for resume: {resumes[i].get('resume_id')}")
+
+    above_threshold = np.flatnonzero(has_valid & (similarity_scores >= similarity_threshold))
+    if debug_info is not None:
+        debug_info['matches_after_threshold'] = int(len(above_threshold))
+
+    # Partial top-k selection instead of sorting every candidate
+    resume_ids = [resumes[i].get('resume_id') for i in above_threshold]
+    selected = above_threshold[select_top_k(similarity_scores[above_threshold], resume_ids, top_k)]
+
     similarities = []
+    for i in selected:
+        resume = resumes[i]
+        similarity = {
+            'resume_id': resume['resume_id'],
+            'doc_id': resume.get('doc_id'),
+            'candidate_name': resume['candidate_name'],
+            'nano_Id': resume.get('nano_Id'),
+            'similarity_score': float(similarity_scores[i]),
+            'vector_scores': build_vector_scores(section_scores[i], status[i]),
+            'metadata': resume['metadata']
+        }
+        if skill_coverage is not None:
+            similarity['skill_coverage'] = float(skill_coverage[i])
+        similarities.append(similarity)
+
+    logger.info(f"Found {len(above_threshold)} matching resumes above threshold {similarity_threshold}, returning {len(similarities)}")
+    return similarities
+
+
+def rank_job_descriptions(section_scores, status_row, job_descriptions, similarity_threshold=0.0, top_k=None,
+                          debug_info=None):
+    """Rank job descriptions for one resume from an (M, 4) matrix of JD x section cosines
+
+    status_row is the resume's (4,) vector status; results carry the same vector_scores breakdown
+    as resume matches, ties broken by ascending job_description_id.
+    """
+    status = np.broadcast_to(status_row, section_scores.shape)
+    similarity_scores, has_valid = aggregate_section_scores(section_scores, status)
+
+    above_threshold = np.flatnonzero(has_valid & (similarity_scores >= similarity_threshold))
+    if debug_info is not None:
+        debug_info['matches_after_threshold'] = int(len(above_threshold))
+
+    job_ids = [job_descriptions[i].get('job_description_id') for i in above_threshold]
+    selected = above_threshold[select_top_k(similarity_scores[above_threshold], job_ids, top_k)]
+
+    matches = []
+    for i in selected:
+        job = job_descriptions[i]
+        matches.append({
+            'job_description_id': job.get('job_description_id'),
+            'job_title': job.get('job_title'),
+            'similarity_score': float(similarity_scores[i]),
+            'vector_scores': build_vector_scores(section_scores[i], status_row),
+            'metadata': job.get('metadata', {})
+        })
+
+    logger.info(f"Found {len(above_threshold)} job descriptions above threshold {similarity_threshold}, returning {len(matches)}")
+    return matches
+
+
+def calculate_multi_vector_similarity(job_embedding, resume_embeddings, similarity_threshold=0.0,
+                                      top_k=None, debug_info=None):
+    """Calculate average cosine similarity across all 4 resume vectors
+
+    Only the top_k best matches (all of them when top_k is not set) are returned, ranked by score
+    with ties broken on resume_id. When a debug_info dict is passed, scoring counters are added to it.
+    """
+    start_time = time.time()
     
     if not job_embedding:
         logger.error("Job embedding is empty")
-        return similarities
+        return []
     
-    job_embedding_array = np.array(job_embedding)
-    logger.info(f"Job embedding dimension: {len(job_embedding_array)}")
+    logger.info(f"Job embedding dimension: {len(job_embedding)}")
     logger.info(f"Processing {len(resume_embeddings)} resumes for similarity")
     
-    for i, resume in enumerate(resume_embeddings):
-        try:
-            # Get all 4 vectors
-            vectors = [
-                resume.get('skills_vector', []),
-                resume.get('experience_vector', []),
-                resume.get('certification_vector', []),
-                resume.get('projects_vector', [])
-            ]
-            
-            vector_names = ['skills', 'experience', 'certifications', 'projects']
-            
-            # Calculate similarity for each vector
-            vector_similarities = []
-            vector_scores = {}
-            
-            for j, (vector, name) in enumerate(zip(vectors, vector_names)):
-                if vector and len(vector) > 0:  # Check if vector exists and is not empty
-                    try:
-                        vector_array = np.array(vector)
-                        
-                        # Ensure vectors have same dimension
-                        if len(vector_array) != len(job_embedding_array):
-                            logger.warning(f"Dimension mismatch for {name} vector: {len(vector_array)} vs {len(job_embedding_array)}")
-                            continue
-                        
-                        # Calculate cosine similarity
-                        dot_product = np.dot(job_embedding_array, vector_array)
-                        job_norm = np.linalg.norm(job_embedding_array)
-                        vector_norm = np.linalg.norm(vector_array)
-                        
-                        if job_norm == 0 or vector_norm == 0:
-                            similarity = 0.0
-                        else:
-                            similarity = dot_product / (job_norm * vector_norm)
-                        
-                        vector_similarities.append(float(similarity))
-                        vector_scores[name] = float(similarity)
-                        
-                    except Exception as e:
-                        logger.error(f"Error calculating {name} similarity for resume {resume.get('resume_id')}: {str(e)}")
-                        vector_scores[name] = 0.0
-                else:
-                    vector_scores[name] = 0.0
-            
-            # Calculate average similarity across all vectors
-            if vector_similarities:
-                avg_similarity = sum(vector_similarities) / len(vector_similarities)
-                
-                if avg_similarity >= similarity_threshold:
-                    similarities.append({
-                        'resume_id': resume['resume_id'],
-                        'candidate_name': resume['candidate_name'],
-                        'nano_Id': resume.get('nano_Id'),
-                        'similarity_score': avg_similarity,
-                        'vector_scores': vector_scores,
-                        'metadata': resume['metadata']
-                    })
-                    
-                    logger.info(f"Resume {i+1}/{len(resume_embeddings)}: {resume['candidate_name']} - Score: {avg_similarity:.4f}")
-            else:
-                logger.warning(f"No valid vectors found for resume: {resume.get('resume_id')}")
-                    
-        except Exception as e:
-            logger.error(f"Error calculating similarity for resume {resume.get('resume_id')}: {str(e)}")
-            continue
-    
-    # Sort by similarity score in descending order
-    similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
+    vectors, status = pack_resume_vectors(resume_embeddings, len(job_embedding))
+    similarities = rank_packed_resumes(
+        job_embedding, vectors, status, resume_embeddings, similarity_threshold, top_k, debug_info
+    )
     
     logger.info(f"calculate_multi_vector_similarity time taken: {time.time() - start_time:.4f} seconds")
-    logger.info(f"Found {len(similarities)} matching resumes above threshold {similarity_threshold}")
     return similarities
 
 
-def create_match_explanation_from_metadata(metadata, vector_scores):
-    """Create match explanation from resume metadata and vector scores"""
+def create_match_explanation_from_metadata(metadata, vector_scores, skill_overlap=None):
+    """Create match explanation from resume metadata, vector scores and required-skill overlap"""
     explanations = []
     
     # Add vector score insights
@@ -101,20 +314,23 @@ def create_match_explanation_from_metadata(metadata, vector_scores):
         best_match = max(vector_scores.items(), key=lambda x: x[1])
         explanations.append(f"Best match: {best_match[0]} ({best_match[1]:.2f})")
     
-    # Skills
-    skills = metadata.get('skills', [])
-    if skills:
+    # Required skills of the job description the candidate has
+    if skill_overlap and skill_overlap['required']:
+        matched_text = f" ({', '.join(skill_overlap['matched'][:3])})" if skill_overlap['matched'] else ""
+        explanations.append(f"Required skills: {len(skill_overlap['matched'])}/{skill_overlap['required']}{matched_text}")
+    
+    # Skills (stored resumes keep the list in skills_list; skills is the joined text)
+    skills = metadata.get('skills_list') or metadata.get('skills', [])
+    if skills and isinstance(skills, list):
         skills_text = ', '.join(skills[:3])  # Show top 3 skills
         if len(skills) > 3:
             skills_text += f" +{len(skills) - 3} more"
         explanations.append(f"Skills: {skills_text}")
     
-    # Experience
-    experience = metadata.get('work_experience', [])
-    if experience:
-        total_years = extract_years_of_experience(experience)
-        if total_years > 0:
-            explanations.append(f"Experience: {total_years} years")
+    # Experience (total_experience_months is derived at ingest; older records parse their entries)
+    total_years = resume_experience_years(metadata)
+    if total_years:
+        explanations.append(f"Experience: {total_years} years")
     
     # Location
     location = metadata.get('location')
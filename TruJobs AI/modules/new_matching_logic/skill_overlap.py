@@ -0,0 +1,91 @@
+import numpy as np
+
+from config import logger
+from resume_service import resume_skill_ids
+from skill_taxonomy import SKILL_BITSET_WORDS, extract_skill_ids, skill_bitset
+
+# Resume fields the bitsets are built from: stored skill_bits, else the ids resume_skill_ids derives
+SKILL_SOURCE_FIELDS = ['metadata.skill_bits', 'metadata.skill_ids', 'metadata.skills_list']
+
+
+def skill_bitset_matrix(bitsets):
+    """Decode stored bitsets (lists of SKILL_BITSET_WORDS longs, or None) into an (N, W) uint64 matrix"""
+    matrix = np.zeros((len(bitsets), SKILL_BITSET_WORDS), dtype=np.int64)
+    for row, bitset in enumerate(bitsets):
+        if bitset and len(bitset) == SKILL_BITSET_WORDS:
+            matrix[row] = bitset
+    return matrix.view(np.uint64)
+
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        """Set bits per row of a uint64 matrix"""
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    _BYTE_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """Set bits per row of a uint64 matrix (byte lookup table; NumPy < 2.0 has no bitwise_count)"""
+        words = np.ascontiguousarray(words)
+        return _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape[:-1] + (-1,)).sum(axis=-1, dtype=np.int64)
+
+
+def job_required_skills(job_data):
+    """(skill ids, (W,) uint64 bitset) of the skills a job description's job_requirements name
+
+    JDs indexed with requirement_skill_ids / requirement_skill_bits use them; older ones are parsed here.
+    """
+    metadata = (job_data or {}).get('metadata') or {}
+    skill_ids = metadata.get('requirement_skill_ids')
+    if skill_ids is None:
+        skill_ids = extract_skill_ids(metadata.get('job_requirements'))
+    bits = metadata.get('requirement_skill_bits') or skill_bitset(skill_ids)
+    return skill_ids, skill_bitset_matrix([bits])[0]
+
+
+def resume_skill_bits(resumes, columns=None):
+    """(N, W) uint64 skill bitsets of resume records, cached in columns like the filter columns"""
+    columns = {} if columns is None else columns
+    bits = columns.get('skill_bits')
+    if bits is None:
+        metadata = [resume.get('metadata') or {} for resume in resumes]
+        bits = columns['skill_bits'] = skill_bitset_matrix([
+            m['skill_bits'] if m.get('skill_bits') is not None else skill_bitset(resume_skill_ids(m)) for m in metadata
+        ])
+    return bits
+
+
+def skill_coverage(resume_bits, required_bits):
+    """Share of the required skills each row covers: AND with the JD bitset, then popcount"""
+    required_count = int(popcount(required_bits))
+    if not required_count:
+        return np.zeros(len(resume_bits), dtype=np.float64)
+    return popcount(resume_bits & required_bits) / required_count
+
+
+def score_skill_coverage(batch, required_bits, min_skill_coverage=None):
+    """Required-skill coverage of every row of a ResumeBatch; returns (batch, coverage, info)
+
+    With min_skill_coverage, rows below it are dropped before any vector is scored.
+    """
+    coverage = skill_coverage(resume_skill_bits(batch.resumes, batch.columns), required_bits)
+    info = {'required_skills': int(popcount(required_bits))}
+    if min_skill_coverage:
+        keep = np.flatnonzero(coverage >= min_skill_coverage)
+        if len(keep) != len(batch):
+            batch, coverage = batch.select(keep), coverage[keep]
+        info['resumes_after_skill_coverage'] = len(batch)
+    logger.info(f"Skill coverage for {len(coverage)} resumes against {info['required_skills']} required skills")
+    return batch, coverage, info
+
+
+def skill_overlap_info(metadata, required_skill_ids):
+    """Matched and missing required skills of one candidate, for the match explanation"""
+    resume_ids = set(resume_skill_ids(metadata or {}))
+    matched = [skill_id for skill_id in required_skill_ids if skill_id in resume_ids]
+    return {
+        'required': len(required_skill_ids),
+        'matched': matched,
+        'missing': [skill_id for skill_id in required_skill_ids if skill_id not in resume_ids],
+        'coverage': round(len(matched) / len(required_skill_ids), 4)
+    }
@@ -0,0 +1,143 @@
+import heapq
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import RETRIEVAL_PAGE_SIZE, RETRIEVAL_SLICES, RETRIEVAL_PIT_KEEP_ALIVE, logger
+
+# Order shared by every stream: resume_id, then newest upload first (the copy keep-first dedupe keeps for
+# a re-uploaded resume). unmapped_type keeps the sort valid on indexes that map resume_id as keyword
+# itself and have no .keyword subfield.
+RETRIEVAL_SORT = [{"resume_id.keyword": {"order": "asc", "unmapped_type": "keyword"}}, {"upload_date": "desc"}]
+
+# search_after needs a unique last key so equal keys at a page boundary are never skipped. Point-in-time
+# searches get OpenSearch's implicit _shard_doc tiebreaker for free; the single stream used without one
+# sorts on document_key, the unique keyword the resume Lambda stamps on every document, instead of _id.
+FALLBACK_TIEBREAKER_SORT = {"document_key": {"order": "asc", "unmapped_type": "keyword"}}
+
+
+def _is_descending(spec):
+    order = next(iter(spec.values()))
+    return (order if isinstance(order, str) else order.get('order', 'asc')) == 'desc'
+
+
+# Both tiebreakers (_shard_doc and document_key) sort ascending
+_DESCENDING_SORT_KEYS = tuple(map(_is_descending, RETRIEVAL_SORT)) + (False,)
+
+
+class _Descending:
+    """Sort value compared in reverse, for the descending keys of RETRIEVAL_SORT"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def hit_sort_key(hit):
+    """Python key ordering hits like RETRIEVAL_SORT, with missing values last as OpenSearch orders them"""
+    return tuple(
+        (value is None, '' if value is None else _Descending(value) if descending else value)
+        for value, descending in zip(hit.get('sort') or (), _DESCENDING_SORT_KEYS)
+    )
+
+
+def _open_pit(client, index):
+    """Open a point-in-time on the index, or return None when the cluster does not support it"""
+    try:
+        return client.create_pit(index=index, keep_alive=RETRIEVAL_PIT_KEEP_ALIVE).get('pit_id')
+    except Exception as e:
+        logger.warning(f"Point-in-time unavailable, reading a single search_after stream: {str(e)}")
+        return None
+
+
+def _close_pit(client, pit_id):
+    try:
+        client.delete_pit(body={"pit_id": [pit_id]})
+    except Exception as e:
+        logger.warning(f"Failed to delete point-in-time: {str(e)}")
+
+
+def _read_stream(client, index, query, pit_id, slice_id, slices, on_page=None):
+    """Page through one slice with search_after and return its hits in RETRIEVAL_SORT order
+
+    With on_page, each page is handed to it as soon as it arrives and nothing is kept.
+    """
+    body = {**query, "size": RETRIEVAL_PAGE_SIZE, "sort": RETRIEVAL_SORT if pit_id else RETRIEVAL_SORT + [FALLBACK_TIEBREAKER_SORT]}
+    if pit_id:
+        body["pit"] = {"id": pit_id, "keep_alive": RETRIEVAL_PIT_KEEP_ALIVE}
+    if slices > 1:
+        body["slice"] = {"id": slice_id, "max": slices}
+
+    hits = []
+    while True:
+        # PIT searches name no index: the snapshot already pins it
+        response = client.search(body=body) if pit_id else client.search(index=index, body=body)
+        page = response.get('hits', {}).get('hits', [])
+        if on_page:
+            on_page(page)
+        else:
+            hits.extend(page)
+        if len(page) < RETRIEVAL_PAGE_SIZE:
+            return hits
+        body["search_after"] = page[-1]['sort']
+        if pit_id and response.get('pit_id'):
+            body["pit"]["id"] = response['pit_id']
+
+
+def _read_streams(client, index, query, total_hits=None, on_page=None):
+    """Run the sliced streams of a query; returns (per-stream hit lists, slice count)"""
+    query = {key: value for key, value in query.items() if key not in ('size', 'sort', 'search_after')}
+    if total_hits is None:
+        slices = RETRIEVAL_SLICES
+    else:
+        slices = max(1, min(RETRIEVAL_SLICES, math.ceil(total_hits / RETRIEVAL_PAGE_SIZE)))
+
+    pit_id = _open_pit(client, index) if slices > 1 else None
+    if pit_id is None:
+        slices = 1
+
+    try:
+        if slices == 1:
+            streams = [_read_stream(client, index, query, pit_id, 0, 1, on_page)]
+        else:
+            with ThreadPoolExecutor(max_workers=slices) as executor:
+                streams = list(executor.map(
+                    lambda slice_id: _read_stream(client, index, query, pit_id, slice_id, slices, on_page),
+                    range(slices)
+                ))
+    finally:
+        if pit_id:
+            _close_pit(client, pit_id)
+    return streams, slices
+
+
+def fetch_all_hits(client, index, query, total_hits=None):
+    """Read every hit of a query with concurrent sliced search_after streams over a point-in-time
+
+    The slice count grows with the pool (one slice per page, at most RETRIEVAL_SLICES), so wall time
+    scales with pages per slice rather than total pages. Streams are merged in RETRIEVAL_SORT order.
+    Without point-in-time support a single search_after stream is read instead.
+    """
+    start_time = time.time()
+    streams, slices = _read_streams(client, index, query, total_hits)
+    hits = list(heapq.merge(*streams, key=hit_sort_key))
+    logger.info(f"fetch_all_hits read {len(hits)} hits in {slices} slice(s), "
+                f"time taken: {time.time() - start_time:.4f} seconds")
+    return hits
+
+
+def for_each_page(client, index, query, on_page, total_hits=None):
+    """Read a query like fetch_all_hits, but hand every page to on_page as it arrives instead of keeping it
+
+    Pages come from several threads in no particular order; on_page must be thread-safe.
+    """
+    start_time = time.time()
+    _, slices = _read_streams(client, index, query, total_hits, on_page)
+    logger.info(f"for_each_page read {slices} slice(s), time taken: {time.time() - start_time:.4f} seconds")
@@ -0,0 +1,145 @@
+import numpy as np
+from config import VECTOR_CODEC, logger
+
+# Supported in-memory encodings for packed resume vectors, with bytes per stored value
+CODEC_BYTES = {
+    'float32': 4,
+    'float16': 2,
+    'int8': 1
+}
+
+# Rows dequantized per BLAS call; bounds the float32 scratch buffer to ~16 MB at 1024 dims
+DECODE_CHUNK_ROWS = 4096
+
+INT8_MAX = 127
+
+
+def resolve_codec(codec=None):
+    """Return a supported codec name, falling back to float32 for unknown settings"""
+    name = str(codec or VECTOR_CODEC).lower()
+    if name not in CODEC_BYTES:
+        logger.warning(f"Unknown vector codec '{name}', using float32")
+        return 'float32'
+    return name
+
+
+def row_norms(matrix):
+    """L2 norm of every row, without the (N, D) temporary np.linalg.norm allocates"""
+    return np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+
+
+def empty_encoded_vectors(count, sections, dimension, codec=None):
+    """Allocate a zeroed encoded block for count rows"""
+    codec = resolve_codec(codec)
+    return {
+        'codec': codec,
+        'data': np.zeros((count, sections, dimension), dtype=np.dtype(codec)),
+        'scales': np.ones((count, sections), dtype=np.float32) if codec == 'int8' else None,
+        'norms': np.zeros((count, sections), dtype=np.float32)
+    }
+
+
+def encode_vectors(vectors, codec=None):
+    """Encode an (N, 4, D) float32 matrix into a block of {codec, data, scales, norms}
+
+    Norms are always taken from the float32 input so cosine denominators stay exact; only the
+    dot products see the codec's rounding. int8 uses one symmetric scale per section vector.
+    A float32 block shares memory with the input.
+    """
+    codec = resolve_codec(codec)
+    count, sections, dimension = vectors.shape
+    flat = vectors.reshape(count * sections, dimension)
+    norms = row_norms(flat).astype(np.float32).reshape(count, sections)
+
+    scales = None
+    if codec == 'float32':
+        data = vectors
+    elif codec == 'float16':
+        data = vectors.astype(np.float16)
+    else:
+        scales = (np.abs(flat).max(axis=1) / INT8_MAX).astype(np.float32)
+        scales[scales == 0] = 1.0
+        data = np.empty((count * sections, dimension), dtype=np.int8)
+        for start in range(0, count * sections, DECODE_CHUNK_ROWS):
+            end = start + DECODE_CHUNK_ROWS
+            chunk = np.rint(flat[start:end] / scales[start:end, None])
+            data[start:end] = np.clip(chunk, -INT8_MAX, INT8_MAX)
+        data = data.reshape(count, sections, dimension)
+        scales = scales.reshape(count, sections)
+
+    return {'codec': codec, 'data': data, 'scales': scales, 'norms': norms}
+
+
+def as_encoded_vectors(vectors):
+    """Accept either an encoded block or a raw float32 matrix (wrapped without copying)"""
+    if isinstance(vectors, dict):
+        return vectors
+    return encode_vectors(np.asarray(vectors, dtype=np.float32), 'float32')
+
+
+def decode_vectors(encoded):
+    """Return the float32 approximation of an encoded block"""
+    vectors = encoded['data'].astype(np.float32)
+    if encoded['scales'] is not None:
+        vectors *= encoded['scales'][..., None]
+    return vectors
+
+
+def write_encoded_rows(encoded, rows, vectors):
+    """Encode float32 vectors and store them at the given rows of an existing block"""
+    block = encode_vectors(vectors, encoded['codec'])
+    encoded['data'][rows] = block['data']
+    encoded['norms'][rows] = block['norms']
+    if encoded['scales'] is not None:
+        encoded['scales'][rows] = block['scales']
+
+
+def select_rows(encoded, rows):
+    """Return a new block holding only the given rows (a view when rows is a slice)"""
+    return {
+        'codec': encoded['codec'],
+        'data': encoded['data'][rows],
+        'scales': encoded['scales'][rows] if encoded['scales'] is not None else None,
+        'norms': encoded['norms'][rows]
+    }
+
+
+def encoded_nbytes(encoded):
+    """Memory held by a block's arrays"""
+    total = encoded['data'].nbytes + encoded['norms'].nbytes
+    if encoded['scales'] is not None:
+        total += encoded['scales'].nbytes
+    return total
+
+
+def encoded_dots(encoded, job_vector, rows=None, section=None):
+    """Dot products of the job vector with stored vectors, computed on the encoded data
+
+    With section set, returns one value per row for that section; otherwise an (N, 4) matrix.
+    A (D, J) matrix of job vectors adds a trailing J axis. rows restricts the computation to a
+    subset of rows. float16/int8 data is widened to float32 in DECODE_CHUNK_ROWS pieces so the
+    full matrix is never decoded at once.
+    """
+    data = encoded['data']
+    scales = encoded['scales']
+    if section is not None:
+        data = data[:, section]
+        scales = scales[:, section] if scales is not None else None
+    if rows is not None:
+        data = data[rows]
+        scales = scales[rows] if scales is not None else None
+
+    shape = data.shape[:-1]
+    jobs = job_vector.shape[1:]
+    flat = data.reshape(-1, data.shape[-1])
+    if flat.dtype == np.float32:
+        dots = flat @ job_vector
+    else:
+        dots = np.empty((len(flat),) + jobs, dtype=np.float32)
+        for start in range(0, len(flat), DECODE_CHUNK_ROWS):
+            dots[start:start + DECODE_CHUNK_ROWS] = flat[start:start + DECODE_CHUNK_ROWS].astype(np.float32) @ job_vector
+
+    dots = dots.reshape(shape + jobs)
+    if scales is not None:
+        dots = dots * scales.reshape(scales.shape + (1,) * len(jobs))
+    return dots
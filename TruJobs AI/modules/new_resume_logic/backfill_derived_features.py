@@ -0,0 +1,141 @@
+'''
+Summary
+Backfills the derived metadata fields (location_key, skill_ids, skill_bits, total_experience_months) and the
+document_key onto resume documents indexed before they were computed at ingest.
+Run from this directory with the same environment variables as the Lambda, after copying the shared modules in
+with `python ../package_lambdas.py --copy` (a checkout has them only in modules/shared):
+    python backfill_derived_features.py [--batch-size 200] [--dry-run] [--all]
+Only resumes missing one of the fields are touched, so the command can be re-run safely; resumes without
+recoverable job dates keep total_experience_months unset and are revisited on each run.
+--all re-derives the fields on every resume, e.g. after the skill taxonomy or its splitting rules change.
+'''
+#1. Imports and Logger Setup
+import argparse
+import logging
+import re
+import time
+import uuid
+from opensearchpy import helpers
+from config import OPENSEARCH_INDEX
+from opensearch_client import get_opensearch_client, derive_metadata_features, DERIVED_METADATA_MAPPING
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger()
+
+# Stored metadata the derived fields are rebuilt from
+SOURCE_FIELDS = ['resume_id', 'document_key', 'metadata.location', 'metadata.skills_list', 'metadata.work_experience_text']
+
+# Same sort fields as the matching Lambda; _id breaks ties between copies of a re-uploaded resume
+RESUME_SORT = [{"resume_id.keyword": {"order": "asc", "unmapped_type": "keyword"}}, {"_id": "asc"}]
+
+DURATION_PATTERN = re.compile(r'Duration: (.*?)(?:\. Description: |$)')
+
+#2. Work Experience Recovery
+'''
+Purpose: Rebuild the start/end dates of each job from the stored work_experience_text.
+How it works:
+normalize_metadata_for_opensearch joins jobs with ' | ' and writes their dates as 'Duration: start - end'.
+A duration with a single date is read as a start date, so the job counts until today.'''
+
+def work_experience_from_text(work_experience_text):
+    """Work experience entries ({'start_date', 'end_date'}) recovered from flattened work_experience_text"""
+    entries = []
+    for job_text in (work_experience_text or '').split(' | '):
+        match = DURATION_PATTERN.search(job_text)
+        if not match:
+            continue
+        start_date, _, end_date = match.group(1).partition(' - ')
+        entries.append({'start_date': start_date.strip(), 'end_date': end_date.strip()})
+    return entries
+
+#3. Resumes Missing Derived Fields
+'''
+Purpose: Stream resumes that lack at least one derived field or the document_key (every resume with all_resumes).
+How it works:
+Sorts by resume_id and pages with search_after, so the walk is stable while documents are updated.
+Only the IDs and the metadata the fields are derived from are fetched.'''
+
+def iter_resumes_missing_features(opensearch, batch_size=200, all_resumes=False):
+    """Yield hits for resumes missing any of the DERIVED_METADATA_MAPPING fields or document_key, or for all resumes"""
+    missing_any = {
+        "bool": {
+            "should": [
+                {"bool": {"must_not": [{"exists": {"field": f"metadata.{field}"}}]}}
+                for field in DERIVED_METADATA_MAPPING if field != 'skill_bits'
+            ] + [{"bool": {"must_not": [{"exists": {"field": "document_key"}}]}}],
+            "minimum_should_match": 1
+        }
+    }
+    query = {
+        "size": batch_size,
+        "query": {"match_all": {}} if all_resumes else missing_any,
+        "sort": RESUME_SORT,
+        "_source": SOURCE_FIELDS
+    }
+
+    while True:
+        response = opensearch.search(index=OPENSEARCH_INDEX, body=query)
+        hits = response.get('hits', {}).get('hits', [])
+        if not hits:
+            return
+        yield from hits
+        if len(hits) < batch_size:
+            return
+        query["search_after"] = hits[-1]['sort']
+
+#4. Backfill
+'''
+Purpose: Derive the fields for every resume found and write them back in bulk.
+How it works:
+Uses derive_metadata_features, the same function ingest calls, on the stored location, skills_list and recovered work experience.
+Bulk partial updates merge into the metadata object and are sent once batch_size actions are queued.
+A dry run counts would_update instead of updated.
+Resumes without a document_key get a random one, like ingest stamps; an existing key is never changed.
+skill_bits is not indexed, so it cannot be searched for; it is rewritten together with skill_ids.'''
+
+def backfill_derived_features(opensearch, batch_size=200, dry_run=False, all_resumes=False):
+    """Store the derived metadata fields on resumes missing them (or on all resumes); returns counters"""
+    updated_key = 'would_update' if dry_run else 'updated'
+    counts = {'scanned': 0, updated_key: 0, 'no_experience_dates': 0, 'failed': 0}
+    actions = []
+
+    def flush():
+        if actions and not dry_run:
+            success, errors = helpers.bulk(opensearch, actions, raise_on_error=False)
+            counts['failed'] += len(errors)
+            counts['updated'] -= len(errors)
+        actions.clear()
+
+    for hit in iter_resumes_missing_features(opensearch, batch_size, all_resumes):
+        counts['scanned'] += 1
+        metadata = hit['_source'].get('metadata') or {}
+        features = derive_metadata_features(
+            metadata.get('location'),
+            metadata.get('skills_list') or [],
+            work_experience_from_text(metadata.get('work_experience_text'))
+        )
+        if metadata.get('work_experience_text') and features['total_experience_months'] is None:
+            counts['no_experience_dates'] += 1
+
+        doc = {'metadata': features}
+        if not hit['_source'].get('document_key'):
+            doc['document_key'] = uuid.uuid4().hex
+        actions.append({'_op_type': 'update', '_index': OPENSEARCH_INDEX, '_id': hit['_id'], 'doc': doc})
+        counts[updated_key] += 1
+        if len(actions) >= batch_size:
+            flush()
+
+    flush()
+    return counts
+
+#5. Command Line Entry Point
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill derived metadata fields on resume documents')
+    parser.add_argument('--batch-size', type=int, default=200, help='Resumes fetched and updated per request')
+    parser.add_argument('--dry-run', action='store_true', help='Derive the fields without writing them')
+    parser.add_argument('--all', action='store_true', help='Re-derive the fields on every resume, not only those missing one')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    counts = backfill_derived_features(get_opensearch_client(), args.batch_size, args.dry_run, args.all)
+    logger.info(f"✅ Backfill {'dry run ' if args.dry_run else ''}finished in {time.time() - start_time:.2f}s: {counts}")
@@ -0,0 +1,130 @@
+'''
+Summary
+Backfills materialized match scores onto resume documents indexed before scores were stored at ingest.
+Run from this directory with the same environment variables as the Lambda, after copying the shared modules in
+with `python ../package_lambdas.py --copy` (a checkout has them only in modules/shared):
+    python backfill_match_scores.py [--job-description-id JD_ID] [--batch-size 200] [--dry-run]
+Only resumes without a similarity_score are touched, so the command can be re-run safely.
+'''
+#1. Imports and Logger Setup
+import argparse
+import logging
+import time
+from datetime import datetime
+from opensearchpy import helpers
+from config import OPENSEARCH_INDEX
+from match_scores import SECTION_VECTOR_NAMES, get_job_description_embedding, compute_match_scores
+from opensearch_client import get_opensearch_client
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger()
+
+# The matching Lambda sorts resumes on resume_id.keyword; unmapped_type keeps the sort
+# valid on an index where the subfield does not exist. _id breaks ties between copies of a re-uploaded
+# resume, so search_after never skips one at a page boundary.
+RESUME_SORT = [{"resume_id.keyword": {"order": "asc", "unmapped_type": "keyword"}}, {"_id": "asc"}]
+
+#2. Unscored Resume Pages
+'''
+Purpose: Stream resumes that have a job description but no stored score.
+How it works:
+Sorts by resume_id and pages with search_after, so the walk is stable while documents are updated.
+Only the IDs and section vectors are fetched.'''
+
+def iter_unscored_resumes(opensearch, job_description_id=None, batch_size=200):
+    """Yield hits for resumes that are missing similarity_score"""
+    filters = [{"exists": {"field": "job_description_id"}}]
+    if job_description_id:
+        # Same fields as get_job_description_embedding: job_description_id is plain keyword on indexes this
+        # Lambda creates and has a .keyword subfield on dynamically mapped ones
+        filters.append({
+            "bool": {
+                "should": [
+                    {"term": {"job_description_id": job_description_id}},
+                    {"term": {"job_description_id.keyword": job_description_id}},
+                    {"term": {"metadata.job_description_id.keyword": job_description_id}}
+                ],
+                "minimum_should_match": 1
+            }
+        })
+
+    query = {
+        "size": batch_size,
+        "query": {
+            "bool": {
+                "filter": filters,
+                "must_not": [{"exists": {"field": "similarity_score"}}]
+            }
+        },
+        "sort": RESUME_SORT,
+        "_source": ["resume_id", "job_description_id"] + [field for field, _ in SECTION_VECTOR_NAMES]
+    }
+
+    while True:
+        response = opensearch.search(index=OPENSEARCH_INDEX, body=query)
+        hits = response.get('hits', {}).get('hits', [])
+        if not hits:
+            return
+        yield from hits
+        if len(hits) < batch_size:
+            return
+        query["search_after"] = hits[-1]['sort']
+
+#3. Backfill
+'''
+Purpose: Score every unscored resume and write the scores back in bulk.
+How it works:
+Caches job description embeddings, since many resumes share one JD.
+Resumes whose JD or vectors are missing are counted and skipped.
+Bulk partial updates are sent once batch_size actions are queued.'''
+
+def backfill_match_scores(opensearch, job_description_id=None, batch_size=200, dry_run=False):
+    """Store similarity_score / vector_scores on unscored resumes; returns counters"""
+    job_embeddings = {}
+    counts = {'scanned': 0, 'scored': 0, 'missing_job_description': 0, 'no_vectors': 0, 'failed': 0}
+    actions = []
+
+    def flush():
+        if actions and not dry_run:
+            success, errors = helpers.bulk(opensearch, actions, raise_on_error=False)
+            counts['failed'] += len(errors)
+            counts['scored'] -= len(errors)
+        actions.clear()
+
+    for hit in iter_unscored_resumes(opensearch, job_description_id, batch_size):
+        counts['scanned'] += 1
+        source = hit['_source']
+        jd_id = source.get('job_description_id')
+
+        if jd_id not in job_embeddings:
+            job_embeddings[jd_id] = get_job_description_embedding(opensearch, jd_id)
+        job_embedding = job_embeddings[jd_id]
+        if not job_embedding:
+            counts['missing_job_description'] += 1
+            continue
+
+        scores = compute_match_scores(job_embedding, source)
+        if not scores:
+            counts['no_vectors'] += 1
+            continue
+
+        scores['match_scored_at'] = datetime.utcnow().isoformat()
+        actions.append({'_op_type': 'update', '_index': OPENSEARCH_INDEX, '_id': hit['_id'], 'doc': scores})
+        counts['scored'] += 1
+        if len(actions) >= batch_size:
+            flush()
+
+    flush()
+    return counts
+
+#4. Command Line Entry Point
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill materialized match scores on resume documents')
+    parser.add_argument('--job-description-id', help='Only backfill resumes uploaded for this job description')
+    parser.add_argument('--batch-size', type=int, default=200, help='Resumes fetched and updated per request')
+    parser.add_argument('--dry-run', action='store_true', help='Compute scores without writing them')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    counts = backfill_match_scores(get_opensearch_client(), args.job_description_id, args.batch_size, args.dry_run)
+    logger.info(f"✅ Backfill {'dry run ' if args.dry_run else ''}finished in {time.time() - start_time:.2f}s: {counts}")
@@ -64,6 +64,10 @@ LLM_MODEL_ID = get_env_var('LLM_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1
 #6. OpenSearch Configuration
 OPENSEARCH_ENDPOINT = get_env_var('OPENSEARCH_ENDPOINT', 'https://1jivpq1n907fmvddqgy9.ap-south-1.aoss.amazonaws.com', required=True)
 OPENSEARCH_INDEX = get_env_var('OPENSEARCH_INDEX', 'resumes')
+JOB_DESCRIPTION_INDEX = get_env_var('JOB_DESCRIPTION_INDEX', 'job_descriptions')
+
+# Store the resume's match score against its job description at ingest time
+MATERIALIZE_MATCH_SCORES = get_env_var('MATERIALIZE_MATCH_SCORES', 'true', var_type=bool)
 
 #7. Processing Limits with validation
 MAX_TEXT_LENGTH = get_env_var('MAX_TEXT_LENGTH', 8000, var_type=int)
@@ -28,6 +28,7 @@ import io
 from io import BytesIO
 from pdf_processor import extract_text_from_pdf, save_pdf_to_s3, save_text_to_s3
 from ai_services import get_metadata_from_bedrock, create_section_embeddings
+from match_scores import get_materialized_match_scores
 from opensearch_client import get_opensearch_client, index_resume_document, normalize_metadata_for_opensearch
 from input_parser import determine_input_type, parse_multipart_form, parse_json_input, parse_s3_event, get_s3_pdf_content
 import re
@@ -366,6 +367,9 @@ def lambda_handler(event, context):
         embedding_time = time.time() - embedding_start
         logger.info(f"Generated section-specific embeddings in {embedding_time:.2f}s")
 
+        # Score the resume against its job description once, so matching can sort instead of recompute
+        match_scores = get_materialized_match_scores(opensearch, job_description_id, embeddings) # match_scores module
+
 #13. Check timeout before indexing (slowest operation)
         pre_index_elapsed = time.time() - start_time
         if pre_index_elapsed > 25:
@@ -387,7 +391,7 @@ def lambda_handler(event, context):
         logger.info(f"⏱️ Starting OpenSearch indexing at {pre_index_elapsed:.2f}s elapsed")
         response = index_resume_document(
             opensearch, resume_id, job_description_id, filename, 
-            candidate_name, s3_key, normalized_metadata, embeddings, nano_id
+            candidate_name, s3_key, normalized_metadata, embeddings, nano_id, match_scores
         )
         index_time = time.time() - index_start
         total_time = time.time() - start_time
@@ -409,7 +413,9 @@ def lambda_handler(event, context):
                 'filename': filename,
                 'job_description_id': job_description_id,
                 'candidate_name': candidate_name,
-                's3_key': s3_key
+                's3_key': s3_key,
+                'similarity_score': match_scores.get('similarity_score'),
+                'freshness_token': response.get('freshness_token')
                 # 'opensearch_id': response.get('_id')
             })
         }
@@ -0,0 +1,124 @@
+'''
+Summary
+Materializes the resume-to-job match score at ingest time.
+A resume's section vectors and its job description's embedding never change after upload, so the
+multi-vector similarity the matching Lambda computes can be stored on the resume document once.
+The matching Lambda can then answer with a sorted query instead of pulling and scoring vectors.
+'''
+#1. Imports and Logger Setup
+'''
+Imports:
+math for square roots, datetime for the scoring timestamp.
+Project config: job description index name and the feature switch.
+'''
+import math
+import logging
+from datetime import datetime
+from config import JOB_DESCRIPTION_INDEX, MATERIALIZE_MATCH_SCORES
+
+logger = logging.getLogger()
+
+# Resume vector fields and the names the matching Lambda uses for them in vector_scores
+SECTION_VECTOR_NAMES = [
+    ('skills_vector', 'skills'),
+    ('experience_vector', 'experience'),
+    ('certification_vector', 'certifications'),
+    ('projects_vector', 'projects')
+]
+
+#2. Job Description Embedding Lookup
+'''
+Purpose: Fetch the embedding of the job description a resume was uploaded for.
+How it works:
+Searches the job descriptions index by job_description_id (documents use generated _ids).
+Falls back to metadata.embedding for older documents.
+Returns None when the job description or its embedding is missing.'''
+
+def get_job_description_embedding(opensearch, job_description_id):
+    """Return the embedding of a job description, or None if it cannot be found"""
+    query = {
+        "size": 1,
+        "query": {
+            "bool": {
+                "should": [
+                    {"term": {"job_description_id": job_description_id}},
+                    {"term": {"job_description_id.keyword": job_description_id}},
+                    {"term": {"metadata.job_description_id.keyword": job_description_id}}
+                ],
+                "minimum_should_match": 1
+            }
+        },
+        "_source": ["embedding", "metadata.embedding"]
+    }
+    response = opensearch.search(index=JOB_DESCRIPTION_INDEX, body=query)
+    hits = response.get('hits', {}).get('hits', [])
+    if not hits:
+        return None
+    source = hits[0]['_source']
+    return source.get('embedding') or source.get('metadata', {}).get('embedding')
+
+#3. Score Computation
+'''
+Purpose: Compute the same scores the matching Lambda would.
+How it works:
+Each section vector gets the cosine with the job embedding (0.0 when either norm is zero).
+Empty sections are reported as 0.0 but left out of the average.
+Sections with a different dimension are skipped entirely.
+similarity_score is the average over the scored sections.'''
+
+def compute_match_scores(job_embedding, embeddings):
+    """Return {'similarity_score', 'vector_scores'} for one resume against one job embedding"""
+    job_norm = math.sqrt(sum(value * value for value in job_embedding))
+    vector_scores = {}
+    scored = []
+
+    for field, name in SECTION_VECTOR_NAMES:
+        vector = embeddings.get(field)
+        if not vector:
+            vector_scores[name] = 0.0
+            continue
+        if len(vector) != len(job_embedding):
+            logger.warning(f"Dimension mismatch for {name} vector: {len(vector)} vs {len(job_embedding)}")
+            continue
+
+        dot_product = sum(a * b for a, b in zip(job_embedding, vector))
+        vector_norm = math.sqrt(sum(value * value for value in vector))
+        similarity = 0.0 if job_norm == 0 or vector_norm == 0 else dot_product / (job_norm * vector_norm)
+        vector_scores[name] = similarity
+        scored.append(similarity)
+
+    if not scored:
+        return {}
+
+    return {
+        'similarity_score': sum(scored) / len(scored),
+        'vector_scores': vector_scores
+    }
+
+#4. Ingest-Time Materialization
+'''
+Purpose: Produce the score fields to store on a new resume document.
+How it works:
+Looks up the JD embedding and scores the section embeddings against it.
+Never fails the upload: any problem is logged and no score fields are stored,
+so the matching Lambda scores that resume itself until it is backfilled.'''
+
+def get_materialized_match_scores(opensearch, job_description_id, embeddings):
+    """Return the similarity_score / vector_scores / match_scored_at fields for a resume, or {}"""
+    if not MATERIALIZE_MATCH_SCORES or not job_description_id:
+        return {}
+    try:
+        job_embedding = get_job_description_embedding(opensearch, job_description_id)
+        if not job_embedding:
+            logger.warning(f"⚠️ No embedding for job description {job_description_id}; match score not materialized")
+            return {}
+
+        scores = compute_match_scores(job_embedding, embeddings)
+        if scores:
+            scores['match_scored_at'] = datetime.utcnow().isoformat()
+            logger.info(f"✅ Materialized match score {scores['similarity_score']:.4f} for job description {job_description_id}")
+        return scores
+
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to materialize match score: {str(e)}")
+        return {}
@@ -7,23 +7,51 @@ It includes robust error handling and logging for production reliability.
 #1. Imports and Logger Setup
 '''
 Imports:
-Standard libraries: json, logging, datetime
+Standard libraries: json, logging, uuid, datetime
 AWS SDK: boto3
 OpenSearch libraries: OpenSearch, RequestsHttpConnection, AWSV4SignerAuth
 Project config: AWS region, OpenSearch endpoint, and index name
+Shared skill taxonomy (skill_taxonomy.py, copied in from modules/shared) for canonical skill ids
 Logger:
 Sets up a logger for this module.
 '''
 
 import json
+import re
 import boto3
 import logging
+import uuid
 from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth
 from datetime import datetime
 from config import AWS_REGION, OPENSEARCH_ENDPOINT, OPENSEARCH_INDEX
+from skill_taxonomy import canonical_skill_ids, skill_bitset
 
 logger = logging.getLogger()
 
+# Match score against the resume's job description, materialized at ingest (see match_scores.py)
+MATCH_SCORE_MAPPING = {
+    'similarity_score': {'type': 'float'},
+    'vector_scores': {
+        'type': 'object',
+        'properties': {
+            'skills': {'type': 'float'},
+            'experience': {'type': 'float'},
+            'certifications': {'type': 'float'},
+            'projects': {'type': 'float'}
+        }
+    },
+    'match_scored_at': {'type': 'date'}
+}
+
+# Metadata derived at ingest for facet counts and filters (see derive_location_key / derive_experience_months,
+# and skill_taxonomy for skill_ids / skill_bits). skill_bits is only read back from _source, so it is not indexed.
+DERIVED_METADATA_MAPPING = {
+    'location_key': {'type': 'keyword'},
+    'skill_ids': {'type': 'keyword'},
+    'skill_bits': {'type': 'long', 'index': False},
+    'total_experience_months': {'type': 'integer'}
+}
+
 # 2. OpenSearch Client Initialization
 '''
 Purpose: Initializes and returns an authenticated OpenSearch client, and ensures the index exists with the correct mapping.
@@ -35,7 +63,7 @@ Logs that it exists.
 Attempts to update the mapping for compatibility (adds/updates fields in the metadata object).
 If the index does not exist:
 Creates the index with a schema that includes:
-Resume/job IDs, file info, candidate name, S3 key, upload date
+Resume/job IDs, document_key, file info, candidate name, S3 key, upload date
 Four knn_vector fields (skills, experience, certification, projects)
 A rich metadata object with all extracted fields
 Index settings for KNN search
@@ -72,12 +100,15 @@ def get_opensearch_client():
                 mapping_update = {
                     "properties": {
                         "nano_Id": {"type": "keyword"},
+                        "document_key": {"type": "keyword"},
+                        **MATCH_SCORE_MAPPING,
                         "metadata": {
                             "type": "object",
                             "properties": {
                                 "projects_text": {"type": "text"},
                                 "work_experience_text": {"type": "text"},
-                                "education_text": {"type": "text"}
+                                "education_text": {"type": "text"},
+                                **DERIVED_METADATA_MAPPING
                             }
                         }
                     }
@@ -98,6 +129,9 @@ def get_opensearch_client():
                         'candidate_name': {'type': 'text'},
                         's3_key': {'type': 'keyword'},
                         'nano_Id': {'type': 'keyword'},
+                        # Unique per document; the matching Lambda's search_after tiebreaker when no point-in-time is available
+                        'document_key': {'type': 'keyword'},
+                        **MATCH_SCORE_MAPPING,
                         
                         # Multi-vector fields for different resume sections
                         'skills_vector': {'type': 'knn_vector', 'dimension': 1024},
@@ -120,7 +154,8 @@ def get_opensearch_client():
                                 'projects_text': {'type': 'text'},
                                 'education_text': {'type': 'text'},
                                 'summary': {'type': 'text'},
-                                'raw_text_preview': {'type': 'text'}
+                                'raw_text_preview': {'type': 'text'},
+                                **DERIVED_METADATA_MAPPING
                             }
                         }
                     }
@@ -143,12 +178,95 @@ How it works:
 Defines a helper to_string_list() to flatten lists of dicts/strings into readable strings for each metadata type (skills, work, project, cert, edu).
 Processes each field:
 Simple fields (name, email, phone, etc.) are converted to strings.
-Skills are joined into a string and also stored as a list.
+Skills are joined into a string and also stored as a list, plus their canonical skill ids and bitset.
 Work experience, certifications, projects, and education are flattened into readable text.
 Adds a truncated preview of the raw resume text for debugging.
+Derives location_key, skill_ids, skill_bits and total_experience_months (derive_metadata_features), typed fields the matching Lambda filters, scores and aggregates on.
 Logs the normalization step.
 On error, returns a safe default structure.'''
 
+MONTH_NAMES = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+CURRENT_MARKERS = ('present', 'current', 'now', 'till date', 'ongoing')
+
+
+def derive_location_key(location):
+    """City-level key of a free-text location ('Mumbai, India' -> 'mumbai'); None when there is none"""
+    if not location:
+        return None
+    key = ' '.join(re.findall(r'\w+', str(location).split(',')[0].lower()))
+    return key or None
+
+
+def parse_month_index(value):
+    """Months since year 0 of a resume date like '2019', 'Mar 2019', '03/2019' or '2019-03'; None without a year"""
+    text = str(value).lower()
+    year_match = re.search(r'\b(19|20)\d{2}\b', text)
+    if not year_match:
+        return None
+    month = 1
+    name_match = re.search(r'\b(' + '|'.join(MONTH_NAMES) + r')', text)
+    numeric_match = (re.search(r'\b(\d{1,2})[/\-.](?:19|20)\d{2}\b', text) or
+                     re.search(r'\b(?:19|20)\d{2}[/\-.](\d{1,2})\b', text))
+    if name_match:
+        month = MONTH_NAMES.index(name_match.group(1)) + 1
+    elif numeric_match and 1 <= int(numeric_match.group(1)) <= 12:
+        month = int(numeric_match.group(1))
+    return int(year_match.group(0)) * 12 + month - 1
+
+
+def derive_experience_months(work_experience, now=None):
+    """Total months of work experience, counting overlapping jobs once
+
+    Entries without an end date, or ending 'present', run until now. Year-only dates count from January,
+    so '2019 - 2021' is 24 months. Returns None without entries or when no entry has a usable start date,
+    so resumes without dated experience never match an experience level.
+    """
+    if not isinstance(work_experience, list) or not work_experience:
+        return None
+    now = now or datetime.utcnow()
+    current = now.year * 12 + now.month - 1
+
+    intervals = []
+    dated = False
+    for entry in work_experience:
+        if not isinstance(entry, dict):
+            continue
+        start = parse_month_index(entry.get('start_date') or entry.get('startDate') or entry.get('from') or '')
+        if start is None:
+            continue
+        dated = True
+        end_value = entry.get('end_date') or entry.get('endDate') or entry.get('to') or ''
+        if not end_value or entry.get('current') is True or any(marker in str(end_value).lower() for marker in CURRENT_MARKERS):
+            end = current
+        else:
+            end = parse_month_index(end_value)
+            if end is None:
+                continue
+        if end > start:
+            intervals.append((start, min(end, current)))
+
+    if not dated:
+        return None
+    total = 0
+    covered_until = None
+    for start, end in sorted(intervals):
+        if covered_until is not None and start < covered_until:
+            start = covered_until
+        if end > start:
+            total += end - start
+            covered_until = end
+    return total
+
+def derive_metadata_features(location, skills_list, work_experience):
+    """Typed metadata fields the matching Lambda reads instead of parsing text (see DERIVED_METADATA_MAPPING)"""
+    skill_ids = canonical_skill_ids(skills_list)
+    return {
+        'location_key': derive_location_key(location),
+        'skill_ids': skill_ids,
+        'skill_bits': skill_bitset(skill_ids),
+        'total_experience_months': derive_experience_months(work_experience)
+    }
+
 def normalize_metadata_for_opensearch(metadata, raw_text):
     """Normalize metadata to ensure compatibility with OpenSearch schema"""
     try:
@@ -258,6 +376,9 @@ def normalize_metadata_for_opensearch(metadata, raw_text):
         # Add truncated raw text for debugging
         normalized['raw_text_preview'] = raw_text[:1000] if raw_text else ''
         
+        # Typed fields for facet counts, filters and skill scoring, derived once here instead of at query time
+        normalized.update(derive_metadata_features(metadata.get('location'), skills_list, work_exp))
+        
         logger.info(f"Normalized metadata created")
         return normalized
         
@@ -270,12 +391,16 @@ def normalize_metadata_for_opensearch(metadata, raw_text):
             'location': None,
             'skills': '',
             'skills_list': [],
+            'skill_ids': [],
+            'skill_bits': skill_bitset([]),
             'work_experience_text': '',
             'certifications': '',
             'projects_text': '',
             'education_text': '',
             'summary': None,
-            'raw_text_preview': raw_text[:1000] if raw_text else ''
+            'raw_text_preview': raw_text[:1000] if raw_text else '',
+            'location_key': None,
+            'total_experience_months': None
         }
 
 #4. Resume Indexing
@@ -284,15 +409,18 @@ Purpose: Indexes a complete resume document (with metadata and embeddings) into
 How it works:
 Builds a document with all required fields, including:
 IDs, file info, candidate name, S3 key, upload date
+A document_key (random UUID), unique per document, so the matching Lambda can page through resumes without sorting on _id
 Normalized metadata
 Embeddings (skills, experience, certification, projects)
 Indexes the document into OpenSearch with a timeout.
 Logs the document ID on success.
+Returns the OpenSearch response plus a freshness_token ('upload_date|resume_id|_id' of the new document):
+passing it to the matching Lambda as min_freshness makes that request see this resume without refreshing every time.
 On error, raises a specific exception based on the error type (timeout, connection, permission, not found, or generic).
 '''
 
-def index_resume_document(opensearch, resume_id, job_description_id, filename, candidate_name, s3_key, normalized_metadata, embeddings, nano_id=None):
-    """Index resume document in OpenSearch"""
+def index_resume_document(opensearch, resume_id, job_description_id, filename, candidate_name, s3_key, normalized_metadata, embeddings, nano_id=None, match_scores=None):
+    """Index resume document in OpenSearch; the response carries a freshness_token naming the new document"""
     try:
         document = {
             'resume_id': resume_id,
@@ -302,8 +430,10 @@ def index_resume_document(opensearch, resume_id, job_description_id, filename, c
             'candidate_name': candidate_name,
             's3_key': s3_key,
             'nano_Id': nano_id,
+            'document_key': uuid.uuid4().hex,
             'metadata': normalized_metadata,
-            **embeddings
+            **embeddings,
+            **(match_scores or {})
         }
 
         # Add timeout setting for faster indexing
@@ -313,7 +443,7 @@ def index_resume_document(opensearch, resume_id, job_description_id, filename, c
             timeout=30  # Set explicit timeout (seconds as number)
         )
         logger.info(f"Indexed document with ID: {response.get('_id')}")
-        return response
+        return {**response, 'freshness_token': f"{document['upload_date']}|{resume_id}|{response.get('_id')}"}
         
     except Exception as e:
         error_msg = str(e)
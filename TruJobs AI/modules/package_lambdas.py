@@ -0,0 +1,91 @@
+'''
+Summary
+Packages the Lambda directories with the modules they share from modules/shared (skill_taxonomy.py).
+The shared modules live only in modules/shared; this build step copies them in, so no Lambda directory
+depends on git symlinks. Run from this directory:
+    python package_lambdas.py [--output-dir ../dist] [LAMBDA ...]   # one deployment zip per Lambda
+    python package_lambdas.py --copy [LAMBDA ...]                   # copy the shared modules in for local runs
+Dependencies from requirements.txt are not bundled; they ship as before.
+'''
+#1. Imports and Logger Setup
+import argparse
+import logging
+import os
+import zipfile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger()
+
+MODULES_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = os.path.join(MODULES_DIR, 'shared')
+
+# Lambda directory -> shared modules it imports
+LAMBDA_SHARED_MODULES = {
+    'new_jd_logic': ['skill_taxonomy.py'],
+    'new_matching_logic': ['skill_taxonomy.py'],
+    'new_resume_logic': ['skill_taxonomy.py'],
+}
+
+SKIPPED_DIRS = {'__pycache__'}
+SKIPPED_SUFFIXES = ('.pyc',)
+
+#2. Local Copies
+'''
+Purpose: Put the shared modules next to a Lambda's own modules, so scripts and tests run from its directory.
+How it works:
+The copies are ignored by git. An existing file (or an old symlink) is replaced rather than written through.'''
+
+def copy_shared_modules(lambda_name):
+    """Copy the shared modules of one Lambda into its directory"""
+    for module in LAMBDA_SHARED_MODULES[lambda_name]:
+        target = os.path.join(MODULES_DIR, lambda_name, module)
+        if os.path.lexists(target):
+            os.remove(target)
+        with open(os.path.join(SHARED_DIR, module), 'rb') as source, open(target, 'wb') as copy:
+            copy.write(source.read())
+        logger.info(f"Copied shared/{module} into {lambda_name}/")
+
+#3. Deployment Zips
+'''
+Purpose: Build the deployment zip of one Lambda.
+How it works:
+Every file of the Lambda directory goes to the zip root except caches and local copies of shared modules,
+which are always taken from modules/shared so a stale copy is never deployed.'''
+
+def build_lambda_zip(lambda_name, output_dir):
+    """Write <output_dir>/<lambda_name>.zip and return its path"""
+    lambda_dir = os.path.join(MODULES_DIR, lambda_name)
+    shared_modules = LAMBDA_SHARED_MODULES[lambda_name]
+    os.makedirs(output_dir, exist_ok=True)
+    zip_path = os.path.join(output_dir, f"{lambda_name}.zip")
+
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for root, dirs, files in os.walk(lambda_dir):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+            for name in sorted(files):
+                arcname = os.path.relpath(os.path.join(root, name), lambda_dir)
+                if arcname in shared_modules or name.endswith(SKIPPED_SUFFIXES):
+                    continue
+                archive.write(os.path.join(root, name), arcname)
+        for module in shared_modules:
+            archive.write(os.path.join(SHARED_DIR, module), module)
+
+    logger.info(f"Built {zip_path}")
+    return zip_path
+
+#4. Command Line Entry Point
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Package Lambda directories with their shared modules')
+    parser.add_argument('lambdas', nargs='*', help=f"Lambda directories (default: all of {', '.join(sorted(LAMBDA_SHARED_MODULES))})")
+    parser.add_argument('--copy', action='store_true', help='Copy the shared modules into the Lambda directories instead of zipping')
+    parser.add_argument('--output-dir', default=os.path.join(MODULES_DIR, '..', 'dist'), help='Where the zips are written')
+    args = parser.parse_args()
+    unknown = sorted(set(args.lambdas) - set(LAMBDA_SHARED_MODULES))
+    if unknown:
+        parser.error(f"unknown Lambda directories: {', '.join(unknown)}")
+
+    for lambda_name in args.lambdas or sorted(LAMBDA_SHARED_MODULES):
+        if args.copy:
+            copy_shared_modules(lambda_name)
+        else:
+            build_lambda_zip(lambda_name, os.path.normpath(args.output_dir))
@@ -0,0 +1,267 @@
+'''
+Summary
+Canonical skill taxonomy shared by the resume and matching Lambdas.
+modules/package_lambdas.py copies this file into each Lambda, so both import it as skill_taxonomy and always agree on skill ids:
+ingest stores the ids on metadata.skill_ids, matching compares them as sets.
+The taxonomy is compiled once at import into a flat alias -> skill id dict, so a lookup is one hash probe.
+Taxonomy skills also have a fixed bit, so a skill set can be stored as SKILL_BITSET_WORDS 64-bit integers
+and compared with AND + popcount (the matching Lambda decodes them into NumPy, see skill_overlap.py).
+'''
+import re
+
+# (skill id, aliases). The id is also an alias. Append new skills at the end and never reorder or
+# remove entries: a skill's position is its stable index.
+SKILL_TAXONOMY = (
+    ('python', ('py', 'python3', 'python 3')),
+    ('java', ('java se', 'java ee', 'j2ee', 'core java')),
+    ('javascript', ('js', 'ecmascript', 'es6', 'vanilla js')),
+    ('typescript', ('ts',)),
+    ('c', ('c language', 'ansi c')),
+    ('cpp', ('c++', 'cplusplus')),
+    ('csharp', ('c#', 'c sharp')),
+    ('go', ('golang',)),
+    ('rust', ()),
+    ('kotlin', ()),
+    ('swift', ()),
+    ('objective-c', ('objc', 'obj-c')),
+    ('php', ()),
+    ('ruby', ()),
+    ('scala', ()),
+    ('r', ('r language', 'r programming')),
+    ('matlab', ()),
+    ('perl', ()),
+    ('bash', ('shell scripting', 'shell script', 'unix shell')),
+    ('powershell', ()),
+    ('sql', ('structured query language', 't-sql', 'tsql', 'pl/sql', 'plsql')),
+    ('html', ('html5', 'hypertext markup language')),
+    ('css', ('css3', 'cascading style sheets')),
+    ('sass', ('scss',)),
+    ('tailwind', ('tailwind css', 'tailwindcss')),
+    ('bootstrap', ()),
+    ('react', ('reactjs', 'react.js', 'react js')),
+    ('react-native', ('react native',)),
+    ('redux', ()),
+    ('angular', ('angularjs', 'angular.js')),
+    ('vue', ('vuejs', 'vue.js')),
+    ('nextjs', ('next.js', 'next')),
+    ('svelte', ()),
+    ('jquery', ()),
+    ('node', ('nodejs', 'node.js')),
+    ('express', ('expressjs', 'express.js')),
+    ('nestjs', ('nest.js',)),
+    ('django', ()),
+    ('flask', ()),
+    ('fastapi', ()),
+    ('spring', ('spring framework', 'spring mvc')),
+    ('spring-boot', ('springboot', 'spring boot')),
+    ('hibernate', ()),
+    ('dotnet', ('.net', '.net core', 'dotnet core', 'asp.net', 'asp.net core')),
+    ('rails', ('ruby on rails', 'ror')),
+    ('laravel', ()),
+    ('graphql', ()),
+    ('rest-api', ('rest', 'restful', 'rest apis', 'restful api', 'restful apis', 'rest api')),
+    ('grpc', ()),
+    ('microservices', ('microservice', 'microservices architecture')),
+    ('mysql', ('my-sql',)),
+    ('postgresql', ('postgres', 'pg', 'psql')),
+    ('oracle', ('oracle db', 'oracle database')),
+    ('sql-server', ('mssql', 'ms sql', 'microsoft sql server', 'sql server')),
+    ('sqlite', ()),
+    ('mongodb', ('mongo',)),
+    ('redis', ()),
+    ('cassandra', ('apache cassandra',)),
+    ('dynamodb', ('dynamo db', 'amazon dynamodb')),
+    ('elasticsearch', ('elastic search', 'elk')),
+    ('opensearch', ()),
+    ('kafka', ('apache kafka',)),
+    ('rabbitmq', ()),
+    ('spark', ('apache spark', 'pyspark')),
+    ('hadoop', ('apache hadoop', 'hdfs')),
+    ('airflow', ('apache airflow',)),
+    ('snowflake', ()),
+    ('databricks', ()),
+    ('etl', ('elt', 'data pipelines')),
+    ('aws', ('amazon web services',)),
+    ('aws-lambda', ('lambda', 'aws lambda')),
+    ('aws-s3', ('s3', 'amazon s3')),
+    ('aws-ec2', ('ec2', 'amazon ec2')),
+    ('azure', ('microsoft azure',)),
+    ('gcp', ('google cloud', 'google cloud platform')),
+    ('docker', ('containerization',)),
+    ('kubernetes', ('k8s',)),
+    ('terraform', ()),
+    ('ansible', ()),
+    ('jenkins', ()),
+    ('ci-cd', ('ci/cd', 'cicd', 'continuous integration', 'continuous delivery', 'continuous deployment')),
+    ('github-actions', ('github actions',)),
+    ('git', ('github', 'gitlab', 'bitbucket')),
+    ('linux', ('unix', 'ubuntu', 'centos', 'red hat linux')),
+    ('devops', ()),
+    ('machine-learning', ('ml', 'machine learning')),
+    ('deep-learning', ('dl', 'deep learning')),
+    ('nlp', ('natural language processing',)),
+    ('computer-vision', ('cv', 'computer vision')),
+    ('generative-ai', ('genai', 'gen ai', 'generative ai', 'llm', 'llms', 'large language models')),
+    ('tensorflow', ()),
+    ('pytorch', ('torch',)),
+    ('keras', ()),
+    ('scikit-learn', ('sklearn', 'scikit learn')),
+    ('pandas', ()),
+    ('numpy', ()),
+    ('data-analysis', ('data analytics', 'data analysis')),
+    ('power-bi', ('powerbi', 'power bi')),
+    ('tableau', ()),
+    ('excel', ('ms excel', 'microsoft excel', 'advanced excel')),
+    ('selenium', ()),
+    ('junit', ()),
+    ('pytest', ()),
+    ('jest', ()),
+    ('cypress', ()),
+    ('android', ('android development',)),
+    ('ios', ('ios development',)),
+    ('flutter', ()),
+    ('figma', ()),
+    ('agile', ('scrum', 'agile methodology', 'kanban')),
+    ('jira', ()),
+    ('project-management', ('project management', 'pmp')),
+    ('communication', ('communication skills',)),
+    ('leadership', ('team leadership', 'team lead')),
+)
+
+# Width of a skill bitset: bit i is SKILL_TAXONOMY[i]. Fixed so stored bitsets stay valid as the
+# taxonomy grows; raise it (and re-index) only when the taxonomy outgrows it.
+SKILL_BITSET_WORDS = 4
+SKILL_BITSET_BITS = SKILL_BITSET_WORDS * 64
+
+# Aliases that are also common words or letters; free text only counts them as skills in skill lists
+AMBIGUOUS_TEXT_ALIASES = frozenset({'c', 'r', 'go', 'next', 'rest', 'lambda', 'express', 'cv', 'dl', 'pg', 'ts', 'py',
+                                    'ror', 'elt', 'torch', 'spring', 'swift', 'communication', 'leadership'})
+
+# Longest alias in words, the widest n-gram extract_skill_ids has to try
+MAX_ALIAS_WORDS = 4
+
+# Word-like runs of free text; keeps the characters aliases rely on (c++, c#, node.js, ci/cd)
+TEXT_TOKEN = re.compile(r'[a-z0-9+#][a-z0-9+#./\-]*')
+
+# Separators between skills when a skill list arrives as one string
+SKILL_LIST_SEPARATORS = re.compile(r'[,;|\n]+')
+
+# Characters alias_key drops, so "Node.js", "node js" and "NodeJS" share one key
+ALIAS_KEY_DROP = re.compile(r'[\s._\-]+')
+
+
+def alias_key(skill):
+    """Lookup key of a skill name: lowercased, without whitespace, dots, dashes or underscores"""
+    if skill is None:
+        return ''
+    return ALIAS_KEY_DROP.sub('', str(skill).lower())
+
+
+def _compile_aliases():
+    aliases = {}
+    for skill_id, names in SKILL_TAXONOMY:
+        for name in (skill_id,) + names:
+            key = alias_key(name)
+            if aliases.setdefault(key, skill_id) != skill_id:
+                raise ValueError(f"Skill alias {name!r} maps to both {aliases[key]!r} and {skill_id!r}")
+    return aliases
+
+
+# Flat alias key -> skill id map, compiled once per process
+SKILL_ALIASES = _compile_aliases()
+
+# Stable index of every taxonomy skill id (its position in SKILL_TAXONOMY), which is also its bit
+SKILL_INDEX = {skill_id: index for index, (skill_id, _) in enumerate(SKILL_TAXONOMY)}
+if len(SKILL_INDEX) > SKILL_BITSET_BITS:
+    raise ValueError(f"SKILL_TAXONOMY has {len(SKILL_INDEX)} skills, more than {SKILL_BITSET_BITS} bitset bits")
+
+
+def canonical_skill_id(skill):
+    """Canonical id of one skill name, or None for an empty name
+
+    Names outside the taxonomy get their alias key as id, so they still match the same name written
+    differently ("Apache Beam" and "apache-beam") but never a different skill.
+    """
+    key = alias_key(skill)
+    if not key:
+        return None
+    return SKILL_ALIASES.get(key, key)
+
+
+def split_skill_names(skill):
+    """Individual skill names in one skill list entry
+
+    Entries are split on , ; | and newlines ("React, Node"). A name joined with '/' is split too
+    ("HTML/CSS", "C/C++") unless it is itself an alias ("CI/CD", "PL/SQL") or none of its parts is a
+    taxonomy alias ("TCP/IP" stays one name).
+    """
+    names = []
+    for name in SKILL_LIST_SEPARATORS.split(str(skill)):
+        parts = name.split('/')
+        if len(parts) > 1 and alias_key(name) not in SKILL_ALIASES and any(alias_key(part) in SKILL_ALIASES for part in parts):
+            names.extend(parts)
+        else:
+            names.append(name)
+    return names
+
+
+def canonical_skill_ids(skills):
+    """Sorted, de-duplicated canonical ids of a skill list or of one string (see split_skill_names)"""
+    if not skills:
+        return []
+    if isinstance(skills, str) or not isinstance(skills, (list, tuple, set, frozenset)):
+        skills = [skills]
+    names = (name for skill in skills if skill is not None for name in split_skill_names(skill))
+    return sorted({skill_id for skill_id in map(canonical_skill_id, names) if skill_id})
+
+
+def extract_skill_ids(texts):
+    """Canonical ids of the taxonomy skills mentioned in free text such as job requirements
+
+    Scans each text for the longest alias at every word (up to MAX_ALIAS_WORDS words). Ambiguous
+    aliases are skipped, and names outside the taxonomy are never returned.
+    """
+    if not texts:
+        return []
+    if isinstance(texts, str):
+        texts = [texts]
+    found = set()
+    for text in texts:
+        words = [word.rstrip('./-') for word in TEXT_TOKEN.findall(str(text).lower())]
+        start = 0
+        while start < len(words):
+            for width in range(min(MAX_ALIAS_WORDS, len(words) - start), 0, -1):
+                phrase = ' '.join(words[start:start + width])
+                skill_id = SKILL_ALIASES.get(alias_key(phrase))
+                if skill_id and (width > 1 or phrase not in AMBIGUOUS_TEXT_ALIASES):
+                    found.add(skill_id)
+                    start += width
+                    break
+            else:
+                start += 1
+    return sorted(found)
+
+
+def skill_bitset(skill_ids):
+    """Encode skill ids as SKILL_BITSET_WORDS signed 64-bit integers (the index stores them as long)
+
+    Ids outside the taxonomy have no bit and are left out.
+    """
+    words = [0] * SKILL_BITSET_WORDS
+    for skill_id in skill_ids or ():
+        index = SKILL_INDEX.get(skill_id)
+        if index is not None:
+            words[index // 64] |= 1 << (index % 64)
+    return [word - (1 << 64) if word >= 1 << 63 else word for word in words]
+
+
+def skill_ids_from_bitset(bitset):
+    """Taxonomy skill ids whose bits are set in one stored bitset"""
+    skill_ids = []
+    for word_index, word in enumerate(bitset or ()):
+        word &= (1 << 64) - 1
+        while word:
+            low_bit = word & -word
+            skill_ids.append(SKILL_TAXONOMY[word_index * 64 + low_bit.bit_length() - 1][0])
+            word ^= low_bit
+    return skill_ids
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+ANN index benchmark for text-based matching:
+1) Generate a synthetic resume corpus whose section vectors cluster around shared topics
+2) Build the IVF index from modules/new_matching_logic/ann_index.py
+3) For a sweep of probe counts, compare recall@k and query latency against brute-force scoring
+
+Notes:
+- Runs fully offline (no AWS calls are made); the index is built in memory, not persisted.
+- Latency covers probing plus exact rescoring of the shortlist with rank_packed_resumes.
+- Usage: python benchmark_ann_index.py [corpus_size]
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+import numpy as np
+
+MATCHING_DIR = Path(__file__).resolve().parent.parent / 'modules' / 'new_matching_logic'
+# skill_taxonomy.py lives in modules/shared; the Lambda directory only gets a copy at package time
+SHARED_DIR = MATCHING_DIR.parent / 'shared'
+sys.path.insert(0, str(MATCHING_DIR))
+sys.path.insert(0, str(SHARED_DIR))
+
+from ann_index import build_ann_index, search_ann_index, brute_force_scores  # noqa: E402
+from similarity_calculator import rank_packed_resumes, select_top_k  # noqa: E402
+from vector_codec import select_rows  # noqa: E402
+
+# =========================
+# Configuration
+# =========================
+DIMENSION = 1024
+SECTIONS = 4
+CORPUS_SIZE = 10000
+TOPICS = 64
+QUERIES = 20
+TOP_K = 10
+PROBE_SWEEP = [1, 2, 4, 8, 16, 32]
+SEED = 11
+
+
+# =========================
+# Helpers
+# =========================
+
+def make_corpus(count: int, rng: np.random.Generator):
+    """Resumes draw their sections from one main topic plus noise; queries are noisy topics"""
+    topics = rng.normal(0, 1, (TOPICS, DIMENSION))
+    main_topic = rng.integers(0, TOPICS, count)
+    vectors = topics[main_topic][:, None, :] * 1.5 + rng.normal(0, 1, (count, SECTIONS, DIMENSION))
+    status = np.ones((count, SECTIONS), dtype=np.int8)
+    resumes = [{'resume_id': f'resume-{i:06d}', 'candidate_name': f'Candidate {i}', 'metadata': {}}
+               for i in range(count)]
+    queries = topics[rng.integers(0, TOPICS, QUERIES)] + rng.normal(0, 1, (QUERIES, DIMENSION))
+    return vectors.astype(np.float32), status, resumes, queries
+
+
+def run_queries(index, queries, probes: int) -> Dict[str, Any]:
+    resume_ids = [resume['resume_id'] for resume in index['resumes']]
+    recalls: List[float] = []
+    latencies: List[float] = []
+    shortlists: List[int] = []
+    for query in queries:
+        expected = {resume_ids[i] for i in select_top_k(brute_force_scores(index, query), resume_ids, TOP_K)}
+
+        start = time.perf_counter()
+        if probes:
+            rows, info = search_ann_index(index, query, probes)
+            shortlists.append(info['ann_shortlist'])
+        else:
+            rows = np.arange(len(resume_ids))
+            shortlists.append(len(rows))
+        matches = rank_packed_resumes(
+            query, select_rows(index['vectors'], rows), index['status'][rows],
+            [index['resumes'][row] for row in rows], -1.0, TOP_K
+        )
+        latencies.append(time.perf_counter() - start)
+
+        recalls.append(len(expected & {match['resume_id'] for match in matches}) / TOP_K)
+
+    return {
+        'probes': probes or 'all',
+        'recall': float(np.mean(recalls)),
+        'latency_ms': float(np.median(latencies) * 1000),
+        'shortlist': float(np.mean(shortlists))
+    }
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else CORPUS_SIZE
+    rng = np.random.default_rng(SEED)
+
+    print(f'🚀 Benchmarking IVF index on {count} resumes ({QUERIES} queries, recall@{TOP_K})...')
+    vectors, status, resumes, queries = make_corpus(count, rng)
+
+    build_start = time.perf_counter()
+    index = build_ann_index(vectors, status, resumes)
+    print(f"Index build: {time.perf_counter() - build_start:.2f}s, {len(index['centroids'])} lists")
+
+    print(f"{'probes':>8} {'shortlist':>10} {'recall@' + str(TOP_K):>10} {'p50 (ms)':>9}")
+    for probes in [None] + PROBE_SWEEP:
+        result = run_queries(index, queries, probes)
+        print(f"{result['probes']:>8} {result['shortlist']:>10.0f} {result['recall']:>10.3f} {result['latency_ms']:>9.2f}")
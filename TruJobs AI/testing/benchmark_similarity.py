@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Similarity scoring benchmark:
+1) Generate a synthetic candidate pool with 4 x 1024-d section vectors per resume
+2) Score it with the legacy per-resume loop and with the packed batch engine
+3) Check that similarity_score and vector_scores agree and report candidates per second
+
+Notes:
+- Runs fully offline against modules/new_matching_logic (no AWS calls are made).
+- "pack" is the list-to-float32 conversion and "kernel" is the matrix multiply alone; with
+  columnar input the kernel time is what a request pays.
+- Usage: python benchmark_similarity.py [candidates ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+MATCHING_DIR = Path(__file__).resolve().parent.parent / 'modules' / 'new_matching_logic'
+# skill_taxonomy.py lives in modules/shared; the Lambda directory only gets a copy at package time
+SHARED_DIR = MATCHING_DIR.parent / 'shared'
+sys.path.insert(0, str(MATCHING_DIR))
+sys.path.insert(0, str(SHARED_DIR))
+
+from similarity_calculator import (  # noqa: E402
+    calculate_multi_vector_similarity, pack_resume_vectors, score_packed_vectors
+)
+
+# =========================
+# Configuration
+# =========================
+DIMENSION = 1024
+CANDIDATE_COUNTS = [100, 1000, 10000]
+SCORE_TOLERANCE = 1e-5
+SIMILARITY_THRESHOLD = -1.0  # keep every candidate so all scores are compared
+SEED = 42
+
+
+# =========================
+# Helpers
+# =========================
+
+def make_candidates(count: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    """Build resume dicts shaped like get_resume_embeddings output, with some empty and zero vectors"""
+    fields = ['skills_vector', 'experience_vector', 'certification_vector', 'projects_vector']
+    candidates = []
+    for i in range(count):
+        resume = {
+            'resume_id': f'resume-{i:06d}',
+            'candidate_name': f'Candidate {i}',
+            'nano_Id': None,
+            'metadata': {}
+        }
+        for j, field in enumerate(fields):
+            if (i + j) % 17 == 0:
+                resume[field] = []
+            elif (i + j) % 29 == 0:
+                resume[field] = [0.0] * DIMENSION
+            else:
+                resume[field] = rng.normal(0, 1, DIMENSION).tolist()
+        candidates.append(resume)
+    return candidates
+
+
+def legacy_similarity(job_embedding, resume_embeddings, similarity_threshold):
+    """Reference copy of the original per-resume scoring loop"""
+    job_embedding_array = np.array(job_embedding)
+    results = {}
+    for resume in resume_embeddings:
+        vectors = [resume.get('skills_vector', []), resume.get('experience_vector', []),
+                   resume.get('certification_vector', []), resume.get('projects_vector', [])]
+        names = ['skills', 'experience', 'certifications', 'projects']
+        vector_similarities = []
+        vector_scores = {}
+        for vector, name in zip(vectors, names):
+            if vector and len(vector) > 0:
+                vector_array = np.array(vector)
+                if len(vector_array) != len(job_embedding_array):
+                    continue
+                dot_product = np.dot(job_embedding_array, vector_array)
+                job_norm = np.linalg.norm(job_embedding_array)
+                vector_norm = np.linalg.norm(vector_array)
+                similarity = 0.0 if job_norm == 0 or vector_norm == 0 else dot_product / (job_norm * vector_norm)
+                vector_similarities.append(float(similarity))
+                vector_scores[name] = float(similarity)
+            else:
+                vector_scores[name] = 0.0
+        if vector_similarities:
+            avg_similarity = sum(vector_similarities) / len(vector_similarities)
+            if avg_similarity >= similarity_threshold:
+                results[resume['resume_id']] = (avg_similarity, vector_scores)
+    return results
+
+
+def compare(legacy: Dict[str, Any], batch: List[Dict[str, Any]]) -> float:
+    """Return the largest absolute score difference between both engines"""
+    if len(legacy) != len(batch):
+        raise AssertionError(f'Result count mismatch: legacy={len(legacy)} batch={len(batch)}')
+    max_diff = 0.0
+    for match in batch:
+        expected_score, expected_vectors = legacy[match['resume_id']]
+        if set(expected_vectors) != set(match['vector_scores']):
+            raise AssertionError(f"vector_scores keys differ for {match['resume_id']}")
+        max_diff = max(max_diff, abs(expected_score - match['similarity_score']))
+        for name, value in expected_vectors.items():
+            max_diff = max(max_diff, abs(value - match['vector_scores'][name]))
+    return max_diff
+
+
+def run(count: int, rng: np.random.Generator) -> Dict[str, Any]:
+    job_embedding = rng.normal(0, 1, DIMENSION).tolist()
+    candidates = make_candidates(count, rng)
+
+    legacy_start = time.perf_counter()
+    legacy = legacy_similarity(job_embedding, candidates, SIMILARITY_THRESHOLD)
+    legacy_time = time.perf_counter() - legacy_start
+
+    batch_start = time.perf_counter()
+    batch = calculate_multi_vector_similarity(job_embedding, candidates, SIMILARITY_THRESHOLD)
+    batch_time = time.perf_counter() - batch_start
+
+    pack_start = time.perf_counter()
+    vectors, status = pack_resume_vectors(candidates, DIMENSION)
+    pack_time = time.perf_counter() - pack_start
+
+    kernel_start = time.perf_counter()
+    score_packed_vectors(job_embedding, vectors, status)
+    kernel_time = time.perf_counter() - kernel_start
+
+    max_diff = compare(legacy, batch)
+    if max_diff > SCORE_TOLERANCE:
+        raise AssertionError(f'Scores diverge by {max_diff:.2e} (tolerance {SCORE_TOLERANCE:.0e})')
+
+    return {
+        'candidates': count,
+        'legacy_time': legacy_time,
+        'batch_time': batch_time,
+        'pack_time': pack_time,
+        'kernel_time': kernel_time,
+        'speedup': legacy_time / batch_time if batch_time else float('inf'),
+        'max_diff': max_diff
+    }
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or CANDIDATE_COUNTS
+    rng = np.random.default_rng(SEED)
+
+    print('🚀 Benchmarking multi-vector similarity scoring...')
+    print(f"{'candidates':>10} {'legacy (s)':>11} {'batch (s)':>10} {'pack (s)':>9} {'kernel (s)':>11} "
+          f"{'legacy c/s':>11} {'batch c/s':>11} {'kernel c/s':>11} {'speedup':>8} {'max diff':>9}")
+    for count in counts:
+        result = run(count, rng)
+        print(f"{result['candidates']:>10} {result['legacy_time']:>11.4f} {result['batch_time']:>10.4f} "
+              f"{result['pack_time']:>9.4f} {result['kernel_time']:>11.4f} "
+              f"{count / result['legacy_time']:>11.0f} {count / result['batch_time']:>11.0f} "
+              f"{count / result['kernel_time']:>11.0f} {result['speedup']:>7.1f}x {result['max_diff']:>9.1e}")
+    print('✅ Batch engine matches legacy scores within tolerance')
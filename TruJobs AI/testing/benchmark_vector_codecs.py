@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Vector codec accuracy report:
+1) Generate a synthetic candidate pool with 4 x 1024-d section vectors per resume
+2) Rank it exactly in float64, then with the float32, float16 and int8 codecs
+3) Report memory per pool, scoring time, score error and top-k recall against the exact ranking
+
+Notes:
+- Runs fully offline against modules/new_matching_logic (no AWS calls are made).
+- Section vectors share a few "topic" directions so cosines spread out like real embeddings
+  instead of all sitting near 0, which makes the ranking comparison meaningful.
+- Usage: python benchmark_vector_codecs.py [candidates]
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any
+
+import numpy as np
+
+MATCHING_DIR = Path(__file__).resolve().parent.parent / 'modules' / 'new_matching_logic'
+# skill_taxonomy.py lives in modules/shared; the Lambda directory only gets a copy at package time
+SHARED_DIR = MATCHING_DIR.parent / 'shared'
+sys.path.insert(0, str(MATCHING_DIR))
+sys.path.insert(0, str(SHARED_DIR))
+
+from similarity_calculator import score_packed_vectors, select_top_k  # noqa: E402
+from vector_codec import CODEC_BYTES, encode_vectors, encoded_nbytes  # noqa: E402
+
+# =========================
+# Configuration
+# =========================
+DIMENSION = 1024
+SECTIONS = 4
+CANDIDATES = 10000
+TOPICS = 16
+TOP_K_VALUES = [10, 100]
+LAMBDA_MEMORY_MB = 512
+SEED = 7
+
+
+# =========================
+# Helpers
+# =========================
+
+def make_pool(count: int, rng: np.random.Generator):
+    """Return (job_embedding, vectors) where vectors mix shared topics with per-resume noise"""
+    topics = rng.normal(0, 1, (TOPICS, DIMENSION))
+    weights = rng.dirichlet(np.full(TOPICS, 0.3), size=(count, SECTIONS))
+    vectors = (weights @ topics) * 3.0 + rng.normal(0, 1, (count, SECTIONS, DIMENSION))
+    job_embedding = topics[:3].sum(axis=0) + rng.normal(0, 1, DIMENSION)
+    return job_embedding, vectors.astype(np.float32)
+
+
+def exact_scores(job_embedding: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Average section cosine computed entirely in float64"""
+    exact = vectors.astype(np.float64)
+    job = job_embedding.astype(np.float64)
+    cosines = (exact @ job) / (np.linalg.norm(exact, axis=2) * np.linalg.norm(job))
+    return cosines.mean(axis=1)
+
+
+def evaluate(codec: str, job_embedding, vectors, reference, resume_ids) -> Dict[str, Any]:
+    status = np.ones(vectors.shape[:2], dtype=np.int8)
+
+    encode_start = time.perf_counter()
+    encoded = encode_vectors(vectors, codec)
+    encode_time = time.perf_counter() - encode_start
+
+    score_start = time.perf_counter()
+    _, scores, _ = score_packed_vectors(job_embedding, encoded, status)
+    score_time = time.perf_counter() - score_start
+
+    errors = np.abs(scores - reference)
+    result = {
+        'codec': codec,
+        'megabytes': encoded_nbytes(encoded) / 1e6,
+        'encode_time': encode_time,
+        'score_time': score_time,
+        'max_error': float(errors.max()),
+        'mean_error': float(errors.mean())
+    }
+    for k in TOP_K_VALUES:
+        expected = set(select_top_k(reference, resume_ids, k))
+        actual = set(select_top_k(scores, resume_ids, k))
+        result[f'recall@{k}'] = len(expected & actual) / k
+    return result
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else CANDIDATES
+    rng = np.random.default_rng(SEED)
+
+    print(f'🚀 Comparing vector codecs on {count} candidates ({SECTIONS} x {DIMENSION}-d vectors each)...')
+    job_embedding, vectors = make_pool(count, rng)
+    reference = exact_scores(job_embedding, vectors)
+    resume_ids = [f'resume-{i:06d}' for i in range(count)]
+
+    recall_headers = ' '.join(f"{'recall@' + str(k):>10}" for k in TOP_K_VALUES)
+    print(f"{'codec':>8} {'MB':>8} {'MB/10k':>8} {'encode (s)':>11} {'score (s)':>10} "
+          f"{'max err':>9} {'mean err':>9} {recall_headers}")
+    for codec in CODEC_BYTES:
+        result = evaluate(codec, job_embedding, vectors, reference, resume_ids)
+        recalls = ' '.join(f"{result[f'recall@{k}']:>10.3f}" for k in TOP_K_VALUES)
+        print(f"{codec:>8} {result['megabytes']:>8.1f} {result['megabytes'] * 10000 / count:>8.1f} "
+              f"{result['encode_time']:>11.4f} {result['score_time']:>10.4f} "
+              f"{result['max_error']:>9.1e} {result['mean_error']:>9.1e} {recalls}")
+
+    list_megabytes = count * SECTIONS * DIMENSION * 24 / 1e6
+    print(f'ℹ️  The same pool as Python float lists holds ~{list_megabytes:.0f} MB of float objects '
+          f'(Lambda memory: {LAMBDA_MEMORY_MB} MB)')